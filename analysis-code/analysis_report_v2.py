@@ -7,21 +7,29 @@ from matplotlib.lines import Line2D
 import matplotlib.patheffects as pe
 import seaborn as sns
 import os
+import argparse
+import html
+import json
 import matplotlib.gridspec as gridspec
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.ensemble import RandomForestRegressor
-import geopandas as gpd
 import warnings
+from binned_kde import binned_kde
+from ingest import load_data, memory_report
+from trends import county_trends
+from rollups import rollup
+from spatial_stats import county_lisa, COUNTY_GEOJSON, QUADRANTS, NOT_SIGNIFICANT
+from time_cube import time_cube, weekday_hour
+from hotspots import crash_points, hotspots, CONUS, BANDWIDTH_KM
+from sensitivity import sweep, EDU_BINS, URBAN_CUTOFF
+from map_labels import place_labels, draw_labels
+from county_maps import county_geometry, draw_counties, robust_norm
+from anomalies import county_anomalies, SURPRISE_MIN, Z_MIN
 
 warnings.filterwarnings('ignore')
 
 # --- CONFIGURATION & DESIGN SYSTEM ---
 # Use the script's parent directory as base
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(BASE_DIR, "datasets")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # 1. CONSISTENT COLOR PALETTE
 # We defined a strict dictionary to be used in ALL plots.
@@ -82,105 +90,89 @@ def apply_theme(ax, title, xlabel, ylabel):
     ax.spines['bottom'].set_color(COLORS['grid'])
     ax.grid(axis='y', color=COLORS['grid'], linestyle='--', linewidth=0.5, alpha=0.7)
 
-# --- DATA LOADING (unchanged logic, optimized) ---
-def load_data():
-    print("Loading Data...")
-    all_rows = []
-    fips_map = {1:'AL', 2:'AK', 4:'AZ', 5:'AR', 6:'CA', 8:'CO', 9:'CT', 10:'DE', 11:'DC', 12:'FL', 13:'GA', 15:'HI', 16:'ID', 17:'IL', 18:'IN', 19:'IA', 20:'KS', 21:'KY', 22:'LA', 23:'ME', 24:'MD', 25:'MA', 26:'MI', 27:'MN', 28:'MS', 29:'MO', 30:'MT', 31:'NE', 32:'NV', 33:'NH', 34:'NJ', 35:'NM', 36:'NY', 37:'NC', 38:'ND', 39:'OH', 40:'OK', 41:'OR', 42:'PA', 44:'RI', 45:'SC', 46:'SD', 47:'TN', 48:'TX', 49:'UT', 50:'VT', 51:'VA', 53:'WA', 54:'WV', 55:'WI', 56:'WY'}
-    
-    # State Grid Coords (Reusable)
-    state_coords = {
-        'WA':(0,0), 'ID':(0,1), 'MT':(0,2), 'ND':(0,3), 'MN':(0,4), 'IL':(0,5), 'WI':(0,6), 'MI':(0,7), 'NY':(0,8), 'RI':(0,9), 'MA':(0,10),
-        'OR':(1,0), 'NV':(1,1), 'WY':(1,2), 'SD':(1,3), 'IA':(1,4), 'IN':(1,5), 'OH':(1,6), 'PA':(1,7), 'NJ':(1,8), 'CT':(1,9), 'ME':(0,11),
-        'CA':(2,0), 'UT':(2,1), 'CO':(2,2), 'NE':(2,3), 'MO':(2,4), 'KY':(2,5), 'WV':(2,6), 'VA':(2,7), 'MD':(2,8), 'DE':(2,9), 'NH':(1,11), 'VT':(1,10),
-        'AZ':(3,1), 'NM':(3,2), 'KS':(3,3), 'AR':(3,4), 'TN':(3,5), 'NC':(3,6), 'SC':(3,7), 'DC':(3,8),
-        'OK':(4,3), 'LA':(4,4), 'MS':(4,5), 'AL':(4,6), 'GA':(4,7),
-        'HI':(5,0), 'AK':(5,1), 'TX':(5,3), 'FL':(5,8)
-    }
+# --- HELPER FUNCTIONS ---
+# Rendering mode: 'final' writes 300-dpi PNGs to output/; 'preview' writes low-dpi PNGs to
+# output/preview/ plus a contact sheet; 'promote' renders only the chosen figures as final PNG + SVG.
+PREVIEW_DPI = 60
+RENDER = {'mode': 'final', 'only': None, 'saved': [], 'titles': {}}
 
-    for year in range(2010, 2024):
-        try:
-            edu_path = os.path.join(DATA_DIR, f"Education{year}.csv")
-            if not os.path.exists(edu_path): continue
-            edu = pd.read_csv(edu_path, encoding='latin1', low_memory=False)
-            
-            # Find attrs
-            attrs = edu['Attribute'].unique()
-            c_attr, p_attr = None, None
-            for a in attrs:
-                if "less than" in str(a).lower() and "high school" in str(a).lower():
-                    if "percent" in str(a).lower(): p_attr = a
-                    else: c_attr = a
-            if not c_attr: continue
-            
-            f_col = 'FIPS Code' if 'FIPS Code' in edu.columns else 'FIPS'
-            if f_col not in edu.columns: continue
-            
-            # Clean
-            edu['FIPS'] = pd.to_numeric(edu[f_col], errors='coerce')
-            edu = edu[edu['FIPS'].notna()]
-            edu = edu[edu['FIPS'] % 1000 != 0]
-            
-            piv = edu[edu['Attribute'].isin([c_attr, p_attr])].pivot(index='FIPS', columns='Attribute', values='Value').reset_index()
-            piv['Count_Less_HS'] = pd.to_numeric(piv[c_attr], errors='coerce')
-            piv['Pct_Less_HS'] = pd.to_numeric(piv[p_attr], errors='coerce')
-            piv['Population'] = (piv['Count_Less_HS'] / (piv['Pct_Less_HS']/100))
-            piv['FIPS_STR'] = piv['FIPS'].astype(int).astype(str).str.zfill(5)
-            
-            # FARS
-            fdirs = [d for d in os.listdir(DATA_DIR) if f"FARS{year}" in d]
-            if not fdirs: continue
-            fars_dir = os.path.join(DATA_DIR, fdirs[0])
-            acc_path = os.path.join(fars_dir, "ACCIDENT.CSV")
-            if not os.path.exists(acc_path): acc_path = os.path.join(fars_dir, "accident.csv")
-            if not os.path.exists(acc_path): continue
-            
-            acc = pd.read_csv(acc_path, encoding='latin1', low_memory=False)
-            acc.columns = [c.upper() for c in acc.columns]
-            acc['FIPS_STR'] = acc['STATE'].astype(str).str.zfill(2) + acc['COUNTY'].astype(str).str.zfill(3)
-            
-            # Factors
-            acc['Drunk'] = acc['DRUNK_DR'].fillna(0).astype(int)
-            w_col = 'WEATHER' if 'WEATHER' in acc.columns else 'WEATHER1'
-            acc['Bad_Weather'] = acc[w_col].isin([2,3,4,10,11]).astype(int)
-            acc['Dark'] = acc['LGT_COND'].isin([2,3]).astype(int)
-            
-            g = acc.groupby('FIPS_STR').agg({'ST_CASE':'count', 'FATALS':'sum', 'Drunk':'sum', 'Bad_Weather':'sum', 'Dark':'sum'}).reset_index()
-            
-            m = pd.merge(piv, g, on='FIPS_STR', how='left').fillna(0)
-            m['Year'] = year
-            m['State_Abbrev'] = m['FIPS_STR'].str[:2].astype(int).map(fips_map)
-            all_rows.append(m)
-        except: continue
-        
-    df = pd.concat(all_rows, ignore_index=True)
-    df = df[df['Population'] > 0]
-    
-    # Calc Rates
-    df['Fatality_Rate'] = (df['FATALS'] / df['Population']) * 100000
-    df['Drunk_Pct'] = (df['Drunk'] / df['ST_CASE']) * 100
-    df['Drunk_Rate_Per_100k'] = (df['Drunk'] / df['Population']) * 100000 # NEW METRIC
-    df['Dark_Pct'] = (df['Dark'] / df['ST_CASE']) * 100
-    df['Weather_Pct'] = (df['Bad_Weather'] / df['ST_CASE']) * 100
-    
-    df['Urbanicity'] = df['Population'].apply(lambda x: 'Urban' if x >= 50000 else 'Rural')
-    df['Edu_Group'] = pd.qcut(df['Pct_Less_HS'], 4, labels=['High Edu (Low Risk)', 'Med-High', 'Med-Low', 'Low Edu (High Risk)'])
-    
-    return df, state_coords
+def configure_rendering(preview=False, promote=None):
+    if preview:
+        RENDER['mode'] = 'preview'
+        plt.rcParams['figure.dpi'] = PREVIEW_DPI
+        plt.rcParams['savefig.dpi'] = PREVIEW_DPI
+    elif promote:
+        RENDER['mode'] = 'promote'
+        RENDER['only'] = {os.path.splitext(n)[0] for n in promote}
+
+def wants(*prefixes):
+    """Whether a stage producing figures with these name prefixes needs to run."""
+    if RENDER['only'] is None:
+        return True
+    return any(n.startswith(p) for n in RENDER['only'] for p in prefixes)
+
+def figure_title(fig):
+    """Suptitle, else the title of the largest axes (used as alt text by the report builder)."""
+    if fig._suptitle is not None and fig._suptitle.get_text():
+        return fig._suptitle.get_text()
+    for ax in sorted(fig.axes, key=lambda ax: -ax.bbox.width * ax.bbox.height):
+        for loc in ('left', 'center', 'right'):
+            if ax.get_title(loc):
+                return ax.get_title(loc)
+    return ""
 
-# --- HELPER FUNCTIONS ---
 def save(name):
+    stem = os.path.splitext(name)[0]
+    if RENDER['only'] is not None and stem not in RENDER['only']:
+        plt.close()
+        return
+    RENDER['titles'][name] = figure_title(plt.gcf())
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, name))
+    if RENDER['mode'] == 'preview':
+        out_dir = os.path.join(OUTPUT_DIR, "preview")
+        os.makedirs(out_dir, exist_ok=True)
+        plt.savefig(os.path.join(out_dir, name))
+    else:
+        plt.savefig(os.path.join(OUTPUT_DIR, name))
+        if RENDER['mode'] == 'promote':
+            plt.savefig(os.path.join(OUTPUT_DIR, stem + ".svg"))
     plt.close()
+    RENDER['saved'].append(name)
     print(f"Saved {name}")
 
+def write_contact_sheet():
+    """Index page of all preview figures, with the command to promote each one."""
+    out_dir = os.path.join(OUTPUT_DIR, "preview")
+    cards = []
+    for name in sorted(RENDER['saved']):
+        stem = html.escape(os.path.splitext(name)[0])
+        cards.append(f'<figure><a href="{html.escape(name)}"><img src="{html.escape(name)}" loading="lazy"></a>'
+                     f'<figcaption>{stem}<br><code>--promote {stem}</code></figcaption></figure>')
+    page = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Figure previews</title><style>'
+        f'body{{font-family:sans-serif;background:#F4F6F6;color:{COLORS["text"]};margin:24px}}'
+        '.grid{display:grid;grid-template-columns:repeat(auto-fill,minmax(320px,1fr));gap:16px}'
+        'figure{background:#fff;margin:0;padding:8px;border:1px solid #DDD}'
+        'img{width:100%;height:auto}figcaption{font-size:13px;margin-top:6px}'
+        '</style></head><body>'
+        f'<h1>Figure previews ({PREVIEW_DPI} dpi)</h1>'
+        '<p>Promote with <code>python analysis-code/analysis_report_v2.py --promote NAME [NAME ...]</code></p>'
+        f'<div class="grid">{"".join(cards)}</div></body></html>'
+    )
+    path = os.path.join(out_dir, "index.html")
+    with open(path, 'w') as f:
+        f.write(page)
+    print(f"Contact sheet: {path}")
+
 # --- USA CHOROPLETH MAP GENERATOR ---
 def plot_usa_choropleth(df, value_col, title, filename, cmap, agg_func='mean', legend_label=None):
     """Generates a proper USA choropleth map using actual state boundaries."""
+    import geopandas as gpd
     
-    # Aggregate data by state
-    if agg_func == 'mean':
+    # Aggregate data by state (state-level rollups are passed through as-is)
+    if df['State_Abbrev'].is_unique:
+        state_val = df[['State_Abbrev', value_col]].copy()
+    elif agg_func == 'mean':
         state_val = df.groupby('State_Abbrev')[value_col].mean().reset_index()
     else:
         state_val = df.groupby('State_Abbrev')[value_col].sum().reset_index()
@@ -260,63 +252,25 @@ def plot_usa_choropleth(df, value_col, title, filename, cmap, agg_func='mean', l
     cbar.ax.tick_params(labelsize=12)  # Larger tick font
     cbar.outline.set_visible(False)  # Remove border
     
-    # Small states where labels would overlap - skip these
-    small_states = ['RI', 'CT', 'NJ', 'DE', 'MD', 'DC', 'VT', 'NH', 'MA']
-    
-    # Add state abbreviation labels and values at centroids
-    for idx, row in usa_continental.iterrows():
-        state_abbrev = row['STUSPS']
-        
-        # Skip small states to avoid overlapping labels
-        if state_abbrev in small_states:
-            continue
-        
-        # Use representative_point() which guarantees a point inside the polygon
-        # This works better than centroid for irregular shapes like FL, LA, MI
-        rep_point = row.geometry.representative_point()
-        label_x = rep_point.x
-        label_y = rep_point.y
-        
-        val = row[value_col]
-        val_text = human_format(val)
-        
-        # Determine text color based on background darkness
-        if pd.notna(val):
-            # Get the color for this value
-            rgba = cm(norm(val))
-            # Calculate luminance (brightness)
-            luminance = 0.299 * rgba[0] + 0.587 * rgba[1] + 0.114 * rgba[2]
-            # Use white text on dark backgrounds, black on light
-            text_color = 'white' if luminance < 0.5 else COLORS['text']
-        else:
-            text_color = COLORS['text']
-        
-        # Add state abbreviation
-        ax.annotate(
-            text=state_abbrev,
-            xy=(label_x, label_y + 0.3),  # Slightly above center
-            ha='center',
-            va='center',
-            fontsize=12,
-            fontweight='bold',
-            color=text_color
-        )
-        
-        # Add value below abbreviation
-        if val_text:
-            ax.annotate(
-                text=val_text,
-                xy=(label_x, label_y - 0.3),  # Slightly below center
-                ha='center',
-                va='center',
-                fontsize=10,
-                fontweight='bold',
-                color=text_color
-            )
-    
     ax.axis('off')
     ax.set_title(title, fontsize=20, fontweight='bold', color=COLORS['primary'], pad=10, y=0.95)
     
+    # Use white text on dark fills, dark text on light ones (luminance of the fill color)
+    def text_color(val):
+        if pd.isna(val):
+            return COLORS['text']
+        rgba = cm(norm(val))
+        luminance = 0.299 * rgba[0] + 0.587 * rgba[1] + 0.114 * rgba[2]
+        return 'white' if luminance < 0.5 else COLORS['text']
+    
+    # State abbreviation over the value; states too small for the label get a leader line.
+    # Placements are in data units, so the layout is settled first.
+    plt.tight_layout()
+    lines = [usa_continental['STUSPS'].tolist(), [human_format(v) for v in usa_continental[value_col]]]
+    placements = place_labels(ax, usa_continental.geometry.values, lines, sizes=(12, 10))
+    draw_labels(ax, placements, lines, sizes=(12, 10), colors=[text_color(v) for v in usa_continental[value_col]],
+                leader_text=COLORS['text'])
+    
     # Add source note
     fig.text(0.5, 0.02, 'Data: FARS & Census (2010-2023) | Continental US Only', 
              ha='center', fontsize=9, color='grey', style='italic')
@@ -324,137 +278,195 @@ def plot_usa_choropleth(df, value_col, title, filename, cmap, agg_func='mean', l
     save(filename)
 
 # --- POSTER INFOGRAPHIC (NEW PROFESSIONAL DESIGN) ---
-def create_poster_infographic(df):
-    """Generates a professional 'Tale of Two Worlds' comparison poster."""
-    print("Generating Professional Poster Infographic...")
-    
-    # 1. Prepare Data: High Edu vs Low Edu (Quartiles)
-    high_edu = df[df['Edu_Group'].str.contains('High Edu')] # Top Quartile
-    low_edu = df[df['Edu_Group'].str.contains('Low Edu')]   # Bottom Quartile
-    
-    stats = {
-        'high': {
-            'fatality': high_edu['Fatality_Rate'].mean(),
-            'alcohol': high_edu['Drunk_Rate_Per_100k'].mean(),
-            'weather': high_edu['Weather_Pct'].mean(),
-            'dark': high_edu['Dark_Pct'].mean(),
-            'pop_label': "Urban / Suburban"
-        },
-        'low': {
-            'fatality': low_edu['Fatality_Rate'].mean(),
-            'alcohol': low_edu['Drunk_Rate_Per_100k'].mean(),
-            'weather': low_edu['Weather_Pct'].mean(),
-            'dark': low_edu['Dark_Pct'].mean(),
-            'pop_label': "Rural / Isolated"
-        }
-    }
-    
-    # Setup Canvas
-    fig = plt.figure(figsize=(16, 12))
-    fig.patch.set_facecolor('#F4F6F6') # Light Neutral Grey Background
-    gs = gridspec.GridSpec(10, 2)
-    
-    # --- HEADER ---
-    ax_header = fig.add_subplot(gs[0:2, :])
-    ax_header.axis('off')
-    ax_header.text(0.5, 0.7, "THE EDUCATION SAFETY GAP", ha='center', va='center', fontsize=32, fontweight='extra bold', color=COLORS['primary'])
-    ax_header.text(0.5, 0.35, "How Educational Attainment Correlates with Traffic Mortality (2010-2023)", ha='center', va='center', fontsize=16, color=COLORS['text'])
-    ax_header.axhline(y=0.1, xmin=0.1, xmax=0.9, color=COLORS['grid'], linewidth=2)
+# The poster is a fixed template: static artists are drawn once and only the numbers,
+# bar widths, subtitle and footer change between the national and per-state versions.
+POSTER_SUBTITLE = "How Educational Attainment Correlates with Traffic Mortality (2010-2023)"
+HIGH_EDU, LOW_EDU = 'High Edu (Low Risk)', 'Low Edu (High Risk)'
 
-    # --- LEFT PANEL (HIGH EDU / SAFE) ---
-    ax_left = fig.add_subplot(gs[2:9, 0])
-    ax_left.axis('off')
-    
-    # Background Box
-    rect_left = plt.Rectangle((0.05, 0), 0.9, 1, transform=ax_left.transAxes, color='white', zorder=0)
-    ax_left.add_patch(rect_left)
-    ax_left.text(0.5, 0.92, "HIGH GRADUATION RATE", transform=ax_left.transAxes, ha='center', fontsize=18, fontweight='bold', color=COLORS['safety'])
-    ax_left.text(0.5, 0.88, stats['high']['pop_label'], transform=ax_left.transAxes, ha='center', fontsize=12, style='italic', color='#7F8C8D')
+def poster_stats(high_edu, low_edu):
+    """Poster numbers from the top / bottom education quartile rollup rows (None if a quartile is absent)."""
+    def side(row):
+        if row is None:
+            return {'fatality': np.nan, 'alcohol': np.nan, 'weather': np.nan, 'dark': np.nan}
+        return {
+            'fatality': row['Fatality_Rate'],
+            'alcohol': row['Drunk_Rate_Per_100k'],
+            'weather': row['Weather_Pct'],
+            'dark': row['Dark_Pct'],
+        }
+    return {'high': side(high_edu), 'low': side(low_edu)}
 
-    # Main Metric: Fatality Rate
-    ax_left.text(0.5, 0.75, f"{stats['high']['fatality']:.1f}", transform=ax_left.transAxes, ha='center', fontsize=70, fontweight='bold', color=COLORS['safety'])
-    ax_left.text(0.5, 0.68, "Fatalities per 100k", transform=ax_left.transAxes, ha='center', fontsize=12, color=COLORS['text'])
-    
-    # Secondary Metrics
-    y_start = 0.50
-    gap = 0.12
-    
-    # Alcohol
-    ax_left.text(0.5, y_start, "Alcohol Incidents / 100k", transform=ax_left.transAxes, ha='center', fontsize=10, fontweight='bold', color=COLORS['primary'])
-    ax_left.text(0.5, y_start-0.05, f"{stats['high']['alcohol']:.1f}", transform=ax_left.transAxes, ha='center', fontsize=28, fontweight='bold', color=COLORS['safety'])
-    
-    # Dark
-    ax_left.text(0.5, y_start-gap, "Low Light Crash (Pct)", transform=ax_left.transAxes, ha='center', fontsize=10, fontweight='bold', color=COLORS['primary'])
-    ax_left.text(0.5, y_start-gap-0.05, f"{stats['high']['dark']:.1f}%", transform=ax_left.transAxes, ha='center', fontsize=28, fontweight='bold', color=COLORS['safety'])
+def poster_insight(stats, where=None):
+    ratio = stats['low']['fatality'] / stats['high']['fatality']
+    if not np.isfinite(ratio):
+        missing = "top" if np.isnan(stats['high']['fatality']) else "bottom"
+        return f"{where} has no counties in the national {missing} education quartile."
+    if where is None:
+        return f"KEY INSIGHT: Rural, low-education counties face a {ratio:.1f}x higher risk of death per capita."
+    if ratio >= 1:
+        return f"KEY INSIGHT: In {where}, low-education counties face a {ratio:.1f}x higher risk of death per capita."
+    return f"KEY INSIGHT: In {where}, low-education counties face a {1 / ratio:.1f}x lower risk of death per capita."
 
-    # --- RIGHT PANEL (LOW EDU / RISKY) ---
-    ax_right = fig.add_subplot(gs[2:9, 1])
-    ax_right.axis('off')
+def _poster_panel(ax, heading, pop_label, color, y_start=0.50, gap=0.12):
+    """One side of the poster; returns the artists that change per poster."""
+    ax.axis('off')
     
     # Background Box
-    rect_right = plt.Rectangle((0.05, 0), 0.9, 1, transform=ax_right.transAxes, color='white', zorder=0)
-    ax_right.add_patch(rect_right)
-    ax_right.text(0.5, 0.92, "LOW GRADUATION RATE", transform=ax_right.transAxes, ha='center', fontsize=18, fontweight='bold', color=COLORS['danger'])
-    ax_right.text(0.5, 0.88, stats['low']['pop_label'], transform=ax_right.transAxes, ha='center', fontsize=12, style='italic', color='#7F8C8D')
+    ax.add_patch(plt.Rectangle((0.05, 0), 0.9, 1, transform=ax.transAxes, color='white', zorder=0))
+    ax.text(0.5, 0.92, heading, transform=ax.transAxes, ha='center', fontsize=18, fontweight='bold', color=color)
+    ax.text(0.5, 0.88, pop_label, transform=ax.transAxes, ha='center', fontsize=12, style='italic', color='#7F8C8D')
 
     # Main Metric: Fatality Rate
-    ax_right.text(0.5, 0.75, f"{stats['low']['fatality']:.1f}", transform=ax_right.transAxes, ha='center', fontsize=70, fontweight='bold', color=COLORS['danger'])
-    ax_right.text(0.5, 0.68, "Fatalities per 100k", transform=ax_right.transAxes, ha='center', fontsize=12, color=COLORS['text'])
+    fatality = ax.text(0.5, 0.75, "", transform=ax.transAxes, ha='center', fontsize=70, fontweight='bold', color=color)
+    ax.text(0.5, 0.68, "Fatalities per 100k", transform=ax.transAxes, ha='center', fontsize=12, color=COLORS['text'])
     
     # Secondary Metrics
     # Alcohol
-    ax_right.text(0.5, y_start, "Alcohol Incidents / 100k", transform=ax_right.transAxes, ha='center', fontsize=10, fontweight='bold', color=COLORS['primary'])
-    ax_right.text(0.5, y_start-0.05, f"{stats['low']['alcohol']:.1f}", transform=ax_right.transAxes, ha='center', fontsize=28, fontweight='bold', color=COLORS['danger'])
+    ax.text(0.5, y_start, "Alcohol Incidents / 100k", transform=ax.transAxes, ha='center', fontsize=10, fontweight='bold', color=COLORS['primary'])
+    alcohol = ax.text(0.5, y_start-0.05, "", transform=ax.transAxes, ha='center', fontsize=28, fontweight='bold', color=color)
     
     # Dark
-    ax_right.text(0.5, y_start-gap, "Low Light Crash (Pct)", transform=ax_right.transAxes, ha='center', fontsize=10, fontweight='bold', color=COLORS['primary'])
-    ax_right.text(0.5, y_start-gap-0.05, f"{stats['low']['dark']:.1f}%", transform=ax_right.transAxes, ha='center', fontsize=28, fontweight='bold', color=COLORS['danger'])
+    ax.text(0.5, y_start-gap, "Low Light Crash (Pct)", transform=ax.transAxes, ha='center', fontsize=10, fontweight='bold', color=COLORS['primary'])
+    dark = ax.text(0.5, y_start-gap-0.05, "", transform=ax.transAxes, ha='center', fontsize=28, fontweight='bold', color=color)
 
     # --- CROSS COMPARISON (Visual Bars) ---
-    # Add small visual bars under the numbers
-    def draw_bar(ax, x, y, val, max_val, color):
-        width = (val / max_val) * 0.4
-        rect = plt.Rectangle((x - width/2, y), width, 0.015, transform=ax.transAxes, color=color)
-        ax.add_patch(rect)
-        # Background bar
-        rect_bg = plt.Rectangle((x - 0.2, y), 0.4, 0.015, transform=ax.transAxes, color='#ECF0F1', zorder=-1)
-        ax.add_patch(rect_bg)
+    # Small visual bars under the numbers; width is set per poster
+    def bar(y):
+        ax.add_patch(plt.Rectangle((0.3, y), 0.4, 0.015, transform=ax.transAxes, color='#ECF0F1', zorder=-1))
+        return ax.add_patch(plt.Rectangle((0.5, y), 0, 0.015, transform=ax.transAxes, color=color))
 
-    # Max values for scaling
-    max_alc = max(stats['high']['alcohol'], stats['low']['alcohol']) * 1.2
-    max_drk = max(stats['high']['dark'], stats['low']['dark']) * 1.2
+    return {'fatality': fatality, 'alcohol': alcohol, 'dark': dark,
+            'alcohol_bar': bar(y_start-0.07), 'dark_bar': bar(y_start-gap-0.07)}
 
-    draw_bar(ax_left, 0.5, y_start-0.07, stats['high']['alcohol'], max_alc, COLORS['safety'])
-    draw_bar(ax_left, 0.5, y_start-gap-0.07, stats['high']['dark'], max_drk, COLORS['safety'])
+def build_poster_template():
+    """Poster canvas with every static artist drawn once. Returns (fig, artists)."""
+    fig = plt.figure(figsize=(16, 12))
+    fig.patch.set_facecolor('#F4F6F6') # Light Neutral Grey Background
+    gs = gridspec.GridSpec(10, 2)
     
-    draw_bar(ax_right, 0.5, y_start-0.07, stats['low']['alcohol'], max_alc, COLORS['danger'])
-    draw_bar(ax_right, 0.5, y_start-gap-0.07, stats['low']['dark'], max_drk, COLORS['danger'])
+    # --- HEADER ---
+    ax_header = fig.add_subplot(gs[0:2, :])
+    ax_header.axis('off')
+    ax_header.text(0.5, 0.7, "THE EDUCATION SAFETY GAP", ha='center', va='center', fontsize=32, fontweight='extra bold', color=COLORS['primary'])
+    subtitle = ax_header.text(0.5, 0.35, POSTER_SUBTITLE, ha='center', va='center', fontsize=16, color=COLORS['text'])
+    ax_header.axhline(y=0.1, xmin=0.1, xmax=0.9, color=COLORS['grid'], linewidth=2)
+
+    # --- LEFT PANEL (HIGH EDU / SAFE) --- and --- RIGHT PANEL (LOW EDU / RISKY) ---
+    high = _poster_panel(fig.add_subplot(gs[2:9, 0]), "HIGH GRADUATION RATE", "Urban / Suburban", COLORS['safety'])
+    low = _poster_panel(fig.add_subplot(gs[2:9, 1]), "LOW GRADUATION RATE", "Rural / Isolated", COLORS['danger'])
 
     # --- FOOTER ---
     ax_footer = fig.add_subplot(gs[9, :])
     ax_footer.axis('off')
-    ratio = stats['low']['fatality'] / stats['high']['fatality']
-    ax_footer.text(0.5, 0.5, f"KEY INSIGHT: Rural, low-education counties face a {ratio:.1f}x higher risk of death per capita.", 
-                   ha='center', va='center', fontsize=16, fontweight='bold', color='white', 
-                   bbox=dict(facecolor=COLORS['primary'], edgecolor='none', boxstyle='round,pad=1'))
+    footer = ax_footer.text(0.5, 0.5, "", ha='center', va='center', fontsize=16, fontweight='bold', color='white', 
+                            bbox=dict(facecolor=COLORS['primary'], edgecolor='none', boxstyle='round,pad=1'))
+    fig.tight_layout()
+    return fig, {'high': high, 'low': low, 'subtitle': subtitle, 'footer': footer}
+
+def fill_poster(artists, stats, subtitle=POSTER_SUBTITLE, insight=None):
+    """Write one poster's numbers into the template artists."""
+    def fmt(v, suffix=""):
+        return f"{v:.1f}{suffix}" if np.isfinite(v) else "n/a"
+
+    # Max values for scaling
+    max_alc = np.nanmax([stats['high']['alcohol'], stats['low']['alcohol'], 0]) * 1.2
+    max_drk = np.nanmax([stats['high']['dark'], stats['low']['dark'], 0]) * 1.2
+    for side in ('high', 'low'):
+        a, s = artists[side], stats[side]
+        a['fatality'].set_text(fmt(s['fatality']))
+        a['alcohol'].set_text(fmt(s['alcohol']))
+        a['dark'].set_text(fmt(s['dark'], "%"))
+        for key, max_val in (('alcohol', max_alc), ('dark', max_drk)):
+            width = (s[key] / max_val) * 0.4 if max_val > 0 and np.isfinite(s[key]) else 0
+            a[f"{key}_bar"].set_bounds(0.5 - width/2, a[f"{key}_bar"].get_y(), width, 0.015)
+    artists['subtitle'].set_text(subtitle)
+    artists['footer'].set_text(insight or poster_insight(stats))
 
+def create_poster_infographic(df):
+    """Generates a professional 'Tale of Two Worlds' comparison poster."""
+    print("Generating Professional Poster Infographic...")
+    
+    # 1. Prepare Data: High Edu vs Low Edu (Quartiles), population-weighted from the rollup cube
+    edu = rollup(df, ['Edu_Group']).set_index('Edu_Group')
+    stats = poster_stats(edu.loc[HIGH_EDU], edu.loc[LOW_EDU]) # Top / Bottom Quartile
+    
+    fig, artists = build_poster_template()
+    fill_poster(artists, stats)
     save("INFOGRAPHIC_Composite.png")
 
+# --- PER-STATE POSTERS (BATCH) ---
+_POSTER = {}
+
+def _poster_worker_init(dpi):
+    plt.rcParams['figure.dpi'] = dpi
+    plt.rcParams['savefig.dpi'] = dpi
+
+def _render_poster(job):
+    """Fill the process-local template with one state's numbers and save it."""
+    if 'template' not in _POSTER:
+        _POSTER['template'] = build_poster_template()
+    fig, artists = _POSTER['template']
+    stats, subtitle, insight, paths = job
+    fill_poster(artists, stats, subtitle, insight)
+    for path in paths:
+        fig.savefig(path)
+    return paths[0]
+
+def _edu_row(edu, state, group):
+    """One state's row of the (State, Edu_Group) rollup, or None if the state has no such quartile."""
+    return edu.loc[(state, group)] if (state, group) in edu.index else None
+
+def state_poster_jobs(df, out_dir):
+    """(stats, subtitle, insight, paths) for every state, from one (State, Edu_Group) rollup."""
+    edu = rollup(df, ['State_Abbrev', 'Edu_Group']).set_index(['State_Abbrev', 'Edu_Group'])
+    years = f"{int(df['Year'].min())}-{int(df['Year'].max())}"
+    jobs = []
+    for state in sorted(df['State_Abbrev'].dropna().unique()):
+        name = f"POSTER_{state}"
+        if RENDER['only'] is not None and name not in RENDER['only']:
+            continue
+        stats = poster_stats(_edu_row(edu, state, HIGH_EDU), _edu_row(edu, state, LOW_EDU))
+        subtitle = f"How Educational Attainment Correlates with Traffic Mortality in {state} ({years})"
+        # Promoted posters get an SVG next to the PNG, like every other promoted figure
+        exts = ['.png', '.svg'] if RENDER['mode'] == 'promote' else ['.png']
+        paths = [os.path.join(out_dir, name + ext) for ext in exts]
+        jobs.append((stats, subtitle, poster_insight(stats, state), paths))
+    return jobs
+
+def create_state_posters(df, workers=None):
+    """One poster per state, rendered in parallel; each worker builds the template once and reuses it."""
+    from concurrent.futures import ProcessPoolExecutor
+    print("Generating per-state posters...")
+    out_dir = os.path.join(OUTPUT_DIR, "preview" if RENDER['mode'] == 'preview' else "", "posters")
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = state_poster_jobs(df, out_dir)
+    dpi = plt.rcParams['figure.dpi']
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        _poster_worker_init(dpi)
+        paths = [_render_poster(job) for job in jobs]
+        if 'template' in _POSTER:
+            plt.close(_POSTER.pop('template')[0])
+    else:
+        with ProcessPoolExecutor(workers, initializer=_poster_worker_init, initargs=(dpi,)) as pool:
+            paths = list(pool.map(_render_poster, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    print(f"Saved {len(paths)} posters to {os.path.relpath(out_dir, BASE_DIR)}")
+
 # --- EDA GRAPH SUITE ---
 def run_eda(df):
     print("Generating EDA Graphs...")
     
     # 1. Fatality Rate Trend (COLORS['danger'])
     plt.figure()
-    d = df.groupby('Year')['Fatality_Rate'].mean().reset_index()
+    d = rollup(df, ['Year'])
     sns.lineplot(data=d, x='Year', y='Fatality_Rate', color=COLORS['danger'], linewidth=3, marker='o')
-    apply_theme(plt.gca(), "1. Avg Fatality Rate Over Time", "Year", "Fatalities per 100k")
+    apply_theme(plt.gca(), "1. National Fatality Rate Over Time", "Year", "Fatalities per 100k")
     plt.ylim(bottom=0) # START AT 0
     save("EDA_01_Trend_Fatality.png")
     
     # 2. Total Accidents vs Fatalities (Dual Axis)
     # 2. Total Accidents vs Fatalities (Dual Axis) - IMPROVED
-    d2 = df.groupby('Year')[['FATALS', 'ST_CASE']].sum().reset_index()
+    d2 = rollup(df, ['Year'])
     fig, ax1 = plt.subplots(figsize=(10,6))
     
     # Left Axis: Accidents (Education Color / Blue)
@@ -495,7 +507,11 @@ def run_eda(df):
     
     # 3. Fatality Distribution (Hist)
     plt.figure()
-    sns.histplot(df['Fatality_Rate'], bins=80, color=COLORS['primary'], kde=True, line_kws={'linewidth':2})
+    fr = df['Fatality_Rate'].dropna()
+    sns.histplot(fr, bins=80, color=COLORS['primary'])
+    # Binned FFT KDE scaled to counts (same as histplot's kde=True: cut=0, n * binwidth)
+    support, density = binned_kde(fr, cut=0)
+    plt.plot(support, density * len(fr) * (fr.max() - fr.min()) / 80, color=COLORS['primary'], linewidth=2)
     apply_theme(plt.gca(), "3. Distribution of Fatality Rates", "Fatality Rate", "Count of Counties")
     plt.xlim(0, 100)
     save("EDA_03_Dist_Fatality.png")
@@ -510,18 +526,16 @@ def run_eda(df):
     # 5. Edu Group Bar Chart
     plt.figure()
     o = ['High Edu (Low Risk)', 'Med-High', 'Med-Low', 'Low Edu (High Risk)']
-    sns.barplot(data=df, x='Edu_Group', y='Fatality_Rate', order=o, palette="Blues_d")
-    apply_theme(plt.gca(), "5. Fatality Rate by Education Level", "", "Avg Fatality Rate")
+    edu_totals = rollup(df, ['Edu_Group'])
+    sns.barplot(data=edu_totals, x='Edu_Group', y='Fatality_Rate', order=o, palette="Blues_d")
+    apply_theme(plt.gca(), "5. Fatality Rate by Education Level", "", "Fatalities per 100k")
     save("EDA_05_Bar_Edu.png")
     
     # 6. Scatter Edu vs Fatality (County Averages)
     plt.figure()
     # Average each county across all years for a stable representation
-    county_avg = df.groupby('FIPS_STR').agg({
-        'Pct_Less_HS': 'mean',
-        'Fatality_Rate': 'mean',
-        'Urbanicity': 'first'  # Use the most common urbanicity classification
-    }).reset_index()
+    county_avg = rollup(df, ['FIPS_STR'])
+    county_avg['Urbanicity'] = county_avg['FIPS_STR'].map(df.drop_duplicates('FIPS_STR').set_index('FIPS_STR')['Urbanicity'])
     sns.scatterplot(data=county_avg, x='Pct_Less_HS', y='Fatality_Rate', hue='Urbanicity', palette={'Rural':COLORS['danger'], 'Urban':COLORS['safety']}, alpha=0.3)
     apply_theme(plt.gca(), "6. Education vs Fatality Correlation", "% Without High School Diploma", "Fatalities per 100k Population")
     plt.ylim(0, 150)
@@ -529,7 +543,7 @@ def run_eda(df):
     
     # 7. Alcohol Trend by Edu - FIXED METRIC
     plt.figure()
-    d7 = df.groupby(['Year', 'Edu_Group'])['Drunk_Rate_Per_100k'].mean().reset_index()
+    d7 = rollup(df, ['Edu_Group', 'Year'])
     sns.lineplot(data=d7, x='Year', y='Drunk_Rate_Per_100k', hue='Edu_Group', palette=[COLORS['safety'], COLORS['education'], COLORS['danger'], '#000000']) # Custom discrete
     apply_theme(plt.gca(), "7. Alcohol Fatalities per 100k Population", "Year", "Alcohol Incidents / 100k")
     plt.ylim(bottom=0)
@@ -545,7 +559,7 @@ def run_eda(df):
     ]
 
     sns.barplot(
-        data=df,
+        data=edu_totals,
         x='Edu_Group',
         y='Dark_Pct',
         palette=palette,
@@ -579,7 +593,7 @@ def run_eda(df):
     
     # 12. Top 10 Deadliest States
     plt.figure()
-    top10 = df.groupby('State_Abbrev')['Fatality_Rate'].mean().sort_values(ascending=False).head(10).reset_index()
+    top10 = rollup(df, ['State_Abbrev']).dropna(subset=['State_Abbrev']).sort_values('Fatality_Rate', ascending=False).head(10)
     sns.barplot(data=top10, y='State_Abbrev', x='Fatality_Rate', palette='Reds_r')
     apply_theme(plt.gca(), "12. Highest Risk States", "Fatality Rate", "")
     save("EDA_12_Bar_States.png")
@@ -599,25 +613,30 @@ def run_eda(df):
     
     # 15. Alcohol Dist
     plt.figure()
-    sns.kdeplot(df['Drunk_Pct'], fill=True, color=COLORS['danger'])
+    support, density = binned_kde(df['Drunk_Pct'])
+    plt.fill_between(support, density, color=COLORS['danger'], alpha=0.25, linewidth=0)
+    plt.plot(support, density, color=COLORS['danger'], linewidth=1.5)
+    plt.ylim(bottom=0)
     apply_theme(plt.gca(), "15. Distribution of Alcohol Involvement", "% Accidents with Drunk Driver", "Density")
     save("EDA_15_KDE_Alcohol.png")
 
 # --- EXDA & MAPS ---
 def run_exda_and_maps(df, state_coords):
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.cluster import KMeans
+    from sklearn.ensemble import RandomForestRegressor
     print("Generating ExDA and Maps...")
     
     # MAPS - Using proper USA choropleth maps with custom legend labels
-    plot_usa_choropleth(df, 'Fatality_Rate', "Average Fatality Rate by State", "MAP_Fatality_Rate.png", 'Reds', 'mean', 
+    # All state values come from the rollup cube (one row per state, population-weighted rates)
+    states = rollup(df, ['State_Abbrev'])
+    plot_usa_choropleth(states, 'Fatality_Rate', "Fatality Rate by State (Population-Weighted)", "MAP_Fatality_Rate.png", 'Reds', 'mean', 
                         legend_label="Fatalities per 100k Population")
-    plot_usa_choropleth(df, 'Pct_Less_HS', "Population without High School Diploma (%)", "MAP_Education.png", 'Blues', 'mean',
+    plot_usa_choropleth(states, 'Pct_Less_HS', "Population without High School Diploma (%)", "MAP_Education.png", 'Blues', 'mean',
                         legend_label="% Without High School Diploma")
     
-    # Fix Population Map: Verify we are averaging the *State Totals*, not averaging County Pops
-    # 1. Sum Population by State and Year
-    pop_agg = df.groupby(['State_Abbrev', 'Year'])['Population'].sum().reset_index()
-    # 2. Plot the Mean of these Annual Totals
-    plot_usa_choropleth(pop_agg, 'Population', "Avg State Population (2010-2023)", "MAP_Population.png", 'Greens', 'mean',
+    # Population Map: mean of the annual state totals (Population / Years)
+    plot_usa_choropleth(states, 'Avg_Population', "Avg State Population (2010-2023)", "MAP_Population.png", 'Greens', 'mean',
                         legend_label="Population in Millions")
 
     # ExDA 1: Feature Importance
@@ -652,15 +671,308 @@ def run_exda_and_maps(df, state_coords):
     sns.heatmap((means-means.min())/(means.max()-means.min()), annot=means.round(1), cmap='Reds')
     plt.title("ExDA 2: Cluster Profiles", fontweight='bold', color=COLORS['primary'])
     save("EXDA_02_Cluster_Heatmap.png")
+    
+    # ExDA 3: Counties Getting Worse (Theil-Sen slope of Fatality_Rate)
+    trends = county_trends(df)
+    info = rollup(df, ['FIPS_STR']).set_index('FIPS_STR')
+    trends = trends.join(info['Avg_Population'].rename('Population'))
+    trends['State_Abbrev'] = df.drop_duplicates('FIPS_STR').set_index('FIPS_STR')['State_Abbrev']
+    # Small counties swing wildly; rank only well-observed counties with 10k+ residents
+    min_years = int(np.ceil(0.7 * df['Year'].nunique()))
+    ranked = trends[(trends['Years_Observed'] >= min_years) & (trends['Population'] >= 10000)]
+    worst = ranked.sort_values('Fatality_Rate_Trend', ascending=False).head(15).reset_index()
+    worst['Label'] = worst['FIPS_STR'] + ' (' + worst['State_Abbrev'].astype(object).fillna('?') + ')'
+    plt.figure()
+    sns.barplot(data=worst, y='Label', x='Fatality_Rate_Trend', color=COLORS['danger'])
+    apply_theme(plt.gca(), "ExDA 3: Counties with the Steepest Rise in Fatality Rate", "Change in Fatalities per 100k per Year (Theil-Sen)", "County (FIPS)")
+    save("EXDA_03_Worsening_Counties.png")
+
+# --- SPATIAL CLUSTERING (MORAN'S I / LISA) ---
+LISA_COLORS = {
+    'High-High': COLORS['danger'],
+    'Low-Low': COLORS['safety'],
+    'Low-High': '#A6D9F0',   # light sky blue
+    'High-Low': '#F2B27F',   # light vermilion
+    NOT_SIGNIFICANT: '#EEEEEE',
+}
+
+def plot_lisa_map(clusters, title, filename, moran):
+    """County map of significant LISA clusters (continental US)."""
+    import geopandas as gpd
+    counties = gpd.read_file(COUNTY_GEOJSON)
+    counties['FIPS_STR'] = counties['id'].astype(str).str.zfill(5)
+    counties = counties[~counties['FIPS_STR'].str[:2].isin(['02', '15', '72'])]
+    counties = counties.merge(clusters[['cluster']], left_on='FIPS_STR', right_index=True, how='left')
+    counties['color'] = counties['cluster'].map(LISA_COLORS).fillna('#FFFFFF')
+
+    fig, ax = plt.subplots(1, 1, figsize=(16, 10))
+    counties.plot(color=counties['color'], linewidth=0.1, edgecolor='#BBBBBB', ax=ax)
+    handles = [Patch(facecolor=LISA_COLORS[q], label=q) for q in list(QUADRANTS.values()) + [NOT_SIGNIFICANT]]
+    ax.legend(handles=handles, loc='lower left', frameon=False, fontsize=11)
+    ax.axis('off')
+    ax.set_title(title, fontsize=20, fontweight='bold', color=COLORS['primary'], pad=10, y=0.95)
+    fig.text(0.5, 0.02, f"Global Moran's I = {moran['I']:.3f} (pseudo p = {moran['p_sim']:.3f}) | "
+             'LISA clusters at p < 0.05, 999 permutations | Queen contiguity', ha='center', fontsize=9, color='grey', style='italic')
+    save(filename)
+
+def run_spatial(df):
+    print("Generating Spatial Cluster Maps...")
+    moran, clusters = county_lisa(df)
+    for col, stats in moran.items():
+        print(f"  Moran's I ({col}): {stats['I']:.3f}, pseudo p = {stats['p_sim']:.3f}")
+    plot_lisa_map(clusters['Fatality_Rate'], "Fatality Rate Hotspots (LISA)", "MAP_LISA_Fatality_Rate.png", moran['Fatality_Rate'])
+    plot_lisa_map(clusters['Pct_Less_HS'], "Low-Education Clusters (LISA)", "MAP_LISA_Education.png", moran['Pct_Less_HS'])
+
+# --- CRASH-POINT HOTSPOTS (LATITUDE / LONGITUD) ---
+def run_hotspots():
+    from matplotlib.colors import LogNorm
+    print("Generating Crash Hotspot Map...")
+    _, summary, _, density = hotspots(crash_points())
+    vmax = density.max()
+    fig, ax = plt.subplots(1, 1, figsize=(16, 10))
+    # Three decades below the peak; the kernel tails below that are left blank
+    im = ax.imshow(np.ma.masked_less(density, vmax / 1000), origin='lower', extent=CONUS, cmap='Reds',
+                   norm=LogNorm(vmin=vmax / 1000, vmax=vmax),
+                   aspect=1 / np.cos(np.radians((CONUS[2] + CONUS[3]) / 2)))
+    top = summary.head(10)
+    ax.scatter(top['Lon'], top['Lat'], s=80, facecolor='none', edgecolor=COLORS['primary'], linewidth=1.2)
+    for r in top.itertuples():
+        ax.annotate(str(r.Rank), (r.Lon, r.Lat), xytext=(5, 5), textcoords='offset points', fontsize=10, fontweight='bold',
+                    color=COLORS['primary'], path_effects=[pe.withStroke(linewidth=2, foreground='white')])
+    fig.colorbar(im, ax=ax, shrink=0.6, pad=0.01, label='Crashes per km² per year')
+    ax.axis('off')
+    ax.set_title("Where Fatal Crashes Concentrate", fontsize=20, fontweight='bold', color=COLORS['primary'], pad=10)
+    fig.text(0.5, 0.02, f'Gaussian kernel density, {BANDWIDTH_KM:g} km bandwidth | '
+             'Numbered: top 10 DBSCAN hotspots by fatalities', ha='center', fontsize=9, color='grey', style='italic')
+    save("MAP_Crash_Hotspots.png")
+
+# --- COUNTY CHOROPLETHS ---
+def plot_county_choropleth(values, title, filename, cmap, legend_label):
+    fig, ax = plt.subplots(1, 1, figsize=(16, 10))
+    counties = draw_counties(ax, county_geometry(), values, cmap, robust_norm(values))
+    cbar = fig.colorbar(counties, ax=ax, orientation='horizontal', shrink=0.6, pad=0.02, extend='both')
+    cbar.set_label(legend_label, fontsize=12)
+    cbar.ax.tick_params(labelsize=12)
+    cbar.outline.set_visible(False)
+    ax.set_title(title, fontsize=20, fontweight='bold', color=COLORS['primary'], pad=10, y=0.95)
+    fig.text(0.5, 0.02, 'Data: FARS & Census (2010-2023) | Continental US Only | '
+             'Colors clipped to the 2nd-98th percentile; grey: no data', ha='center', fontsize=9, color='grey', style='italic')
+    save(filename)
+
+def run_county_maps(df):
+    print("Generating County Maps...")
+    counties = rollup(df, ['FIPS_STR'])
+    counties.index = counties['FIPS_STR'].astype(int)
+    plot_county_choropleth(counties['Fatality_Rate'], "Fatality Rate by County (2010-2023)", "MAP_County_Fatality_Rate.png",
+                           'Reds', "Fatalities per 100k Population")
+    plot_county_choropleth(counties['Pct_Less_HS'], "Population without High School Diploma by County (%)",
+                           "MAP_County_Education.png", 'Blues', "% Without High School Diploma")
+    plot_county_choropleth(counties['Drunk_Rate_Per_100k'], "Drunk-Driving Fatal Crashes by County (2010-2023)",
+                           "MAP_County_Drunk_Rate.png", 'Purples', "Drunk-Driver Crashes per 100k Population")
+
+# --- CRASH TIMING (MONTH x WEEKDAY x HOUR CUBE) ---
+def run_temporal(df):
+    print("Generating Crash Timing Heatmaps...")
+    cube = time_cube(df)
+    hours = [f"{h:02d}" for h in range(24)]
+
+    # Time 1: all fatalities by weekday x hour
+    plt.figure(figsize=(14, 5))
+    table = weekday_hour(cube)
+    sns.heatmap(table, cmap='Reds', xticklabels=hours, cbar_kws={'label': 'Fatalities (2010-2023)'})
+    plt.title("Time 1: When Fatal Crashes Happen", loc='left', fontweight='bold', color=COLORS['primary'])
+    plt.xlabel("Hour of Day")
+    plt.ylabel("")
+    save("TIME_01_Weekday_Hour.png")
+
+    # Time 2: the same pattern per education quartile, as each quartile's share of its own fatalities
+    groups = list(cube['edu_groups'])
+    shares = {g: weekday_hour(cube, edu_group=g) for g in groups}
+    shares = {g: t / t.values.sum() * 100 for g, t in shares.items()}
+    vmin = min(t.values.min() for t in shares.values())
+    vmax = max(t.values.max() for t in shares.values())
+    fig = plt.figure(figsize=(16, 8))
+    gs = fig.add_gridspec(2, 3, width_ratios=[1, 1, 0.03])
+    cax = fig.add_subplot(gs[:, 2])
+    for i, g in enumerate(groups):
+        ax = fig.add_subplot(gs[i // 2, i % 2])
+        sns.heatmap(shares[g], ax=ax, cmap='Reds', vmin=vmin, vmax=vmax, xticklabels=hours,
+                    cbar=i == 0, cbar_ax=cax if i == 0 else None,
+                    cbar_kws={'label': "% of the quartile's fatalities"})
+        ax.set_title(g, loc='left', fontsize=13, color=COLORS['primary'])
+        ax.set_xlabel("")
+    fig.suptitle("Time 2: Crash Timing by County Education Quartile", fontsize=16, fontweight='bold', color=COLORS['primary'])
+    fig.supxlabel("Hour of Day")
+    save("TIME_02_Weekday_Hour_By_Edu.png")
+
+# --- SENSITIVITY OF THE HEADLINE GROUPINGS ---
+def run_sensitivity(df):
+    print("Generating Sensitivity Curves...")
+    s = sweep(df)
+
+    # Sens 1: low / high education gap vs the number of Pct_Less_HS bins
+    fig, ax = plt.subplots(figsize=(12, 6))
+    edu = s['edu_bins']
+    ax.plot(edu['Bins'], edu['Fatality_Rate_Ratio'], color=COLORS['danger'], linewidth=2.5, label='Fatality rate')
+    ax.plot(edu['Bins'], edu['Drunk_Rate_Per_100k_Ratio'], color=COLORS['education'], linewidth=2.5, label='Drunk-driving crash rate')
+    current = edu[edu['Bins'] == EDU_BINS].iloc[0]
+    ax.scatter([EDU_BINS], [current['Fatality_Rate_Ratio']], s=80, color=COLORS['primary'], zorder=3)
+    ax.annotate(f"Report: quartiles, {current['Fatality_Rate_Ratio']:.1f}x", (EDU_BINS, current['Fatality_Rate_Ratio']),
+                xytext=(12, 0), textcoords='offset points', va='center', fontsize=11, fontweight='bold')
+    ax.axhline(1, color=COLORS['grid'], linewidth=1)
+    ax.legend(frameon=False)
+    apply_theme(ax, "Sens 1: Education Gap vs Number of Education Bins", "Equal-count bins of % adults without a diploma",
+                "Lowest- / highest-education bin rate")
+    save("SENS_01_Edu_Bins.png")
+
+    # Sens 2: rural / urban gap vs the population cutoff
+    fig, ax = plt.subplots(figsize=(12, 6))
+    urban = s['urban_threshold']
+    ax.plot(urban['Threshold'], urban['Fatality_Rate_Ratio'], color=COLORS['danger'], linewidth=2.5, label='Rural / urban fatality rate')
+    ax.plot(urban['Threshold'], urban['Drunk_Rate_Per_100k_Ratio'], color=COLORS['education'], linewidth=2.5, label='Rural / urban drunk-driving crash rate')
+    ax.axvline(URBAN_CUTOFF, color=COLORS['primary'], linestyle='--', linewidth=1)
+    ax.text(URBAN_CUTOFF, ax.get_ylim()[1], f" Report cutoff: {URBAN_CUTOFF:,}", va='top', fontsize=11)
+    ax.set_xscale('log')
+    ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda v, _: f"{v:,.0f}"))
+    ax2 = ax.twinx()
+    ax2.fill_between(urban['Threshold'], urban['Rural_Share'] * 100, color=COLORS['grid'], alpha=0.4, label='County-years classed rural (%)')
+    ax2.set_ylim(0, 100)
+    ax2.set_ylabel('County-years classed rural (%)')
+    ax2.set_zorder(ax.get_zorder() - 1)
+    for side in ('top', 'right', 'left'):
+        ax2.spines[side].set_visible(False)
+    ax.patch.set_visible(False)
+    ax.legend(frameon=False, loc='upper left', bbox_to_anchor=(0, 0.92))
+    apply_theme(ax, "Sens 2: Rural-Urban Gap vs Urbanicity Cutoff", "Population cutoff (Urban = at least this many residents)",
+                "Rural / urban rate")
+    save("SENS_02_Urban_Cutoff.png")
+
+# --- YEAR-OVER-YEAR ANOMALIES ---
+def run_anomalies(df):
+    from scipy.stats import poisson
+    print("Generating Anomaly Funnel...")
+    scored, events = county_anomalies(df)
+    scored = scored[scored['Expected'] > 0]
+    ratio = scored['FATALS'] / scored['Expected']
+
+    # Anom 1: funnel plot of observed / expected deaths vs expected deaths, with the Poisson limits
+    fig, ax = plt.subplots(figsize=(12, 7))
+    calm = ~scored['Flagged']
+    ax.scatter(scored.loc[calm, 'Expected'], ratio[calm], s=4, color='#BBBBBB', alpha=0.3, linewidth=0,
+               label='County-year', rasterized=True)
+    for direction, color in [('spike', COLORS['danger']), ('drop', COLORS['safety'])]:
+        hit = scored['Flagged'] & (scored['Direction'] == direction)
+        ax.scatter(scored.loc[hit, 'Expected'], ratio[hit], s=30, color=color, edgecolor='white', linewidth=0.5,
+                   label=f"Flagged {direction} ({hit.sum():,})", zorder=3)
+    mu = np.geomspace(scored['Expected'].min(), scored['Expected'].max(), 300)
+    p = 10 ** -SURPRISE_MIN
+    # Lowest / highest death counts whose tail probability is below p
+    ax.plot(mu, (poisson.isf(p, mu) + 1) / mu, color=COLORS['primary'], linestyle='--', linewidth=1,
+            label=f"Poisson limits (p = 10^-{SURPRISE_MIN:g})")
+    ax.plot(mu, np.maximum(poisson.ppf(p, mu) - 1, 0) / mu, color=COLORS['primary'], linestyle='--', linewidth=1)
+    for r in events.head(5).itertuples():
+        ax.annotate(f"{r.FIPS_STR} ({r.State_Abbrev}) {r.Year}", (r.Expected, r.FATALS / r.Expected),
+                    xytext=(6, 4), textcoords='offset points', fontsize=9, color=COLORS['primary'],
+                    path_effects=[pe.withStroke(linewidth=2, foreground='white')])
+    ax.set_xscale('log')
+    ax.set_yscale('symlog', linthresh=1)
+    ax.set_ylim(bottom=0)
+    ax.axhline(1, color=COLORS['grid'], linewidth=1)
+    ax.legend(frameon=False, loc='upper right')
+    apply_theme(ax, "Anom 1: Which County-Year Spikes Are Real?", "Deaths expected at the county's median rate (log)",
+                "Observed / expected deaths")
+    ax.text(0.01, 0.02, f"Flagged: outside the Poisson limits and |robust z| >= {Z_MIN:g} vs the county's own years",
+            transform=ax.transAxes, fontsize=9, color='grey', style='italic')
+    save("ANOM_01_Funnel.png")
+
+# --- REPORT EXPORTS ---
+def export_figure_manifest():
+    """output/figures.json: every registered figure and its title (merged, so --promote keeps the rest)."""
+    path = os.path.join(OUTPUT_DIR, "figures.json")
+    figures = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            figures = {fig['file']: fig for fig in json.load(f)}
+    for name in RENDER['saved']:
+        figures[name] = {'file': name, 'title': RENDER['titles'].get(name, "")}
+    with open(path, 'w') as f:
+        json.dump(sorted(figures.values(), key=lambda fig: fig['file']), f, indent=2)
+
+def export_report_stats(df):
+    """Headline numbers for the report (output/report_stats.json), population-weighted from the rollup cube."""
+    nation = rollup(df).iloc[0]
+    yearly = rollup(df, ['Year']).set_index('Year')
+    edu = rollup(df, ['Edu_Group']).set_index('Edu_Group')
+    urban = rollup(df, ['Urbanicity']).set_index('Urbanicity')
+    first, last = yearly.index.min(), yearly.index.max()
+    low, high = edu.loc['Low Edu (High Risk)'], edu.loc['High Edu (Low Risk)']
+    stats = {
+        'first_year': int(first),
+        'last_year': int(last),
+        'counties': int(df['FIPS_STR'].nunique()),
+        'county_years': int(len(df)),
+        'total_fatalities': int(nation['FATALS']),
+        'total_accidents': int(nation['ST_CASE']),
+        'fatality_rate': round(float(nation['Fatality_Rate']), 2),
+        'fatality_rate_first': round(float(yearly.loc[first, 'Fatality_Rate']), 2),
+        'fatality_rate_last': round(float(yearly.loc[last, 'Fatality_Rate']), 2),
+        'fatality_rate_change_pct': round(float(yearly.loc[last, 'Fatality_Rate'] / yearly.loc[first, 'Fatality_Rate'] * 100 - 100), 1),
+        'low_edu_fatality_rate': round(float(low['Fatality_Rate']), 2),
+        'high_edu_fatality_rate': round(float(high['Fatality_Rate']), 2),
+        'edu_gap_ratio': round(float(low['Fatality_Rate'] / high['Fatality_Rate']), 2),
+        'low_edu_drunk_rate': round(float(low['Drunk_Rate_Per_100k']), 2),
+        'high_edu_drunk_rate': round(float(high['Drunk_Rate_Per_100k']), 2),
+        'rural_fatality_rate': round(float(urban.loc['Rural', 'Fatality_Rate']), 2) if 'Rural' in urban.index else None,
+        'urban_fatality_rate': round(float(urban.loc['Urban', 'Fatality_Rate']), 2) if 'Urban' in urban.index else None,
+        'drunk_pct': round(float(nation['Drunk_Pct']), 1),
+        'dark_pct': round(float(nation['Dark_Pct']), 1),
+    }
+    with open(os.path.join(OUTPUT_DIR, "report_stats.json"), 'w') as f:
+        json.dump(stats, f, indent=2)
+    print("Saved report_stats.json")
 
 # --- MAIN ---
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the analysis figures.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--preview', action='store_true',
+                      help=f"Render all figures at {PREVIEW_DPI} dpi into output/preview/ with an index.html contact sheet")
+    mode.add_argument('--promote', nargs='+', metavar='NAME',
+                      help="Render only these figures (e.g. EDA_03_Dist_Fatality) at full resolution as PNG and SVG")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="Print per-column memory use of the loaded frame")
+    parser.add_argument('--state-posters', action='store_true',
+                        help="Also render one poster per state into output/posters/")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes for --state-posters (default: one per CPU)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_rendering(args.preview, args.promote)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    
     df, state_coords = load_data()
     print(f"Loaded {len(df)} records.")
-    
-    create_poster_infographic(df) # The New Professional Poster
-    run_eda(df)
-    run_exda_and_maps(df, state_coords)
+    if args.memory_report:
+        print(memory_report(df).to_string())
+    
+    if wants('INFOGRAPHIC'): create_poster_infographic(df) # The New Professional Poster
+    if wants('EDA_'): run_eda(df)
+    if wants('MAP_Fatality_Rate', 'MAP_Education', 'MAP_Population', 'EXDA_'): run_exda_and_maps(df, state_coords)
+    if wants('MAP_LISA'): run_spatial(df)
+    if wants('MAP_Crash_Hotspots'): run_hotspots()
+    if wants('MAP_County'): run_county_maps(df)
+    if wants('TIME_'): run_temporal(df)
+    if wants('SENS_'): run_sensitivity(df)
+    if wants('ANOM_'): run_anomalies(df)
+    if args.state_posters or (RENDER['only'] is not None and wants('POSTER_')):
+        create_state_posters(df, args.workers)
+    if RENDER['mode'] == 'preview':
+        write_contact_sheet()
+    else:
+        export_figure_manifest()
+        export_report_stats(df)
     print("Done.")
 
 if __name__ == "__main__":
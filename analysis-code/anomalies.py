@@ -0,0 +1,158 @@
+"""
+Year-over-year anomaly flags for county-year fatality rates.
+
+A county of 3,000 people goes from 0 to 3 deaths and its Fatality_Rate jumps
+by 100 per 100k; a county of a million needs hundreds of extra deaths to move
+as far. Every county-year is therefore scored twice against its own county's
+baseline, in one pass over the dense county x year matrix (trends.panel_cube):
+
+    Robust_Z   (rate - median rate) / (1.4826 * MAD) over the county's years
+    Surprise   -log10 of the Poisson tail probability of the observed deaths,
+               given the deaths expected at the baseline rate and that year's
+               population (upper tail for spikes, lower tail for drops)
+
+A county-year is flagged when both are extreme: the robust z keeps large
+counties' statistically "significant" wobbles out, the Poisson tail keeps
+small counties' noise out. Everything is elementwise or a per-row
+median, so the cost grows linearly with counties and years.
+
+Usage:
+    python analysis-code/anomalies.py      # timed scoring (also on a 10x synthetic panel); writes output/ANOMALIES.csv
+"""
+
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from trends import panel_cube, MIN_YEARS
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+
+MAD_SCALE = 1.4826   # MAD -> standard deviation for normal data
+Z_MIN = 3.5          # Iglewicz & Hoaglin's outlier cutoff for robust z-scores
+SURPRISE_MIN = 4.0   # Poisson tail p < 1e-4: ~5 false flags expected over ~45k county-years
+
+
+# --- SCORING ---
+def poisson_surprise(observed, expected):
+    """-log10 of P(X >= observed) where observed > expected, else of P(X <= observed), X ~ Poisson(expected)."""
+    from scipy.stats import poisson
+    observed = np.asarray(observed, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_p = np.where(observed > expected,
+                         poisson.logsf(observed - 1, expected),
+                         poisson.logcdf(observed, expected))
+    return -log_p / np.log(10)
+
+
+def score_panel(deaths, population, mask, min_years=MIN_YEARS):
+    """
+    Baselines and scores for a (counties x years) panel, NaN where unobserved.
+    Returns a dict of (counties x years) arrays: rate, baseline, expected, robust_z, surprise
+    (baseline is the rate the expectation uses: the median, or the pooled rate where the median is 0).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(mask, deaths / population * 100000, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN rows -> NaN
+        median = np.nanmedian(rate, axis=1, keepdims=True)
+        mad = np.nanmedian(np.abs(rate - median), axis=1, keepdims=True) * MAD_SCALE
+    n_obs = mask.sum(axis=1, keepdims=True)
+    median = np.where(n_obs >= min_years, median, np.nan)
+
+    # A zero median (mostly death-free years) would make any death infinitely surprising;
+    # fall back to the county's pooled rate for the Poisson expectation
+    pooled = (np.where(mask, deaths, 0).sum(axis=1, keepdims=True)
+              / np.where(mask, population, 0).sum(axis=1, keepdims=True) * 100000)
+    baseline = np.where(median > 0, median, pooled)
+    baseline = np.where(np.isfinite(median), baseline, np.nan)  # too few years: no baseline
+    expected = np.where(mask, baseline * population / 100000, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        robust_z = (rate - median) / mad
+    # Constant rates (MAD 0): any deviation is infinite, no deviation is 0
+    robust_z = np.where((mad == 0) & (rate == median), 0.0, robust_z)
+    return {
+        'rate': rate,
+        'baseline': np.broadcast_to(baseline, rate.shape),
+        'expected': expected,
+        'robust_z': robust_z,
+        'surprise': np.where(np.isfinite(median) & mask, poisson_surprise(deaths, expected), np.nan),
+    }
+
+
+def flag_anomalies(scores, z_min=Z_MIN, surprise_min=SURPRISE_MIN):
+    """Boolean (counties x years) matrix of flagged county-years."""
+    with np.errstate(invalid='ignore'):
+        return (np.abs(scores['robust_z']) >= z_min) & (scores['surprise'] >= surprise_min)
+
+
+def county_anomalies(df, z_min=Z_MIN, surprise_min=SURPRISE_MIN):
+    """
+    Scores for every county-year: (long frame of all scored county-years with a Flagged column,
+    flagged events sorted by Surprise).
+    """
+    keys, years, cube, mask = panel_cube(df, ['FATALS', 'Population'])
+    mask = mask.all(axis=0) & (cube[1] > 0)
+    scores = score_panel(cube[0], cube[1], mask)
+    flagged = flag_anomalies(scores, z_min, surprise_min)
+
+    rows, cols = np.nonzero(mask)
+    scored = pd.DataFrame({
+        'FIPS_STR': keys[rows],
+        'Year': years[cols],
+        'FATALS': cube[0][rows, cols].astype(np.int64),
+        'Expected': scores['expected'][rows, cols],
+        'Fatality_Rate': scores['rate'][rows, cols],
+        'Baseline_Rate': scores['baseline'][rows, cols],
+        'Robust_Z': scores['robust_z'][rows, cols],
+        'Surprise': scores['surprise'][rows, cols],
+        'Flagged': flagged[rows, cols],
+    })
+    scored['Direction'] = np.select([scored['FATALS'] > scored['Expected'], scored['FATALS'] <= scored['Expected']],
+                                    ['spike', 'drop'], None)
+    scored['State_Abbrev'] = scored['FIPS_STR'].map(df.drop_duplicates('FIPS_STR').set_index('FIPS_STR')['State_Abbrev'])
+    events = scored[scored['Flagged']].drop(columns='Flagged').sort_values('Surprise', ascending=False)
+    return scored, events.reset_index(drop=True)
+
+
+# --- BENCHMARK ---
+def synthetic_panel(n_counties, n_years, rng):
+    """Poisson deaths at a per-county rate over log-normal populations, with 1% of county-years tripled."""
+    pop = np.exp(rng.normal(10.3, 1.3, (n_counties, 1))) * rng.uniform(0.95, 1.05, (n_counties, n_years))
+    rate = rng.gamma(6, 6, (n_counties, 1))
+    mu = rate * pop / 100000
+    mu = np.where(rng.random(mu.shape) < 0.01, mu * 3, mu)
+    return rng.poisson(mu).astype(np.float64), pop
+
+
+def main():
+    rng = np.random.default_rng(0)
+    poisson_surprise(1, 1)  # scipy.stats import, outside the timings
+    for n_counties, n_years in [(3_200, 14), (32_000, 14), (3_200, 140)]:
+        deaths, pop = synthetic_panel(n_counties, n_years, rng)
+        t0 = time.perf_counter()
+        flagged = flag_anomalies(score_panel(deaths, pop, np.ones(deaths.shape, dtype=bool)))
+        print(f"{n_counties:>7} counties x {n_years:>3} years  {time.perf_counter() - t0:6.2f}s  "
+              f"{flagged.sum():,} flagged ({flagged.mean() * 100:.2f}%)")
+
+    from ingest import load_data
+    df, _ = load_data()
+    t0 = time.perf_counter()
+    scored, events = county_anomalies(df)
+    print(f"Scored {len(scored):,} county-years in {time.perf_counter() - t0:.2f}s: "
+          f"{(events['Direction'] == 'spike').sum():,} spikes, {(events['Direction'] == 'drop').sum():,} drops flagged")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, "ANOMALIES.csv")
+    events.round(3).to_csv(path, index=False)
+    print(f"Saved {path}")
+    with pd.option_context('display.width', 160):
+        print(events.head(10).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
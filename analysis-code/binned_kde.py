@@ -0,0 +1,143 @@
+"""
+Binned Gaussian KDE (linear binning + FFT convolution).
+
+Drop-in replacement for the seaborn KDE curves used by the EDA suite.
+Seaborn evaluates scipy's gaussian_kde directly, which costs O(n * gridsize);
+here the data is linearly binned onto a fine grid once (O(n)) and convolved
+with the Gaussian kernel via FFT (O(M log M)), so the cost is dominated by a
+single pass over the data.
+
+The bandwidth and support grid follow seaborn's defaults (Scott's rule,
+bw_adjust, cut, gridsize), so the curves line up with the previous charts.
+Linear binning error is O((delta / bw)^2) relative to the peak density; with
+the internal grid spacing capped at bw / 8 the measured error is well under
+0.1% of the peak (see the benchmark at the bottom of this file).
+
+Usage:
+    python analysis-code/binned_kde.py     # error + timing benchmark
+"""
+
+import time
+import warnings
+
+import numpy as np
+
+# Internal grid spacing is at most bw / BINS_PER_BW
+BINS_PER_BW = 8
+# Kernel is truncated at this many bandwidths (exp(-50) is below float error)
+KERNEL_TAIL = 10
+MAX_BINS = 2 ** 18
+
+
+def scott_bandwidth(x, bw_adjust=1.0):
+    """Scott's rule bandwidth, identical to gaussian_kde(bw_method='scott')."""
+    n = len(x)
+    return np.std(x, ddof=1) * n ** (-1 / 5) * bw_adjust
+
+
+def support_grid(x, bw, gridsize=200, cut=3, clip=None):
+    """Evaluation grid used by seaborn: data range extended by cut * bw."""
+    lo, hi = (None, None) if clip is None else clip
+    gridmin = x.min() - bw * cut if lo is None else max(x.min() - bw * cut, lo)
+    gridmax = x.max() + bw * cut if hi is None else min(x.max() + bw * cut, hi)
+    return np.linspace(gridmin, gridmax, gridsize)
+
+
+def linear_bin(x, lo, delta, m):
+    """Spread each point over its two neighbouring grid nodes (linear binning)."""
+    pos = (x - lo) / delta
+    left = np.clip(np.floor(pos).astype(np.int64), 0, m - 2)
+    # Measured from the clipped node, so a point on the last node goes wholly to it
+    frac = pos - left
+    counts = np.bincount(left, weights=1 - frac, minlength=m)
+    counts += np.bincount(left + 1, weights=frac, minlength=m)
+    return counts[:m]
+
+
+def binned_kde(x, gridsize=200, cut=3, bw_adjust=1.0, clip=None, bw=None):
+    """
+    Gaussian KDE of `x` evaluated on seaborn's support grid.
+    Returns (support, density) where density integrates to 1; both are empty
+    (with a warning, as seaborn does) when the data has no spread.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    if bw is None:
+        bw = scott_bandwidth(x, bw_adjust) if len(x) > 1 else 0.0
+    if not bw > 0:
+        warnings.warn("Dataset has 0 variance; skipping density estimate.", UserWarning, stacklevel=2)
+        return np.empty(0), np.empty(0)
+    support = support_grid(x, bw, gridsize, cut, clip)
+
+    # Fine internal grid covering both the data and the support
+    lo = min(x.min(), support[0])
+    hi = max(x.max(), support[-1])
+    m = int(np.clip(np.ceil((hi - lo) / bw * BINS_PER_BW) + 1, gridsize, MAX_BINS))
+    delta = (hi - lo) / (m - 1)
+    counts = linear_bin(x, lo, delta, m)
+
+    # Gaussian kernel sampled at the grid offsets
+    half = min(m - 1, int(np.ceil(KERNEL_TAIL * bw / delta)))
+    offsets = np.arange(-half, half + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2) / (bw * np.sqrt(2 * np.pi))
+
+    # Linear (non-circular) convolution via zero-padded real FFT
+    size = 1 << int(np.ceil(np.log2(m + 2 * half + 1)))
+    conv = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    fine = conv[half:half + m] / len(x)
+    np.maximum(fine, 0, out=fine)  # FFT round-off can go slightly negative
+
+    grid = lo + np.arange(m) * delta
+    return support, np.interp(support, grid, fine)
+
+
+def exact_kde(x, support, bw, chunk=200_000):
+    """Direct O(n * gridsize) Gaussian KDE, used only to measure error."""
+    x = np.asarray(x, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    density = np.zeros_like(support)
+    for start in range(0, len(x), chunk):
+        z = (support[:, None] - x[None, start:start + chunk]) / bw
+        density += np.exp(-0.5 * z * z).sum(axis=1)
+    return density / (len(x) * bw * np.sqrt(2 * np.pi))
+
+
+def kde_error(x, **kwargs):
+    """Max absolute error of binned_kde vs the exact KDE, absolute and relative to the peak."""
+    x = np.asarray(x, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    bw = scott_bandwidth(x, kwargs.pop('bw_adjust', 1.0))
+    support, approx = binned_kde(x, bw=bw, **kwargs)
+    exact = exact_kde(x, support, bw)
+    err = np.abs(approx - exact).max()
+    return err, err / exact.max()
+
+
+# --- BENCHMARK ---
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'rows':>10} {'binned (s)':>11} {'exact (s)':>10} {'max err':>10} {'rel err':>9}")
+    for n in [10 ** 5, 10 ** 6, 10 ** 7]:
+        # Heavy right tail like Fatality_Rate
+        x = rng.lognormal(3.2, 0.6, n)
+
+        t0 = time.perf_counter()
+        binned_kde(x)
+        t_binned = time.perf_counter() - t0
+
+        if n <= 10 ** 6:
+            bw = scott_bandwidth(x)
+            support, approx = binned_kde(x, bw=bw)
+            t0 = time.perf_counter()
+            exact = exact_kde(x, support, bw)
+            t_exact = f"{time.perf_counter() - t0:10.3f}"
+            err = np.abs(approx - exact).max()
+            rel = f"{err / exact.max():9.2e}"
+            err = f"{err:10.2e}"
+        else:
+            t_exact, err, rel = f"{'skipped':>10}", f"{'-':>10}", f"{'-':>9}"
+        print(f"{n:>10} {t_binned:11.3f} {t_exact} {err} {rel}")
+
+
+if __name__ == "__main__":
+    main()
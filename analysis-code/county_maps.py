@@ -0,0 +1,173 @@
+"""
+County choropleths for the static report, drawn as one PolyCollection.
+
+The county polygons shipped with the dashboard (counties-fips.json, 3.2 MB)
+are read once, projected to a US Albers equal-area projection (numpy, no
+pyproj), simplified as a coverage (shared borders stay shared) and stored as
+flat float32 vertex arrays in datasets/cache/county_polygons.npz, together
+with state borders dissolved from the same coverage. The cache is rebuilt
+when the GeoJSON or the simplification tolerance changes.
+
+A map is then a single PolyCollection over every ring with its colors set
+from one value array (set_array), plus one LineCollection of state borders:
+no GeoDataFrame, no per-feature plotting.
+
+    geo = county_geometry()
+    draw_counties(ax, geo, rates_by_fips, cmap='Reds', norm=norm)
+
+Usage:
+    python analysis-code/county_maps.py      # geometry build / load timing and a timed 300-dpi render
+"""
+
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from spatial_stats import COUNTY_GEOJSON
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.path.join(BASE_DIR, "datasets", "cache", "county_polygons.npz")
+
+EXCLUDED_STATES = (2, 15, 72)  # AK, HI, PR: drawn on the continental map like the state choropleths
+TOLERANCE_M = 1000             # ~1 output pixel at 16 in / 300 dpi
+NO_DATA = '#EEEEEE'
+
+# Albers equal-area conic for the lower 48 (the parameters of EPSG:5070, on a sphere)
+EARTH_RADIUS_M = 6371000.0
+ALBERS = {'lat1': 29.5, 'lat2': 45.5, 'lat0': 23.0, 'lon0': -96.0}
+
+
+# --- GEOMETRY ---
+def albers(lon, lat, lat1=ALBERS['lat1'], lat2=ALBERS['lat2'], lat0=ALBERS['lat0'], lon0=ALBERS['lon0']):
+    """Spherical Albers equal-area projection of degree arrays, in metres."""
+    p1, p2, p0, p = (np.radians(v) for v in (lat1, lat2, lat0, lat))
+    n = (np.sin(p1) + np.sin(p2)) / 2
+    c = np.cos(p1) ** 2 + 2 * n * np.sin(p1)
+    rho0 = EARTH_RADIUS_M * np.sqrt(c - 2 * n * np.sin(p0)) / n
+    rho = EARTH_RADIUS_M * np.sqrt(c - 2 * n * np.sin(p)) / n
+    theta = n * np.radians(np.asarray(lon) - lon0)
+    return rho * np.sin(theta), rho0 - rho * np.cos(theta)
+
+
+def _flatten(geoms):
+    """Exterior rings of every polygon part: (xy float32, ring offsets, part -> input index)."""
+    import shapely
+    parts, owner = shapely.get_parts(geoms, return_index=True)
+    coords, ring = shapely.get_coordinates(shapely.get_exterior_ring(parts), return_index=True)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(ring, minlength=len(parts)))])
+    return coords.astype(np.float32), offsets, owner
+
+
+def build_county_geometry(geojson_path=COUNTY_GEOJSON, tolerance=TOLERANCE_M):
+    """Projected, simplified county rings and state borders as flat arrays (see module docstring)."""
+    import shapely
+    with open(geojson_path) as f:
+        features = json.load(f)['features']
+    fips = np.array([int(f['id']) for f in features], dtype=np.int32)
+    keep = ~np.isin(fips // 1000, EXCLUDED_STATES)
+    fips = fips[keep]
+    geoms = np.array([shapely.geometry.shape(f['geometry']) for f, k in zip(features, keep) if k], dtype=object)
+
+    geoms = shapely.transform(geoms, lambda xy: np.column_stack(albers(xy[:, 0], xy[:, 1])))
+    geoms = shapely.make_valid(geoms)
+    geoms = shapely.coverage_simplify(geoms, tolerance)
+
+    xy, offsets, owner = _flatten(geoms)
+    # Largest rings first, so counties enclosed by another county (VA's independent cities) paint on top
+    area = shapely.area(shapely.get_parts(geoms))
+    order = np.argsort(-area, kind='stable')
+    lengths = np.diff(offsets)[order]
+    xy = np.concatenate([xy[offsets[i]:offsets[i + 1]] for i in order])
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    ring_fips = fips[owner[order]]
+
+    states = np.unique(fips // 1000)
+    borders = [shapely.boundary(shapely.coverage_union_all(geoms[fips // 1000 == s])) for s in states]
+    border_xy, border_idx = shapely.get_coordinates(shapely.get_parts(np.array(borders, dtype=object)), return_index=True)
+    border_offsets = np.concatenate([[0], np.cumsum(np.bincount(border_idx))])
+    return {
+        'xy': xy, 'offsets': offsets, 'fips': ring_fips,
+        'border_xy': border_xy.astype(np.float32), 'border_offsets': border_offsets,
+    }
+
+
+def county_geometry(geojson_path=COUNTY_GEOJSON, tolerance=TOLERANCE_M, cache_path=CACHE_PATH, rebuild=False):
+    """Cached build_county_geometry (datasets/cache/county_polygons.npz)."""
+    st = os.stat(geojson_path)
+    signature = f"{st.st_size}:{int(st.st_mtime)}:{tolerance}"
+    if os.path.exists(cache_path) and not rebuild:
+        z = np.load(cache_path, allow_pickle=False)
+        if str(z['signature']) == signature:
+            return {k: z[k] for k in z.files if k != 'signature'}
+    geo = build_county_geometry(geojson_path, tolerance)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    np.savez(cache_path, signature=signature, **geo)
+    return geo
+
+
+# --- RENDERING ---
+def draw_counties(ax, geo, values, cmap, norm, edgecolor='white', linewidth=0.08, border_color='#666666',
+                  border_width=0.4):
+    """
+    One PolyCollection of all county rings colored by `values` (Series indexed by
+    int FIPS; missing counties in NO_DATA) plus a LineCollection of state borders.
+    Returns the PolyCollection (usable as a colorbar mappable).
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    cmap = plt.get_cmap(cmap).with_extremes(bad=NO_DATA)
+    vals = pd.Series(values, dtype=np.float64).reindex(geo['fips']).to_numpy()
+    rings = np.split(geo['xy'], geo['offsets'][1:-1])
+    counties = PolyCollection(rings, array=np.ma.masked_invalid(vals), cmap=cmap, norm=norm,
+                              edgecolors=edgecolor, linewidths=linewidth, antialiased=True)
+    ax.add_collection(counties)
+    borders = np.split(geo['border_xy'], geo['border_offsets'][1:-1])
+    ax.add_collection(LineCollection(borders, colors=border_color, linewidths=border_width))
+
+    x, y = geo['xy'][:, 0], geo['xy'][:, 1]
+    ax.set_xlim(x.min(), x.max())
+    ax.set_ylim(y.min(), y.max())
+    ax.set_aspect('equal')
+    ax.axis('off')
+    return counties
+
+
+def robust_norm(values, low=2, high=98):
+    """Normalize between the low / high percentiles, so a handful of tiny counties do not flatten the scale."""
+    import matplotlib.pyplot as plt
+    v = np.asarray(values, dtype=np.float64)
+    v = v[np.isfinite(v)]
+    return plt.Normalize(*np.percentile(v, [low, high])) if len(v) else plt.Normalize(0, 1)
+
+
+def main():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    t0 = time.perf_counter()
+    geo = county_geometry(rebuild=True)
+    t1 = time.perf_counter()
+    geo = county_geometry()
+    t2 = time.perf_counter()
+    print(f"{len(np.unique(geo['fips'])):,} counties, {len(geo['offsets']) - 1:,} rings, {len(geo['xy']):,} vertices "
+          f"({os.path.getsize(CACHE_PATH) / 1e6:.2f} MB cached): built in {t1 - t0:.2f}s, loaded in {(t2 - t1) * 1000:.0f} ms")
+
+    values = pd.Series(np.random.default_rng(0).gamma(4, 4, len(geo['fips'])), index=geo['fips'])
+    values = values[~values.index.duplicated()]
+    t0 = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(16, 10))
+    pc = draw_counties(ax, geo, values, 'Reds', robust_norm(values))
+    fig.colorbar(pc, ax=ax, orientation='horizontal', shrink=0.6, pad=0.02)
+    fig.savefig(io.BytesIO(), format='png', dpi=300)
+    plt.close(fig)
+    print(f"Rendered a 300-dpi county map in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Indexed education attribute store.
+
+The raw Education{year}.csv files are long format (FIPS, Attribute, Value) with
+dozens of attributes whose names change between releases. They are converted
+once into:
+
+    datasets/education_store/catalog.json     year -> {canonical metric: raw attribute}
+    datasets/education_store/<Metric>.pkl     Year, FIPS, Value  (sorted by Year, FIPS)
+
+Readers ask for canonical metrics (and optionally years); only the partitions
+for those metrics are opened and the year filter is a slice on the sorted
+Year column, so adding a metric never means re-scanning the CSVs.
+
+Usage:
+    python analysis-code/education_store.py          # (re)build and print the catalog
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "datasets")
+STORE_NAME = "education_store"
+
+EDUCATION_FILE = re.compile(r'Education(\d{4})\.csv$')
+
+
+# Canonical metric -> (topic test, is_percent). Topic tests mirror the original
+# load_data heuristic ("less than" + "high school"); when several attributes in a
+# file match (different census periods), the last one in file order wins, as before.
+def _is_less_hs(a):
+    return "less than" in a and "high school" in a
+
+def _is_hs_only(a):
+    return "high school" in a and "only" in a
+
+def _is_some_college(a):
+    return "some college" in a
+
+def _is_bachelors(a):
+    return "bachelor" in a
+
+EDU_METRICS = {
+    'Count_Less_HS': (_is_less_hs, False),
+    'Pct_Less_HS': (_is_less_hs, True),
+    'Count_HS_Only': (_is_hs_only, False),
+    'Pct_HS_Only': (_is_hs_only, True),
+    'Count_Some_College': (_is_some_college, False),
+    'Pct_Some_College': (_is_some_college, True),
+    'Count_Bachelors': (_is_bachelors, False),
+    'Pct_Bachelors': (_is_bachelors, True),
+}
+
+
+def resolve_catalog(attributes):
+    """Map canonical metric names to this file's raw attribute names."""
+    resolved = {}
+    for a in attributes:
+        a_lower = str(a).lower()
+        for metric, (topic, is_pct) in EDU_METRICS.items():
+            if topic(a_lower) and ("percent" in a_lower) == is_pct:
+                resolved[metric] = a
+    return resolved
+
+
+def store_dir(data_dir=DATA_DIR):
+    return os.path.join(data_dir, STORE_NAME)
+
+
+def education_years(data_dir=DATA_DIR):
+    """Years with an Education{year}.csv in the data folder, ascending."""
+    return sorted(int(m.group(1)) for m in map(EDUCATION_FILE.match, os.listdir(data_dir)) if m)
+
+
+def _source_files(data_dir):
+    files = {}
+    for year in education_years(data_dir):
+        path = os.path.join(data_dir, f"Education{year}.csv")
+        if os.path.exists(path):
+            st = os.stat(path)
+            files[str(year)] = [st.st_size, int(st.st_mtime)]
+    return files
+
+
+def load_catalog(data_dir=DATA_DIR):
+    path = os.path.join(store_dir(data_dir), "catalog.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_education_store(data_dir=DATA_DIR):
+    """Read every Education{year}.csv once and write the catalog and metric partitions."""
+    out = store_dir(data_dir)
+    os.makedirs(out, exist_ok=True)
+    parts = {m: [] for m in EDU_METRICS}
+    catalog = {'sources': _source_files(data_dir), 'years': {}}
+
+    for year in education_years(data_dir):
+        edu_path = os.path.join(data_dir, f"Education{year}.csv")
+        if not os.path.exists(edu_path): continue
+        edu = pd.read_csv(edu_path, encoding='latin1', low_memory=False)
+        f_col = 'FIPS Code' if 'FIPS Code' in edu.columns else 'FIPS'
+        if f_col not in edu.columns or 'Attribute' not in edu.columns: continue
+
+        resolved = resolve_catalog(edu['Attribute'].unique())
+        catalog['years'][str(year)] = resolved
+        if not resolved: continue
+
+        edu = edu[edu['Attribute'].isin(resolved.values())]
+        fips = pd.to_numeric(edu[f_col], errors='coerce')
+        edu = pd.DataFrame({
+            'FIPS': fips,
+            'Attribute': edu['Attribute'].values,
+            'Value': pd.to_numeric(edu['Value'], errors='coerce'),
+        })[fips.notna().values]
+        edu['FIPS'] = edu['FIPS'].astype(np.int32)
+        for metric, attr in resolved.items():
+            rows = edu.loc[edu['Attribute'] == attr, ['FIPS', 'Value']]
+            rows.insert(0, 'Year', np.int16(year))
+            parts[metric].append(rows)
+
+    for metric, frames in parts.items():
+        path = os.path.join(out, f"{metric}.pkl")
+        if not frames:
+            if os.path.exists(path): os.remove(path)
+            continue
+        part = pd.concat(frames, ignore_index=True)
+        part = part.drop_duplicates(['Year', 'FIPS'], keep='last').sort_values(['Year', 'FIPS'], ignore_index=True)
+        part.to_pickle(path)
+
+    with open(os.path.join(out, "catalog.json"), 'w') as f:
+        json.dump(catalog, f, indent=2)
+    return catalog
+
+
+def ensure_education_store(data_dir=DATA_DIR):
+    """Return the catalog, rebuilding the store if any source file was added or changed."""
+    catalog = load_catalog(data_dir)
+    if catalog is None or catalog.get('sources') != _source_files(data_dir):
+        catalog = build_education_store(data_dir)
+    return catalog
+
+
+def read_education(metrics, years=None, data_dir=DATA_DIR):
+    """
+    Wide frame with columns Year, FIPS and one column per requested canonical metric.
+    Only the partitions for `metrics` are read; `years` is applied on the sorted Year column.
+    """
+    ensure_education_store(data_dir)
+    frames = []
+    for metric in metrics:
+        path = os.path.join(store_dir(data_dir), f"{metric}.pkl")
+        if not os.path.exists(path): continue
+        part = pd.read_pickle(path)
+        if years is not None:
+            y = part['Year'].values
+            if isinstance(years, range) and years.step == 1:
+                lo, hi = np.searchsorted(y, [years.start, years.stop])
+                part = part.iloc[lo:hi]
+            else:
+                part = part[np.isin(y, list(years))]
+        frames.append(part.set_index(['Year', 'FIPS'])['Value'].rename(metric))
+    if not frames:
+        return pd.DataFrame(columns=['Year', 'FIPS', *metrics])
+    return pd.concat(frames, axis=1).reset_index()
+
+
+def main():
+    catalog = build_education_store()
+    for year, resolved in catalog['years'].items():
+        print(f"{year}:")
+        for metric, attr in resolved.items():
+            print(f"   {metric:<20} <- {attr}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+County FIPS validation and repair from the crash coordinates.
+
+load_data() takes each crash's county from the coded STATE / COUNTY fields,
+so unknown codes (COUNTY 999 and friends) become county-years that never
+merge with the education data. This stage places every crash with
+coordinates (hotspots.crash_points) in a county polygon from
+dashboard/public/data/counties-fips.json. It is a single bulk STRtree query
+over all years at once; points that miss every polygon (coastline
+simplification) are snapped to the nearest county within SNAP_DEG.
+
+Each crash gets a status:
+    ok              coordinates fall in the coded county
+    unknown_code    coded county is not a county (999, 998, ...): reassigned
+    mismatch        coordinates fall in another county of the coded state: reassigned
+    state_mismatch  coordinates fall in another state: flagged only (one of the two is wrong)
+    no_location     no usable coordinates, or outside every county
+
+`--apply` writes the reassignments to datasets/cache/fips_repairs.csv, and
+load_data() and the time cube apply them from then on, for as long as the
+FARS files are the ones they were computed from.
+
+Usage:
+    python analysis-code/fips_repair.py            # mismatch rates per year (output/FIPS_CHECK.csv)
+    python analysis-code/fips_repair.py --apply    # ... and write the repair table
+"""
+
+import argparse
+import json
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import ingest
+from hotspots import crash_points
+from spatial_stats import COUNTY_GEOJSON
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+
+STATUS = ['ok', 'unknown_code', 'mismatch', 'state_mismatch', 'no_location']
+REPAIRED = ['unknown_code', 'mismatch']
+SNAP_DEG = 0.02  # ~2 km
+
+
+# --- POINT IN COUNTY ---
+@lru_cache(maxsize=None)
+def county_polygons(geojson_path=COUNTY_GEOJSON):
+    """(int32 FIPS, shapely geometries, STRtree) of the county polygons."""
+    import shapely
+    with open(geojson_path) as f:
+        features = json.load(f)['features']
+    fips = np.array([int(f['id']) for f in features], dtype=np.int32)
+    geoms = np.array([shapely.geometry.shape(f['geometry']) for f in features], dtype=object)
+    return fips, geoms, shapely.STRtree(geoms)
+
+
+def locate_counties(lat, lon, geojson_path=None, snap_deg=SNAP_DEG):
+    """FIPS of the county polygon containing each point (-1 if none within `snap_deg`, or NaN coordinates)."""
+    import shapely
+    fips, _, tree = county_polygons(geojson_path or COUNTY_GEOJSON)
+    located = np.full(len(lat), -1, dtype=np.int32)
+    rows = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    points = shapely.points(np.asarray(lon, dtype=np.float64)[rows], np.asarray(lat, dtype=np.float64)[rows])
+
+    # Points on a shared boundary hit both counties; the first hit wins
+    hit, poly = tree.query(points, predicate='intersects')
+    hit, first = np.unique(hit, return_index=True)
+    located[rows[hit]] = fips[poly[first]]
+
+    missed = np.flatnonzero(located[rows] < 0)
+    if len(missed):
+        hit, poly = tree.query_nearest(points[missed], max_distance=snap_deg)
+        hit, first = np.unique(hit, return_index=True)
+        located[rows[missed[hit]]] = fips[poly[first]]
+    return located
+
+
+# --- VALIDATION ---
+def validate_fips(pts, geojson_path=None):
+    """
+    Per-crash check of the coded FIPS against the coordinates. Returns a dict of
+    arrays aligned with `pts`: 'located' (-1 if unknown), 'status' (index into
+    STATUS) and 'fips' (coded FIPS, with the REPAIRED statuses reassigned).
+    """
+    geojson_path = geojson_path or COUNTY_GEOJSON
+    coded = pts['fips']
+    located = locate_counties(pts['lat'], pts['lon'], geojson_path)
+    known = np.isin(coded, county_polygons(geojson_path)[0])
+
+    status = np.full(len(coded), STATUS.index('no_location'), dtype=np.int8)
+    found = located >= 0
+    same_state = located // 1000 == coded // 1000
+    status[found & (located == coded)] = STATUS.index('ok')
+    status[found & ~known & same_state] = STATUS.index('unknown_code')
+    status[found & known & same_state & (located != coded)] = STATUS.index('mismatch')
+    status[found & ~same_state] = STATUS.index('state_mismatch')
+
+    repair = np.isin(status, [STATUS.index(s) for s in REPAIRED])
+    return {'located': located, 'status': status, 'fips': np.where(repair, located, coded).astype(np.int32)}
+
+
+def mismatch_report(pts, check):
+    """Crashes per year and status, with rates (% of the year's crashes) and the repaired total."""
+    counts = pd.crosstab(pts['year'], pd.Categorical.from_codes(check['status'], STATUS), dropna=False)
+    counts.columns = counts.columns.astype(str).rename(None)
+    counts.index = counts.index.astype(object).rename('Year')
+    counts.loc['All'] = counts.sum()
+    report = counts.copy()
+    report.insert(0, 'Crashes', counts.sum(axis=1))
+    report['Repaired'] = counts[REPAIRED].sum(axis=1)
+    for s in STATUS[1:] + ['Repaired']:
+        report[f'{s}_pct'] = (report[s] / report['Crashes'] * 100).round(3)
+    return report
+
+
+def repair_table(pts, check):
+    """One row per reassigned crash: Year, ST_CASE, FIPS_Coded, FIPS (the format read by ingest)."""
+    changed = check['fips'] != pts['fips']
+    return pd.DataFrame({
+        'Year': pts['year'][changed],
+        'ST_CASE': pts['st_case'][changed],
+        'FIPS_Coded': pts['fips'][changed],
+        'FIPS': check['fips'][changed],
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--apply', action='store_true', help=f"write datasets/cache/{ingest.FIPS_REPAIRS} for load_data()")
+    args = parser.parse_args(argv)
+
+    pts = crash_points()
+    t0 = time.perf_counter()
+    check = validate_fips(pts)
+    elapsed = time.perf_counter() - t0
+    print(f"Validated {len(pts['fips']):,} crashes against {len(county_polygons(COUNTY_GEOJSON)[0]):,} county polygons in {elapsed:.2f}s")
+
+    report = mismatch_report(pts, check)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    report.to_csv(os.path.join(OUTPUT_DIR, "FIPS_CHECK.csv"))
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(report[['Crashes'] + [f'{s}_pct' for s in STATUS[1:] + ['Repaired']]].to_string())
+
+    if args.apply:
+        table = repair_table(pts, check)
+        path = ingest.write_fips_repairs(table)
+        print(f"\nWrote {len(table):,} repairs to {path}")
+
+
+if __name__ == "__main__":
+    main()
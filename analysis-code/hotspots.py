@@ -0,0 +1,279 @@
+"""
+Crash-point hotspots from the FARS crash coordinates (LATITUDE / LONGITUD).
+
+Every crash of every year is loaded once into flat arrays (float32
+coordinates, int32 FIPS, int16 year and fatalities; about 20 bytes a crash)
+and cached as datasets/cache/crash_points.npz. Missing or coded coordinates
+(77.7777, 88.8888, 99.9999, ...) become NaN.
+
+    pts = crash_points()
+    tree = build_index(pts)                       haversine ball tree
+    within_km(tree, 40.7128, -74.0060, 5)         indices into pts, ~1 ms
+
+Hotspots are DBSCAN clusters on the haversine metric. Crashes are first
+snapped to ~500 m cells and each cell is clustered once, weighted by its crash
+count, so dense cities do not blow up the neighbour lists. Each cluster gets a
+convex-hull polygon and a shape from its second moments: elongated clusters
+(length >= ELONGATION x width) are corridors, ranked by fatalities. The kernel
+density surface is a Gaussian smoothing of crash counts on a fixed
+CELL_DEG grid over the continental US, in crashes per km2 per year.
+
+Usage:
+    python analysis-code/hotspots.py      # load, index and query timing; writes the hotspot outputs
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import ingest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+
+POINT_COLUMNS = {'STATE', 'COUNTY', 'ST_CASE', 'LATITUDE', 'LONGITUD', 'FATALS'}
+CACHE_NAME = "crash_points.npz"
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180
+
+# Clustering
+SNAP_DEG = 0.005      # ~500 m cells
+EPS_KM = 1.5
+MIN_CRASHES = 25      # crashes within EPS_KM of a core cell, all years
+ELONGATION = 3.0
+MIN_WIDTH_KM = 0.5
+
+# Kernel density
+CONUS = (-125.0, -66.0, 24.0, 50.0)  # lon0, lon1, lat0, lat1
+CELL_DEG = 0.05
+BANDWIDTH_KM = 5.0
+
+
+# --- CRASH POINTS ---
+def valid_coordinates(lat, lon):
+    """Inside the US bounding box (Puerto Rico to Alaska); FARS codes unknowns as 77.7777 / 777.7777 etc."""
+    return (lat >= 17) & (lat <= 72) & (lon >= -180) & (lon <= -64)
+
+
+def read_crash_points(year, data_dir=None):
+    """Coordinates, FIPS, case number and fatalities of every crash in `year` (None if missing)."""
+    acc = ingest.read_fars_table(year, 'accident.csv', data_dir, usecols=lambda c: c.upper() in POINT_COLUMNS)
+    if acc is None: return None
+    acc.columns = [c.upper() for c in acc.columns]
+    lat = pd.to_numeric(acc['LATITUDE'], errors='coerce').to_numpy(dtype=np.float64)
+    lon = pd.to_numeric(acc['LONGITUD'], errors='coerce').to_numpy(dtype=np.float64)
+    ok = valid_coordinates(lat, lon)
+    return {
+        'lat': np.where(ok, lat, np.nan).astype(np.float32),
+        'lon': np.where(ok, lon, np.nan).astype(np.float32),
+        'fips': (acc['STATE'] * 1000 + acc['COUNTY']).to_numpy(dtype=np.int32),
+        'st_case': acc['ST_CASE'].to_numpy(dtype=np.int32),
+        'year': np.full(len(acc), year, dtype=np.int16),
+        'fatals': acc['FATALS'].to_numpy(dtype=np.int16),
+    }
+
+
+def crash_points(data_dir=None, years=None, rebuild=False):
+    """
+    All crashes of `years` (default: every year with a FARS source) as a dict of flat arrays
+    (cached, rebuilt when the FARS files change).
+    """
+    data_dir = data_dir or ingest.DATA_DIR
+    years = ingest.fars_years(data_dir) if years is None else list(years)
+    cache = os.path.join(data_dir, "cache", CACHE_NAME)
+    signature = f"{list(years)}|{ingest.fars_signature(data_dir)}"
+    if os.path.exists(cache) and not rebuild:
+        z = np.load(cache, allow_pickle=False)
+        if str(z['signature']) == signature:
+            return {k: z[k] for k in z.files if k != 'signature'}
+
+    parts = [p for p in (read_crash_points(y, data_dir) for y in years) if p is not None]
+    if not parts:
+        span = f"{min(years)}-{max(years)}" if years else "any year"
+        raise FileNotFoundError(f"No FARS accident tables for {span} in {data_dir} (run download_data.py)")
+    pts = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    np.savez(cache, signature=signature, **pts)
+    return pts
+
+
+# --- SPATIAL INDEX ---
+def build_index(pts):
+    """Haversine ball tree over the crashes with valid coordinates (tree.rows maps back into pts)."""
+    from sklearn.neighbors import BallTree
+    rows = np.flatnonzero(np.isfinite(pts['lat']))
+    tree = BallTree(np.radians(np.column_stack([pts['lat'][rows], pts['lon'][rows]])), metric='haversine')
+    tree.rows = rows
+    return tree
+
+
+def within_km(tree, lat, lon, km):
+    """Indices (into the point arrays) of the crashes within `km` of (lat, lon)."""
+    hits = tree.query_radius(np.radians([[lat, lon]]), r=km / EARTH_RADIUS_KM)[0]
+    return tree.rows[hits]
+
+
+def count_within_km(tree, lat, lon, km):
+    """Crash counts within `km` of each of many (lat, lon) locations."""
+    X = np.radians(np.column_stack([np.atleast_1d(lat), np.atleast_1d(lon)]))
+    return tree.query_radius(X, r=km / EARTH_RADIUS_KM, count_only=True)
+
+
+# --- CLUSTERS AND CORRIDORS ---
+def cluster_points(pts, eps_km=EPS_KM, min_crashes=MIN_CRASHES, snap_deg=SNAP_DEG):
+    """DBSCAN cluster label of every crash (-1 for noise and for crashes without coordinates)."""
+    from sklearn.cluster import DBSCAN
+    rows = np.flatnonzero(np.isfinite(pts['lat']))
+    ilat = np.round(pts['lat'][rows] / snap_deg).astype(np.int64)
+    ilon = np.round(pts['lon'][rows] / snap_deg).astype(np.int64)
+    cells, inverse, weight = np.unique(ilat * 100_000 + ilon + 50_000, return_inverse=True, return_counts=True)
+    centers = np.column_stack([cells // 100_000, cells % 100_000 - 50_000])
+    db = DBSCAN(eps=eps_km / EARTH_RADIUS_KM, min_samples=min_crashes, metric='haversine', algorithm='ball_tree')
+    cell_labels = db.fit_predict(np.radians(centers * snap_deg), sample_weight=weight)
+    labels = np.full(len(pts['lat']), -1, dtype=np.int32)
+    labels[rows] = cell_labels[inverse]
+    return labels
+
+
+def summarize_clusters(pts, labels):
+    """
+    One row per cluster: crashes, fatalities, years, centroid, main county and
+    shape (length / width in km along the principal axes, +-2 sd), ranked by fatalities.
+    """
+    rows = np.flatnonzero(labels >= 0)
+    c = labels[rows]
+    n = np.bincount(c).astype(np.float64)
+    lat, lon = pts['lat'][rows].astype(np.float64), pts['lon'][rows].astype(np.float64)
+    clat, clon = np.bincount(c, lat) / n, np.bincount(c, lon) / n
+
+    # Second moments in local km coordinates -> eigenvalues of the 2x2 covariance
+    x = (lon - clon[c]) * KM_PER_DEG * np.cos(np.radians(clat[c]))
+    y = (lat - clat[c]) * KM_PER_DEG
+    sxx, syy, sxy = (np.bincount(c, v) / n for v in (x * x, y * y, x * y))
+    mid, half = (sxx + syy) / 2, np.sqrt(((sxx - syy) / 2) ** 2 + sxy ** 2)
+    length = 4 * np.sqrt(mid + half)
+    width = 4 * np.sqrt(np.maximum(mid - half, 0))
+
+    by_county = pd.Series(1, index=pd.MultiIndex.from_arrays([c, pts['fips'][rows]])).groupby(level=[0, 1]).size()
+    main_fips = by_county.groupby(level=0).idxmax().map(lambda k: k[1])
+
+    out = pd.DataFrame({
+        'Cluster': np.arange(len(n)),
+        'Crashes': n.astype(np.int64),
+        'Fatalities': np.bincount(c, pts['fatals'][rows]).astype(np.int64),
+        'First_Year': pd.Series(pts['year'][rows]).groupby(c).min().to_numpy(),
+        'Last_Year': pd.Series(pts['year'][rows]).groupby(c).max().to_numpy(),
+        'Lat': clat.round(5),
+        'Lon': clon.round(5),
+        'FIPS': main_fips.reindex(np.arange(len(n))).to_numpy(),
+        'Length_Km': length.round(2),
+        'Width_Km': width.round(2),
+        'Bearing': (np.degrees(np.arctan2(mid + half - syy, sxy)) % 180).round(0),
+    })
+    out['Corridor'] = (out['Length_Km'] >= ELONGATION * np.maximum(out['Width_Km'], MIN_WIDTH_KM))
+    out['Fatalities_Per_Km'] = (out['Fatalities'] / np.maximum(out['Length_Km'], MIN_WIDTH_KM)).round(2)
+    out = out.sort_values(['Fatalities', 'Crashes'], ascending=False, ignore_index=True)
+    out.insert(0, 'Rank', np.arange(1, len(out) + 1))
+    return out
+
+
+def corridors(summary):
+    """Elongated clusters only, re-ranked by fatalities."""
+    out = summary[summary['Corridor']].drop(columns=['Rank', 'Corridor']).reset_index(drop=True)
+    out.insert(0, 'Rank', np.arange(1, len(out) + 1))
+    return out
+
+
+def hotspot_polygons(pts, labels, summary, snap_deg=SNAP_DEG):
+    """GeoJSON FeatureCollection of cluster convex hulls with the summary columns as properties."""
+    import shapely
+    rows = np.flatnonzero(labels >= 0)
+    order = np.argsort(labels[rows], kind='stable')
+    rows = rows[order]
+    coords = np.column_stack([pts['lon'][rows], pts['lat'][rows]]).astype(np.float64)
+    hulls = shapely.convex_hull(shapely.multipoints(coords, indices=labels[rows]))
+    # Single points or straight lines get a half-cell buffer so every hotspot has an area
+    degenerate = shapely.area(hulls) == 0
+    hulls[degenerate] = shapely.buffer(hulls[degenerate], snap_deg / 2)
+
+    features = []
+    for rec in summary.to_dict('records'):
+        geom = shapely.set_precision(hulls[rec['Cluster']], 1e-5)
+        props = {k: (v.item() if hasattr(v, 'item') else v) for k, v in rec.items()}
+        features.append({'type': 'Feature', 'geometry': shapely.geometry.mapping(geom), 'properties': props})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# --- KERNEL DENSITY ---
+def density_grid(pts, cell_deg=CELL_DEG, bandwidth_km=BANDWIDTH_KM, extent=CONUS):
+    """
+    Gaussian kernel density of crashes on a fixed lon/lat grid (rows from south to north),
+    in crashes per km2 per year. The kernel is `bandwidth_km` wide in both directions:
+    columns are smoothed row by row with a sigma scaled for that row's latitude.
+    """
+    from scipy.ndimage import gaussian_filter1d
+    lon0, lon1, lat0, lat1 = extent
+    nx, ny = int(round((lon1 - lon0) / cell_deg)), int(round((lat1 - lat0) / cell_deg))
+    lat, lon = pts['lat'], pts['lon']
+    ok = (lon >= lon0) & (lon < lon1) & (lat >= lat0) & (lat < lat1)
+    ix = ((lon[ok] - lon0) / cell_deg).astype(np.int64).clip(0, nx - 1)
+    iy = ((lat[ok] - lat0) / cell_deg).astype(np.int64).clip(0, ny - 1)
+    counts = np.bincount(iy * nx + ix, minlength=nx * ny).reshape(ny, nx).astype(np.float64)
+
+    row_lat = lat0 + (np.arange(ny) + 0.5) * cell_deg
+    km_y = KM_PER_DEG * cell_deg
+    km_x = km_y * np.cos(np.radians(row_lat))
+    grid = gaussian_filter1d(counts, bandwidth_km / km_y, axis=0, mode='constant')
+    for r in np.flatnonzero(grid.any(axis=1)):
+        grid[r] = gaussian_filter1d(grid[r], bandwidth_km / km_x[r], mode='constant')
+    n_years = max(len(np.unique(pts['year'])), 1)
+    return grid / (km_y * km_x)[:, None] / n_years
+
+
+def hotspots(pts):
+    """(labels, summary, polygons, density) with the default parameters."""
+    labels = cluster_points(pts)
+    summary = summarize_clusters(pts, labels)
+    return labels, summary, hotspot_polygons(pts, labels, summary), density_grid(pts)
+
+
+def main():
+    t0 = time.perf_counter()
+    pts = crash_points(rebuild=True)
+    t1 = time.perf_counter()
+    tree = build_index(pts)
+    t2 = time.perf_counter()
+    n_valid = len(tree.rows)
+    print(f"{len(pts['lat']):,} crashes ({n_valid:,} with coordinates) loaded in {t1 - t0:.2f}s "
+          f"({sum(a.nbytes for a in pts.values()) / 1e6:.1f} MB); ball tree built in {t2 - t1:.2f}s")
+
+    # Query latency at the locations of random crashes (a realistic, dense-biased workload)
+    rng = np.random.default_rng(0)
+    probe = tree.rows[rng.integers(0, n_valid, 1000)]
+    t0 = time.perf_counter()
+    hits = [len(within_km(tree, pts['lat'][i], pts['lon'][i], 5)) for i in probe]
+    per_query = (time.perf_counter() - t0) / len(probe)
+    print(f"within 5 km: {per_query * 1000:.2f} ms/query, median {int(np.median(hits)):,} crashes returned")
+
+    t0 = time.perf_counter()
+    labels, summary, polygons, density = hotspots(pts)
+    print(f"{len(summary):,} hotspots ({int(summary['Corridor'].sum()):,} corridors, "
+          f"{(labels >= 0).mean() * 100:.1f}% of crashes) and a {density.shape[0]}x{density.shape[1]} "
+          f"density grid in {time.perf_counter() - t0:.2f}s")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(os.path.join(OUTPUT_DIR, "HOTSPOTS.geojson"), 'w') as f:
+        json.dump(polygons, f, separators=(',', ':'))
+    ranked = corridors(summary)
+    ranked.to_csv(os.path.join(OUTPUT_DIR, "HOTSPOT_CORRIDORS.csv"), index=False)
+    print("\nTop corridors:")
+    print(ranked.head(10).to_string(index=False))
+    print(f"\nSaved {OUTPUT_DIR}/HOTSPOTS.geojson and HOTSPOT_CORRIDORS.csv")
+
+
+if __name__ == "__main__":
+    main()
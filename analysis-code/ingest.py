@@ -0,0 +1,253 @@
+"""
+Data layer: reads the FARS accident tables and the education store and builds
+the county-year frame used by the report, the dashboard export and the
+modelling scripts.
+
+Importing this module has no side effects and pulls in only pandas/numpy, so
+entry points that just need the data (dashboard/prepare_data.py) do not pay
+for matplotlib, seaborn, geopandas or scikit-learn.
+
+Usage:
+    python analysis-code/ingest.py      # load and print the per-column memory report
+"""
+
+import os
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from education_store import read_education
+from sketches import column_summary, merge_summaries, quantile_edges, cut_by_edges
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "datasets")
+
+
+# --- FARS SOURCES (ZIP archive or extracted folder) ---
+FARS_SOURCE = re.compile(r'FARS(\d{4})(\.zip)?$', re.IGNORECASE)
+
+
+def fars_years(data_dir=None):
+    """Years with a FARS{year}.zip or FARS{year}/ source in the data folder (downloaded or fetched), ascending."""
+    names = os.listdir(data_dir or DATA_DIR)
+    return sorted({int(m.group(1)) for m in map(FARS_SOURCE.match, names) if m})
+
+
+def find_fars_member(names, table):
+    """Pick the member whose basename matches `table` case-insensitively (shallowest path wins)."""
+    matches = [n for n in names if os.path.basename(n.rstrip('/')).lower() == table.lower()]
+    return min(matches, key=lambda n: n.count('/')) if matches else None
+
+
+def read_fars_table(year, table='accident.csv', data_dir=None, **kwargs):
+    """
+    Read one FARS table for `year`, streaming it straight out of FARS{year}.zip when present,
+    otherwise from an extracted FARS{year}/ folder. Returns None if the table is not found.
+    """
+    data_dir = data_dir or DATA_DIR
+    kwargs = {'encoding': 'latin1', 'low_memory': False, **kwargs}
+    candidates = sorted(d for d in os.listdir(data_dir) if f"FARS{year}" in d)
+    for name in sorted(candidates, key=lambda d: not d.lower().endswith('.zip')):
+        path = os.path.join(data_dir, name)
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as z:
+                member = find_fars_member(z.namelist(), table)
+                if member:
+                    with z.open(member) as f:
+                        return pd.read_csv(f, **kwargs)
+        elif os.path.isdir(path):
+            # Extracted archives often keep their inner folder (FARS2019/FARS2019NationalCSV/...)
+            names = [os.path.relpath(os.path.join(root, f), path).replace(os.sep, '/')
+                     for root, _, files in os.walk(path) for f in files]
+            member = find_fars_member(names, table)
+            if member:
+                return pd.read_csv(os.path.join(path, member), **kwargs)
+    return None
+
+
+def fars_signature(data_dir=None):
+    """Name, size and mtime of every FARS source, for invalidating caches derived from them."""
+    data_dir = data_dir or DATA_DIR
+    parts = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.startswith('FARS'):
+            st = os.stat(os.path.join(data_dir, name))
+            parts.append(f"{name}:{st.st_size}:{int(st.st_mtime)}")
+    return ";".join(parts)
+
+
+# --- DATA LOADING ---
+# Only these accident.csv columns are parsed (the file has ~80, many of them text)
+FARS_COLUMNS = {'STATE', 'COUNTY', 'ST_CASE', 'FATALS', 'DRUNK_DR', 'WEATHER', 'WEATHER1', 'LGT_COND'}
+COUNT_COLUMNS = ['ST_CASE', 'FATALS', 'Drunk', 'Bad_Weather', 'Dark']
+EDU_LABELS = ['High Edu (Low Risk)', 'Med-High', 'Med-Low', 'Low Edu (High Risk)']
+
+
+# Crash-level county reassignments from the coordinates (written by fips_repair.py --apply).
+# The first line records fars_signature() of the sources they were computed from.
+FIPS_REPAIRS = "fips_repairs.csv"
+
+
+def write_fips_repairs(table, data_dir=None):
+    data_dir = data_dir or DATA_DIR
+    path = os.path.join(data_dir, "cache", FIPS_REPAIRS)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        f.write(f"# {fars_signature(data_dir)}\n")
+        table.to_csv(f, index=False)
+    return path
+
+
+def read_fips_repairs(data_dir=None):
+    """
+    Repair table (Year, ST_CASE, FIPS_Coded, FIPS), or None if fips_repair.py has not been
+    applied, or was applied to FARS files that have changed since.
+    """
+    data_dir = data_dir or DATA_DIR
+    path = os.path.join(data_dir, "cache", FIPS_REPAIRS)
+    if not os.path.exists(path): return None
+    with open(path) as f:
+        if f.readline().rstrip('\n') != f"# {fars_signature(data_dir)}":
+            print(f"Ignoring {FIPS_REPAIRS}: the FARS files changed since it was written (re-run fips_repair.py --apply)")
+            return None
+        return pd.read_csv(f, dtype={'Year': np.int16, 'ST_CASE': np.int32, 'FIPS_Coded': np.int32, 'FIPS': np.int32})
+
+
+def apply_fips_repairs(year, st_case, fips, repairs):
+    """Copy of `fips` with `year`'s repairs applied, where the coded FIPS still matches the table."""
+    r = repairs[repairs['Year'] == year] if repairs is not None else None
+    if r is None or r.empty: return fips
+    pos = pd.Index(st_case).get_indexer(r['ST_CASE'].to_numpy())
+    ok = pos >= 0
+    ok[ok] = fips[pos[ok]] == r['FIPS_Coded'].to_numpy()[ok]
+    fips = fips.copy()
+    fips[pos[ok]] = r['FIPS'].to_numpy()[ok]
+    return fips
+
+
+def fars_county_counts(year, data_dir=None, repairs=None):
+    """Per-county crash counts for one year (FIPS as int), or None if the accident table is missing."""
+    acc = read_fars_table(year, 'accident.csv', data_dir, usecols=lambda c: c.upper() in FARS_COLUMNS)
+    if acc is None: return None
+    acc.columns = [c.upper() for c in acc.columns]
+    fips = (acc['STATE'] * 1000 + acc['COUNTY']).to_numpy(dtype=np.int32)
+    fips = apply_fips_repairs(year, acc['ST_CASE'].to_numpy(), fips, repairs)
+    
+    # Factors
+    w_col = 'WEATHER' if 'WEATHER' in acc.columns else 'WEATHER1'
+    counts = pd.DataFrame({
+        'FIPS': fips,
+        'ST_CASE': np.ones(len(acc), dtype=np.int32),
+        'FATALS': acc['FATALS'].astype(np.int32),
+        'Drunk': acc['DRUNK_DR'].fillna(0).astype(np.int32),
+        'Bad_Weather': acc[w_col].isin([2,3,4,10,11]).astype(np.int32),
+        'Dark': acc['LGT_COND'].isin([2,3]).astype(np.int32),
+    })
+    g = counts.groupby('FIPS', sort=True).sum()
+    g.insert(0, 'Year', np.int16(year))
+    return g.reset_index()
+
+
+def load_data(data_dir=None):
+    """
+    County-year frame with a compact schema: int32 FIPS, int16 Year, int32 counts,
+    float32 measures and categorical labels (see memory_report). Returns (df, state_coords).
+    """
+    data_dir = data_dir or DATA_DIR
+    print("Loading Data...")
+    fips_map = {1:'AL', 2:'AK', 4:'AZ', 5:'AR', 6:'CA', 8:'CO', 9:'CT', 10:'DE', 11:'DC', 12:'FL', 13:'GA', 15:'HI', 16:'ID', 17:'IL', 18:'IN', 19:'IA', 20:'KS', 21:'KY', 22:'LA', 23:'ME', 24:'MD', 25:'MA', 26:'MI', 27:'MN', 28:'MS', 29:'MO', 30:'MT', 31:'NE', 32:'NV', 33:'NH', 34:'NJ', 35:'NM', 36:'NY', 37:'NC', 38:'ND', 39:'OH', 40:'OK', 41:'OR', 42:'PA', 44:'RI', 45:'SC', 46:'SD', 47:'TN', 48:'TX', 49:'UT', 50:'VT', 51:'VA', 53:'WA', 54:'WV', 55:'WI', 56:'WY'}
+    
+    # State Grid Coords (Reusable)
+    state_coords = {
+        'WA':(0,0), 'ID':(0,1), 'MT':(0,2), 'ND':(0,3), 'MN':(0,4), 'IL':(0,5), 'WI':(0,6), 'MI':(0,7), 'NY':(0,8), 'RI':(0,9), 'MA':(0,10),
+        'OR':(1,0), 'NV':(1,1), 'WY':(1,2), 'SD':(1,3), 'IA':(1,4), 'IN':(1,5), 'OH':(1,6), 'PA':(1,7), 'NJ':(1,8), 'CT':(1,9), 'ME':(0,11),
+        'CA':(2,0), 'UT':(2,1), 'CO':(2,2), 'NE':(2,3), 'MO':(2,4), 'KY':(2,5), 'WV':(2,6), 'VA':(2,7), 'MD':(2,8), 'DE':(2,9), 'NH':(1,11), 'VT':(1,10),
+        'AZ':(3,1), 'NM':(3,2), 'KS':(3,3), 'AR':(3,4), 'TN':(3,5), 'NC':(3,6), 'SC':(3,7), 'DC':(3,8),
+        'OK':(4,3), 'LA':(4,4), 'MS':(4,5), 'AL':(4,6), 'GA':(4,7),
+        'HI':(5,0), 'AK':(5,1), 'TX':(5,3), 'FL':(5,8)
+    }
+
+    # Every year with a FARS source is loaded; county-years need that year's education data as well
+    years = fars_years(data_dir)
+
+    # Education: only the two metrics we need, read from the indexed store (county rows only)
+    edu = read_education(['Count_Less_HS', 'Pct_Less_HS'], years=years, data_dir=data_dir)
+    edu = edu[edu['FIPS'] % 1000 != 0]
+    
+    # FARS: one small per-county count table per year
+    repairs = read_fips_repairs(data_dir)
+    if repairs is not None:
+        print(f"Applying {len(repairs):,} crash FIPS repairs ({FIPS_REPAIRS})")
+    counts = []
+    for year in years:
+        try:
+            g = fars_county_counts(year, data_dir, repairs)
+            if g is not None: counts.append(g)
+        except: continue
+    counts = pd.concat(counts, ignore_index=True)
+    for year in sorted(set(counts['Year'].unique()) - set(edu['Year'].unique())):
+        print(f"FARS{year} has no Education{year}.csv yet; leaving {year} out")
+    
+    df = edu[edu['Year'].isin(counts['Year'].unique())].merge(counts, on=['Year', 'FIPS'], how='left')
+    df[COUNT_COLUMNS] = df[COUNT_COLUMNS].fillna(0).astype(np.int32)
+    
+    pop = (df['Count_Less_HS'] / (df['Pct_Less_HS'] / 100)).fillna(0)
+    df = df[(pop > 0).values]
+    pop = pop[pop > 0].values
+    
+    # Calc Rates (float64 arithmetic, stored as float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = {
+            'Fatality_Rate': df['FATALS'].values / pop * 100000,
+            'Drunk_Pct': df['Drunk'].values / df['ST_CASE'].values * 100,
+            'Drunk_Rate_Per_100k': df['Drunk'].values / pop * 100000, # NEW METRIC
+            'Dark_Pct': df['Dark'].values / df['ST_CASE'].values * 100,
+            'Weather_Pct': df['Bad_Weather'].values / df['ST_CASE'].values * 100,
+        }
+    
+    # Education quartiles: per-year summaries merged, as shards would be. The frame is in memory, so the
+    # summaries keep every value (k=None) and the edges are exactly pd.qcut's; sharded or streamed input
+    # would use the default compacting sketch instead.
+    pct = df['Pct_Less_HS'].values
+    years = df['Year'].values
+    edu = merge_summaries(*[column_summary(pct[years == y], k=None) for y in np.unique(years)])
+    edu_edges = quantile_edges(edu, len(EDU_LABELS))
+
+    fips = df['FIPS'].values.astype(np.int32)
+    fips_str = pd.Series(fips).astype(str).str.zfill(5)
+    df = pd.DataFrame({
+        'Year': df['Year'].values.astype(np.int16),
+        'FIPS': fips,
+        'FIPS_STR': pd.Categorical(fips_str),
+        'State_Abbrev': pd.Categorical(pd.Series(fips // 1000).map(fips_map), categories=sorted(fips_map.values())),
+        'Count_Less_HS': df['Count_Less_HS'].values.astype(np.float32),
+        'Pct_Less_HS': df['Pct_Less_HS'].values.astype(np.float32),
+        'Population': pop.astype(np.float32),
+        **{c: df[c].values for c in COUNT_COLUMNS},
+        **{c: v.astype(np.float32) for c, v in rates.items()},
+        'Urbanicity': pd.Categorical(np.where(pop >= 50000, 'Urban', 'Rural'), categories=['Rural', 'Urban']),
+        'Edu_Group': cut_by_edges(pct, edu_edges, EDU_LABELS),
+    })
+    
+    return df, state_coords
+
+
+def memory_report(df):
+    """Bytes per column (deep), with dtype and share of the total."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'bytes': usage})
+    report['pct'] = (report['bytes'] / report['bytes'].sum() * 100).round(1)
+    report.loc['TOTAL'] = ['', report['bytes'].sum(), 100.0]
+    return report
+
+
+def main():
+    df, _ = load_data()
+    print(f"Loaded {len(df)} records.")
+    print(memory_report(df).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Collision-aware labels for choropleths (states, counties, any projection).
+
+Each region's label is a small stack of text lines (e.g. "CA" over "12.3").
+Text extents come from the figure's renderer (glyph advances, measured once
+per character) and are converted to data units from the axes' current
+transform, so placement works for whatever coordinates the map is drawn in.
+
+    placements = place_labels(ax, geoms, [abbrevs, values], sizes=(12, 10))
+    draw_labels(ax, placements, [abbrevs, values], sizes=(12, 10), colors=text_colors)
+
+Placement is greedy, larger regions first:
+    inside  the label box fits inside its region: at the representative point, the
+            centroid, or a grid point of the bounding box
+    leader  small regions get a box on rings around the region (8 directions,
+            nearest first) and a leader line back to it (leaders=False drops them)
+    hidden  no candidate clears the labels already placed and the axes frame
+
+Placed boxes go into a uniform grid (cell = largest label), so a collision test
+only looks at the boxes in the few cells a candidate touches. Results are cached
+in datasets/cache/labels/ by a hash of the geometries, texts, font sizes,
+figure size and axes extent.
+
+Usage:
+    python analysis-code/map_labels.py      # time ~3k county labels, cold and cached
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from matplotlib.font_manager import FontProperties
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "datasets", "cache", "labels")
+
+PAD_PX = 2
+# Outside candidates: east / west first (open water on the coasts), then the diagonals, then N / S
+DIRECTIONS = np.array([(1, 0), (-1, 0), (1, -1), (1, 1), (-1, -1), (-1, 1), (0, -1), (0, 1)], dtype=np.float64)
+RINGS = (0.5, 1.5, 2.5, 3.5)  # gap between region and label, in label heights
+INSIDE_GRID = 5               # inside candidates: INSIDE_GRID x INSIDE_GRID over the bounding box
+LEADER_COLOR = '#888888'
+
+
+# --- TEXT EXTENTS ---
+def text_extents(fig, texts, size, weight='bold'):
+    """
+    (width, height) in pixels of each string. Glyph advances are measured once per
+    distinct character (a run of 8, so side bearings average out) and summed, so
+    thousands of distinct labels cost a few dozen renderer calls.
+    """
+    renderer = fig.canvas.get_renderer()
+    prop = FontProperties(size=size, weight=weight)
+
+    def measure(s):
+        return renderer.get_text_width_height_descent(s, prop, ismath=False)
+
+    advance = {c: measure(c * 8)[0] / 8 for c in set(''.join(texts))}
+    height = measure('Ag')[1]
+    return np.array([(sum(advance[c] for c in t), height if t else 0) for t in texts], dtype=np.float64).reshape(-1, 2)
+
+
+def label_boxes(ax, lines, sizes, weight='bold'):
+    """Width and height of each region's stacked label, in data units (padding included)."""
+    fig = ax.figure
+    ax.apply_aspect()
+    w = np.zeros(len(lines[0]))
+    h = np.zeros(len(lines[0]))
+    for texts, size in zip(lines, sizes):
+        ext = text_extents(fig, [str(t) for t in texts], size, weight)
+        w = np.maximum(w, ext[:, 0])
+        h += ext[:, 1]
+    inv = ax.transData.inverted()
+    (x0, y0), (x1, y1) = inv.transform([(0, 0), (1, 1)])
+    return (w + 2 * PAD_PX) * abs(x1 - x0), (h + 2 * PAD_PX) * abs(y1 - y0)
+
+
+# --- GRID INDEX ---
+def _collides(grid, box, cell):
+    x0, y0, x1, y1 = box
+    for i in range(int(x0 // cell), int(x1 // cell) + 1):
+        for j in range(int(y0 // cell), int(y1 // cell) + 1):
+            for bx0, by0, bx1, by1 in grid.get((i, j), ()):
+                if x0 < bx1 and bx0 < x1 and y0 < by1 and by0 < y1:
+                    return True
+    return False
+
+
+def _insert(grid, box, cell):
+    x0, y0, x1, y1 = box
+    for i in range(int(x0 // cell), int(x1 // cell) + 1):
+        for j in range(int(y0 // cell), int(y1 // cell) + 1):
+            grid.setdefault((i, j), []).append(box)
+
+
+# --- PLACEMENT ---
+def _cache_key(ax, geoms, lines, sizes, leaders, weight):
+    import shapely
+    h = hashlib.sha1()
+    for wkb in shapely.to_wkb(np.asarray(geoms, dtype=object)):
+        h.update(wkb)
+    h.update(json.dumps([[str(t) for t in texts] for texts in lines]).encode())
+    fig = ax.figure
+    h.update(repr((tuple(sizes), leaders, weight, PAD_PX, RINGS, INSIDE_GRID, tuple(fig.get_size_inches()), fig.dpi,
+                   tuple(ax.get_position().bounds), ax.get_xlim(), ax.get_ylim())).encode())
+    return h.hexdigest()
+
+
+def compute_placements(ax, geoms, lines, sizes, leaders=True, weight='bold'):
+    """Label boxes for each geometry (see module docstring); DataFrame in data units, one row per region."""
+    import shapely
+    geoms = np.asarray(geoms, dtype=object)
+    w, h = label_boxes(ax, lines, sizes, weight)
+    anchor = shapely.point_on_surface(geoms)
+    ax_, ay = shapely.get_x(anchor), shapely.get_y(anchor)
+    bounds = shapely.bounds(geoms)
+
+    # Inside: try the representative point, the centroid, then a grid over the bounding box
+    # (nearest the centroid first), testing every still-unplaced region at once per candidate
+    cx, cy = (bounds[:, 0] + bounds[:, 2]) / 2, (bounds[:, 1] + bounds[:, 3]) / 2
+    rx, ry = (bounds[:, 2] - bounds[:, 0]) / 2, (bounds[:, 3] - bounds[:, 1]) / 2
+    centroid = shapely.centroid(geoms)
+    gx, gy = np.meshgrid(np.linspace(-0.8, 0.8, INSIDE_GRID), np.linspace(-0.8, 0.8, INSIDE_GRID))
+    grid_order = np.argsort(gx.ravel() ** 2 + gy.ravel() ** 2, kind='stable')
+    inside_x = np.column_stack([ax_, shapely.get_x(centroid), cx[:, None] + gx.ravel()[grid_order] * rx[:, None]])
+    inside_y = np.column_stack([ay, shapely.get_y(centroid), cy[:, None] + gy.ravel()[grid_order] * ry[:, None]])
+    shapely.prepare(geoms)
+    fits = np.zeros(len(geoms), dtype=bool)
+    ix, iy = ax_.copy(), ay.copy()
+    could_fit = (w <= 2 * rx) & (h <= 2 * ry)
+    for k in range(inside_x.shape[1]):
+        todo = np.flatnonzero(could_fit & ~fits)
+        if not len(todo): break
+        px, py = inside_x[todo, k], inside_y[todo, k]
+        ok = shapely.contains(geoms[todo], shapely.box(px - w[todo] / 2, py - h[todo] / 2, px + w[todo] / 2, py + h[todo] / 2))
+        fits[todo[ok]] = True
+        ix[todo[ok]], iy[todo[ok]] = px[ok], py[ok]
+
+    # Outside candidates for the rest: (regions, rings x directions) centres, nearest ring first,
+    # and among those, candidates that cover no other region (open water, the map margin) first
+    ring = np.repeat(RINGS, len(DIRECTIONS))[None, :] * h[:, None]
+    dx, dy = np.tile(DIRECTIONS[:, 0], len(RINGS)), np.tile(DIRECTIONS[:, 1], len(RINGS))
+    ox = cx[:, None] + dx * (rx[:, None] + ring + w[:, None] / 2)
+    oy = cy[:, None] + dy * (ry[:, None] + ring + h[:, None] / 2)
+    (fx0, fx1), (fy0, fy1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+    in_frame = ((ox - w[:, None] / 2 >= fx0) & (ox + w[:, None] / 2 <= fx1)
+                & (oy - h[:, None] / 2 >= fy0) & (oy + h[:, None] / 2 <= fy1))
+    covers = np.zeros(ox.shape, dtype=bool)
+    rest = np.flatnonzero(~fits)
+    if leaders and len(rest):
+        bx, by = ox[rest].ravel(), oy[rest].ravel()
+        bw, bh = np.repeat(w[rest], ox.shape[1]) / 2, np.repeat(h[rest], ox.shape[1]) / 2
+        cand, region = shapely.STRtree(geoms).query(shapely.box(bx - bw, by - bh, bx + bw, by + bh))
+        own = rest[cand // ox.shape[1]]
+        hit = cand[region != own]
+        covers[rest[hit // ox.shape[1]], hit % ox.shape[1]] = True
+    outside_order = np.argsort(covers, axis=1, kind='stable')
+
+    x, y = ax_.copy(), ay.copy()
+    mode = np.full(len(geoms), 'hidden', dtype=object)
+    cell = max(w.max(initial=0), h.max(initial=0), 1e-12)
+    grid = {}
+    order = np.lexsort((-shapely.area(geoms), ~fits))  # fitting labels first, then by area
+    for i in order:
+        if fits[i]:
+            candidates, kind = [(ix[i], iy[i])], 'inside'
+        elif leaders:
+            o = outside_order[i][in_frame[i][outside_order[i]]]
+            candidates, kind = zip(ox[i][o].tolist(), oy[i][o].tolist()), 'leader'
+        else:
+            continue
+        hw, hh = w[i] / 2, h[i] / 2
+        for px, py in candidates:
+            box = (px - hw, py - hh, px + hw, py + hh)
+            if not _collides(grid, box, cell):
+                _insert(grid, box, cell)
+                x[i], y[i], mode[i] = px, py, kind
+                break
+
+    return pd.DataFrame({'x': x, 'y': y, 'w': w, 'h': h, 'anchor_x': ax_, 'anchor_y': ay, 'mode': mode})
+
+
+def place_labels(ax, geoms, lines, sizes, leaders=True, weight='bold', cache_dir=CACHE_DIR):
+    """compute_placements, cached on disk per geometry / text / figure-size combination."""
+    path = cache_dir and os.path.join(cache_dir, f"{_cache_key(ax, geoms, lines, sizes, leaders, weight)}.json")
+    if path and os.path.exists(path):
+        return pd.read_json(path, orient='split')
+    placements = compute_placements(ax, geoms, lines, sizes, leaders, weight)
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        placements.to_json(path, orient='split')
+    return placements
+
+
+def draw_labels(ax, placements, lines, sizes, colors=None, leader_text='#333333', weight='bold'):
+    """
+    Draw the placed labels: each line centred in its box, inside labels in `colors`
+    (one per region, e.g. contrast with the fill), leader labels in `leader_text`.
+    """
+    inv = ax.transData.inverted()
+    (_, y0), (_, y1) = inv.transform([(0, 0), (0, 1)])
+    px = abs(y1 - y0)  # data units per pixel
+    line_h = [text_extents(ax.figure, ['Ag'], size, weight)[0, 1] * px for size in sizes]
+    for i, p in enumerate(placements.itertuples()):
+        if p.mode == 'hidden':
+            continue
+        color = leader_text if p.mode == 'leader' or colors is None else colors[i]
+        if p.mode == 'leader':
+            # Leader from the region's anchor to the nearest point of the label box
+            ex = np.clip(p.anchor_x, p.x - p.w / 2, p.x + p.w / 2)
+            ey = np.clip(p.anchor_y, p.y - p.h / 2, p.y + p.h / 2)
+            ax.plot([p.anchor_x, ex], [p.anchor_y, ey], color=LEADER_COLOR, linewidth=0.6, zorder=4)
+            ax.plot(p.anchor_x, p.anchor_y, 'o', color=LEADER_COLOR, markersize=1.5, zorder=4)
+        texts = [str(t[i]) for t in lines]
+        shown = [(t, s, lh) for t, s, lh in zip(texts, sizes, line_h) if t]
+        top = p.y + sum(lh for _, _, lh in shown) / 2
+        for t, s, lh in shown:
+            ax.text(p.x, top - lh / 2, t, ha='center', va='center', fontsize=s, fontweight=weight, color=color, zorder=5)
+            top -= lh
+
+
+def main():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import shapely
+    from spatial_stats import COUNTY_GEOJSON
+
+    with open(COUNTY_GEOJSON) as f:
+        features = json.load(f)['features']
+    features = [f for f in features if str(f['id']).zfill(5)[:2] not in ('02', '15', '72')]
+    geoms = np.array([shapely.geometry.shape(f['geometry']) for f in features], dtype=object)
+    names = [str(f['id']).zfill(5) for f in features]
+    values = [f"{v:.1f}" for v in np.random.default_rng(0).gamma(4, 4, len(features))]
+
+    fig, ax = plt.subplots(figsize=(16, 10))
+    xmin, ymin, xmax, ymax = shapely.total_bounds(geoms)
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.set_aspect('equal')
+    t0 = time.perf_counter()
+    placements = compute_placements(ax, geoms, [names, values], sizes=(4, 3))
+    elapsed = time.perf_counter() - t0
+    counts = placements['mode'].value_counts()
+    print(f"{len(geoms):,} county labels placed in {elapsed * 1000:.0f} ms: "
+          + ", ".join(f"{counts.get(m, 0):,} {m}" for m in ('inside', 'leader', 'hidden')))
+
+    place_labels(ax, geoms, [names, values], sizes=(4, 3))
+    t0 = time.perf_counter()
+    place_labels(ax, geoms, [names, values], sizes=(4, 3))
+    print(f"Cached lookup (hash + read): {(time.perf_counter() - t0) * 1000:.0f} ms")
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Report build stage: assembles the publishable report from the hand-written
+narrative (reports/report.html, reports/report.md), the figures registered by
+analysis_report_v2.py (output/figures.json) and its computed headline numbers
+(output/report_stats.json).
+
+Output goes to reports/build/:
+
+    report.html   every ../output/*.png <img> becomes a <picture> with WebP and
+                  PNG srcsets at several widths, explicit width/height and lazy
+                  loading (except the first figure, which is above the fold)
+    report.md     narrative + key statistics + figure gallery (thumbnails link
+                  to the full-size image)
+    assets/       <figure>-<width>.webp / .png and a losslessly recompressed
+                  full-size <figure>.png
+
+`{{ stat_name }}` tokens in either source are replaced with values from
+report_stats.json. Assets are only regenerated when the source PNG is newer.
+
+Usage:
+    python analysis-code/analysis_report_v2.py      # figures + figures.json + report_stats.json
+    python analysis-code/report_builder.py          # -> reports/build/
+"""
+
+import html
+import json
+import os
+import re
+import shutil
+
+from PIL import Image
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+REPORTS_DIR = os.path.join(BASE_DIR, "reports")
+BUILD_DIR = os.path.join(REPORTS_DIR, "build")
+ASSET_DIR = os.path.join(BUILD_DIR, "assets")
+
+# The report column is 800 CSS px wide, so 400/800 cover phones and desktops and 1600 covers 2x screens
+WIDTHS = [400, 800, 1600]
+SIZES = "(max-width: 800px) 100vw, 800px"
+REFERENCE_WIDTH = 800   # candidate a 1x desktop browser picks; used for the page-weight estimate
+WEBP_QUALITY = 85
+
+IMG_TAG = re.compile(r'<img\s+src="\.\./output/([^"]+\.png)"\s+alt="([^"]*)"\s*/?>')
+STAT_TOKEN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+STAT_LABELS = [
+    ('first_year', "First year"),
+    ('last_year', "Last year"),
+    ('counties', "Counties"),
+    ('county_years', "County-year records"),
+    ('total_fatalities', "Total fatalities"),
+    ('total_accidents', "Total fatal crashes"),
+    ('fatality_rate', "Fatality rate (per 100k, all years)"),
+    ('fatality_rate_first', "Fatality rate, first year"),
+    ('fatality_rate_last', "Fatality rate, last year"),
+    ('fatality_rate_change_pct', "Change in fatality rate (%)"),
+    ('low_edu_fatality_rate', "Fatality rate, lowest-education quartile"),
+    ('high_edu_fatality_rate', "Fatality rate, highest-education quartile"),
+    ('edu_gap_ratio', "Education gap (low / high)"),
+    ('low_edu_drunk_rate', "Alcohol-involved crashes per 100k, lowest-education quartile"),
+    ('high_edu_drunk_rate', "Alcohol-involved crashes per 100k, highest-education quartile"),
+    ('rural_fatality_rate', "Fatality rate, rural counties"),
+    ('urban_fatality_rate', "Fatality rate, urban counties"),
+    ('drunk_pct', "Alcohol-involved crashes (%)"),
+    ('dark_pct', "Crashes in darkness (%)"),
+]
+
+
+# --- INPUTS ---
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def format_stat(value):
+    if isinstance(value, float):
+        return f"{value:,.2f}".rstrip('0').rstrip('.')
+    if isinstance(value, int) and not 1900 < value < 2100:
+        return f"{value:,}"
+    return str(value)
+
+
+def fill_stats(text, stats):
+    """Replace {{ name }} tokens; unknown names are left as-is so they stand out."""
+    return STAT_TOKEN.sub(lambda m: format_stat(stats[m.group(1)]) if m.group(1) in stats else m.group(0), text)
+
+
+# --- IMAGE ASSETS ---
+def _is_fresh(path, src_mtime):
+    return os.path.exists(path) and os.path.getmtime(path) >= src_mtime
+
+
+def _flatten(img):
+    """Drop an alpha channel that is fully opaque (lossless, and ~25% fewer bytes)."""
+    if img.mode == 'RGBA' and img.getchannel('A').getextrema() == (255, 255):
+        return img.convert('RGB')
+    return img
+
+
+def optimize_figure(src, asset_dir=ASSET_DIR, widths=WIDTHS):
+    """
+    Write the responsive variants of one figure. Returns
+    {'width', 'height', 'full': (file, bytes), 'variants': [(width, webp, webp_bytes, png, png_bytes), ...]}.
+    """
+    os.makedirs(asset_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(src))[0]
+    src_mtime = os.path.getmtime(src)
+    full = os.path.join(asset_dir, f"{stem}.png")
+
+    with Image.open(src) as original:
+        img = _flatten(original.copy())
+    w, h = img.size
+
+    if not _is_fresh(full, src_mtime):
+        img.save(full, optimize=True)
+        if os.path.getsize(full) > os.path.getsize(src):
+            shutil.copyfile(src, full)  # never ship a larger "optimised" file
+
+    variants = []
+    for width in [x for x in widths if x < w] or [w]:
+        height = round(h * width / w)
+        webp = os.path.join(asset_dir, f"{stem}-{width}.webp")
+        png = os.path.join(asset_dir, f"{stem}-{width}.png")
+        if not (_is_fresh(webp, src_mtime) and _is_fresh(png, src_mtime)):
+            small = img.resize((width, height), Image.LANCZOS) if width != w else img
+            small.save(webp, quality=WEBP_QUALITY, method=6)
+            small.save(png, optimize=True)
+        variants.append((width, os.path.basename(webp), os.path.getsize(webp),
+                         os.path.basename(png), os.path.getsize(png)))
+
+    return {'width': w, 'height': h, 'full': (os.path.basename(full), os.path.getsize(full)), 'variants': variants}
+
+
+def reference_variant(asset):
+    """The WebP candidate a browser picks for a REFERENCE_WIDTH slot at 1x."""
+    fits = [v for v in asset['variants'] if v[0] >= REFERENCE_WIDTH]
+    return fits[0] if fits else asset['variants'][-1]
+
+
+# --- HTML ---
+def picture_tag(asset, alt, lazy=True):
+    webp = ", ".join(f"assets/{v[1]} {v[0]}w" for v in asset['variants'])
+    png = ", ".join(f"assets/{v[3]} {v[0]}w" for v in asset['variants'])
+    fallback = reference_variant(asset)[3]
+    ref_w, ref_h = asset['variants'][-1][0], round(asset['height'] * asset['variants'][-1][0] / asset['width'])
+    loading = 'loading="lazy" decoding="async"' if lazy else 'fetchpriority="high"'
+    return (
+        f'<a href="assets/{asset["full"][0]}"><picture>'
+        f'<source type="image/webp" srcset="{webp}" sizes="{SIZES}">'
+        f'<img src="assets/{fallback}" srcset="{png}" sizes="{SIZES}" width="{ref_w}" height="{ref_h}" '
+        f'{loading} alt="{alt}">'
+        f'</picture></a>'
+    )
+
+
+def stats_table_html(stats):
+    rows = "".join(
+        f"<tr><td>{html.escape(label)}</td><td>{html.escape(format_stat(stats[key]))}</td></tr>"
+        for key, label in STAT_LABELS if stats.get(key) is not None
+    )
+    return f'<table class="author-table key-stats"><tbody>{rows}</tbody></table>'
+
+
+def build_html(source, figures, assets, stats):
+    """Rewrite the narrative's <img> tags and append key statistics and the remaining figures."""
+    page = fill_stats(source, stats)
+    used = []
+
+    def replace(m):
+        name = m.group(1)
+        if name not in assets:
+            return m.group(0).replace('../output/', '../../output/')  # still resolves from reports/build/
+        used.append(name)
+        return picture_tag(assets[name], m.group(2), lazy=len(used) > 1)
+
+    page = IMG_TAG.sub(replace, page)
+
+    extra = []
+    if stats:
+        extra.append('<section id="key-statistics"><h2>Key Statistics</h2>'
+                     '<p>Population-weighted figures computed by the analysis pipeline.</p>'
+                     f'{stats_table_html(stats)}</section>\n\n      <hr />\n\n      ')
+    gallery = [f for f in figures if f['file'] in assets and f['file'] not in used]
+    if gallery:
+        cards = "".join(
+            f'<figure>{picture_tag(assets[f["file"]], html.escape(f["title"] or f["file"]))}'
+            f'<figcaption>{html.escape(f["title"] or os.path.splitext(f["file"])[0])}</figcaption></figure>'
+            for f in gallery
+        )
+        extra.append(f'<section id="figure-appendix"><h2>Appendix: All Figures</h2>{cards}</section>'
+                     '\n\n      <hr />\n\n      ')
+    anchor = '<section id="resources">'
+    if extra:
+        page = page.replace(anchor, "".join(extra) + anchor, 1) if anchor in page else \
+            page.replace('</body>', "".join(extra) + '</body>', 1)
+    return page, used
+
+
+# --- MARKDOWN ---
+def build_markdown(source, figures, assets, stats):
+    parts = [fill_stats(source, stats).rstrip(), ""]
+    if stats:
+        parts += ["## Key Statistics", "", "| Statistic | Value |", "| --- | --- |"]
+        parts += [f"| {label} | {format_stat(stats[key])} |" for key, label in STAT_LABELS if stats.get(key) is not None]
+        parts.append("")
+    gallery = [f for f in figures if f['file'] in assets]
+    if gallery:
+        parts += ["## Figures", ""]
+        for f in gallery:
+            asset = assets[f['file']]
+            title = f['title'] or os.path.splitext(f['file'])[0]
+            parts += [f"[![{title}](assets/{reference_variant(asset)[3]})](assets/{asset['full'][0]})", "", f"*{title}*", ""]
+    return "\n".join(parts) + "\n"
+
+
+# --- BUILD ---
+def page_weight(page_bytes, assets, names, output_dir=OUTPUT_DIR):
+    """(original, optimised) bytes for the HTML plus one image per figure shown."""
+    original = page_bytes + sum(os.path.getsize(os.path.join(output_dir, n)) for n in names)
+    optimised = page_bytes + sum(reference_variant(assets[n])[2] for n in names)
+    return original, optimised
+
+
+def build_report(output_dir=OUTPUT_DIR, reports_dir=REPORTS_DIR, build_dir=BUILD_DIR):
+    figures = load_json(os.path.join(output_dir, "figures.json"), [])
+    stats = load_json(os.path.join(output_dir, "report_stats.json"), {})
+    with open(os.path.join(reports_dir, "report.html"), encoding='utf-8') as f:
+        html_source = f.read()
+    with open(os.path.join(reports_dir, "report.md"), encoding='utf-8') as f:
+        md_source = f.read()
+
+    # Registered figures plus anything the narrative embeds directly
+    names = [f['file'] for f in figures] + [m.group(1) for m in IMG_TAG.finditer(html_source)]
+    names = [n for n in dict.fromkeys(names) if os.path.exists(os.path.join(output_dir, n))]
+    known = {f['file'] for f in figures}
+    figures = figures + [{'file': n, 'title': ""} for n in names if n not in known]
+
+    asset_dir = os.path.join(build_dir, "assets")
+    os.makedirs(build_dir, exist_ok=True)
+    assets = {}
+    for name in names:
+        assets[name] = optimize_figure(os.path.join(output_dir, name), asset_dir)
+
+    page, used = build_html(html_source, figures, assets, stats)
+    with open(os.path.join(build_dir, "report.html"), 'w', encoding='utf-8') as f:
+        f.write(page)
+    with open(os.path.join(build_dir, "report.md"), 'w', encoding='utf-8') as f:
+        f.write(build_markdown(md_source, figures, assets, stats))
+
+    shown = [f['file'] for f in figures if f['file'] in assets]
+    original, optimised = page_weight(len(page.encode('utf-8')), assets, shown, output_dir)
+    return {'figures': len(assets), 'embedded': len(used), 'original_bytes': original, 'optimised_bytes': optimised}
+
+
+def _mb(n):
+    return f"{n / 1e6:.2f} MB"
+
+
+def main():
+    summary = build_report()
+    print(f"Built {os.path.relpath(BUILD_DIR, BASE_DIR)}/report.html and report.md "
+          f"({summary['figures']} figures, {summary['embedded']} in the narrative)")
+    if summary['original_bytes']:
+        print(f"Page weight at {REFERENCE_WIDTH}px: {_mb(summary['optimised_bytes'])} "
+              f"(full-size PNGs: {_mb(summary['original_bytes'])}, "
+              f"{100 - summary['optimised_bytes'] / summary['original_bytes'] * 100:.0f}% smaller)")
+    else:
+        print("Page weight: 0 bytes (empty narrative and no figures)")
+
+
+if __name__ == "__main__":
+    main()
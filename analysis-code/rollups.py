@@ -0,0 +1,120 @@
+"""
+Hierarchical rollups of the county-year frame (county -> state -> nation).
+
+Only additive base columns are aggregated; every rate is derived afterwards
+from the summed numerators and denominators, so a state's Fatality_Rate is
+total fatalities per 100k residents (population weighted), not the mean of
+its counties' rates.
+
+All grouping sets are built together: the finest sets are summed from the
+county-year rows once, and coarser sets are summed from those (state-year ->
+state, state-year -> year -> nation, ...). The result is cached per frame
+(and rebuilt if the frame's keys or base columns are modified in place), so
+charts and exports just look up the level they need:
+
+    rollup(df, ['State_Abbrev'])            one row per state, all years
+    rollup(df, ['Edu_Group', 'Year'])       one row per quartile per year
+    rollup(df, ['State_Abbrev', 'Edu_Group'])  one row per quartile per state
+    rollup(df)                              national totals
+
+Multi-year levels carry Years (distinct years covered) so annual averages
+such as Avg_Population = Population / Years are available.
+"""
+
+import weakref
+
+import numpy as np
+import pandas as pd
+
+BASE_COLUMNS = ['FATALS', 'ST_CASE', 'Drunk', 'Dark', 'Bad_Weather', 'Population', 'Count_Less_HS']
+
+# grouping set -> (parent grouping set, or None for the county-year rows)
+GROUPING_SETS = {
+    ('State_Abbrev', 'Year'): None,
+    ('Urbanicity', 'Year'): None,
+    ('Edu_Group', 'Year'): None,
+    ('FIPS_STR',): None,
+    ('State_Abbrev', 'Edu_Group'): None,
+    ('State_Abbrev',): ('State_Abbrev', 'Year'),
+    ('Urbanicity',): ('Urbanicity', 'Year'),
+    ('Edu_Group',): ('Edu_Group', 'Year'),
+    ('Year',): ('State_Abbrev', 'Year'),
+    (): ('Year',),
+}
+
+_cache = {}
+
+
+def derive_rates(agg):
+    """Population-weighted rates from summed base columns (same formulas as load_data)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        agg['Fatality_Rate'] = agg['FATALS'] / agg['Population'] * 100000
+        agg['Drunk_Rate_Per_100k'] = agg['Drunk'] / agg['Population'] * 100000
+        agg['Drunk_Pct'] = agg['Drunk'] / agg['ST_CASE'] * 100
+        agg['Dark_Pct'] = agg['Dark'] / agg['ST_CASE'] * 100
+        agg['Weather_Pct'] = agg['Bad_Weather'] / agg['ST_CASE'] * 100
+        agg['Pct_Less_HS'] = agg['Count_Less_HS'] / agg['Population'] * 100
+        agg['Avg_Population'] = agg['Population'] / agg['Years']
+    return agg
+
+
+def _aggregate(frame, keys, from_rows):
+    cols = [c for c in BASE_COLUMNS if c in frame.columns]
+    if not keys:
+        agg = frame[cols].sum().astype(np.float64).to_frame().T
+        agg['Years'] = frame['Year'].nunique() if 'Year' in frame else len(frame)
+        return agg
+    g = frame.groupby(list(keys), dropna=False, observed=True, sort=True)
+    agg = g[cols].sum().astype(np.float64)
+    if 'Year' in keys:
+        agg['Years'] = 1
+    elif from_rows:
+        agg['Years'] = g['Year'].nunique()
+    else:
+        # Parent has one row per (keys, Year)
+        agg['Years'] = g.size()
+    agg = agg.reset_index()
+    # Unordered categorical labels (State_Abbrev, FIPS_STR, ...) come back as plain values so a
+    # filtered level does not drag every unused category into plots; ordered ones keep their order.
+    for k in keys:
+        if isinstance(agg[k].dtype, pd.CategoricalDtype) and not agg[k].cat.ordered:
+            agg[k] = agg[k].astype(object)
+    return agg
+
+
+def build_cube(df):
+    """All grouping sets, each with base sums and derived rates."""
+    cube = {}
+    for keys, parent in GROUPING_SETS.items():
+        source = df if parent is None else cube[parent]
+        cube[keys] = _aggregate(source, keys, parent is None)
+    return {keys: derive_rates(agg) for keys, agg in cube.items()}
+
+
+def fingerprint(df):
+    """Order-independent hash of the rows' grouping keys and base columns."""
+    keys = {k for keyset in GROUPING_SETS for k in keyset} | {'Year'}
+    cols = [c for c in df.columns if c in keys or c in BASE_COLUMNS]
+    hashes = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    return len(df), tuple(cols), int(hashes.sum(dtype=np.uint64))
+
+
+def get_cube(df):
+    """Cube for `df`, built on first use and cached for the life of the frame (until its contents change)."""
+    key = id(df)
+    stamp = fingerprint(df)
+    if key not in _cache:
+        weakref.finalize(df, _cache.pop, key, None)
+    elif _cache[key][0] == stamp:
+        return _cache[key][1]
+    _cache[key] = (stamp, build_cube(df))
+    return _cache[key][1]
+
+
+def rollup(df, by=()):
+    """One grouping set of the cached cube (a copy, safe to modify)."""
+    by = tuple(by)
+    cube = get_cube(df)
+    if by not in cube:
+        raise KeyError(f"No rollup level {by}; available: {sorted(cube)}")
+    return cube[by].copy()
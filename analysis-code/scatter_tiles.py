@@ -0,0 +1,210 @@
+"""
+Multi-resolution tiles for the county-year scatter (Pct_Less_HS x Fatality_Rate).
+
+The plane is cut into a quadtree: level z has 2^z x 2^z tiles, and every tile
+is split into BINS x BINS bins. Aggregate levels store, per non-empty bin and
+Urbanicity group, the number of county-years and their mean x / y. Only the
+deepest level stores raw points; it is the first level at which no tile holds
+more than MAX_TILE_POINTS points (capped at MAX_LEVEL). An aggregate tile has
+at most BINS^2 x groups rows and a raw tile at most MAX_TILE_POINTS, so each
+file the dashboard fetches stays bounded however many county-years are added:
+more data fills bins or adds tiles, it does not grow a tile.
+
+    build_tiles(df)                       -> (manifest, {(z, tx, ty): tile})
+    write_tiles(manifest, tiles, out_dir) -> bytes written per level
+
+Tile (tx, ty) = (0, 0) is the corner at the lowest x and y.
+
+Usage:
+    python analysis-code/scatter_tiles.py     # tile sizes on synthetic panels
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+X_COL = 'Pct_Less_HS'
+Y_COL = 'Fatality_Rate'
+GROUPS = ['Rural', 'Urban']
+BINS = 32
+MAX_TILE_POINTS = 2000
+MAX_LEVEL = 8
+
+
+def nice_ceil(v, step=10):
+    """Upper extent rounded up to a multiple of `step` (at least one step)."""
+    return max(step, float(np.ceil(v / step) * step))
+
+
+def scatter_points(df):
+    """Finite county-year points as arrays: x, y, group codes and the tooltip columns."""
+    group = pd.Categorical(np.asarray(df['Urbanicity'], dtype=object), categories=GROUPS).codes
+    x = df[X_COL].to_numpy(dtype=np.float64)
+    y = df[Y_COL].to_numpy(dtype=np.float64)
+    keep = np.isfinite(x) & np.isfinite(y) & (group >= 0)
+    pop = df['Population'].to_numpy(dtype=np.float64)[keep]
+    return {
+        'x': x[keep],
+        'y': y[keep],
+        'group': group[keep].astype(np.int64),
+        'fips': np.asarray(df['FIPS_STR'], dtype=object)[keep],
+        'state': np.asarray(df['State_Abbrev'], dtype=object)[keep],
+        'year': df['Year'].to_numpy(dtype=np.int64)[keep],
+        'population': np.where(np.isfinite(pop), np.round(pop), 0).astype(np.int64),
+    }
+
+
+def grid_index(v, lo, hi, n):
+    """Cell of each value on [lo, hi] split into n cells (hi lands in the last cell)."""
+    return np.clip(((v - lo) / (hi - lo) * n).astype(np.int64), 0, n - 1)
+
+
+def _by_tile(tx, ty, side):
+    """Row order grouped by tile, plus (tile ids, split offsets) for np.split."""
+    tile = tx * side + ty
+    order = np.argsort(tile, kind='stable')
+    ids, starts = np.unique(tile[order], return_index=True)
+    return order, ids, starts[1:]
+
+
+def aggregate_level(pts, extent, z, bins=BINS):
+    """{(tx, ty): {'x', 'y', 'group', 'count'}} bin means and counts at level z."""
+    side = 1 << z
+    n = side * bins
+    gx = grid_index(pts['x'], extent[0], extent[1], n)
+    gy = grid_index(pts['y'], extent[2], extent[3], n)
+    keys, inv = np.unique((gx * n + gy) * len(GROUPS) + pts['group'], return_inverse=True)
+    count = np.bincount(inv)
+    mean_x = np.bincount(inv, weights=pts['x']) / count
+    mean_y = np.bincount(inv, weights=pts['y']) / count
+    cell, group = np.divmod(keys, len(GROUPS))
+    bx, by = np.divmod(cell, n)
+
+    order, ids, splits = _by_tile(bx // bins, by // bins, side)
+    tiles = {}
+    for tile_id, rows in zip(ids, np.split(order, splits)):
+        tiles[divmod(int(tile_id), side)] = {
+            'x': np.round(mean_x[rows], 2).tolist(),
+            'y': np.round(mean_y[rows], 2).tolist(),
+            'group': group[rows].tolist(),
+            'count': count[rows].tolist(),
+        }
+    return tiles
+
+
+def raw_level(pts, extent, z):
+    """{(tx, ty): {'x', 'y', 'group', 'fips', 'state', 'year', 'population'}} at level z."""
+    side = 1 << z
+    tx = grid_index(pts['x'], extent[0], extent[1], side)
+    ty = grid_index(pts['y'], extent[2], extent[3], side)
+    order, ids, splits = _by_tile(tx, ty, side)
+    tiles = {}
+    for tile_id, rows in zip(ids, np.split(order, splits)):
+        tiles[divmod(int(tile_id), side)] = {
+            'x': np.round(pts['x'][rows], 2).tolist(),
+            'y': np.round(pts['y'][rows], 2).tolist(),
+            'group': pts['group'][rows].tolist(),
+            'fips': pts['fips'][rows].tolist(),
+            'state': pts['state'][rows].tolist(),
+            'year': pts['year'][rows].tolist(),
+            'population': pts['population'][rows].tolist(),
+        }
+    return tiles
+
+
+def raw_depth(pts, extent, max_points=MAX_TILE_POINTS, max_level=MAX_LEVEL):
+    """Shallowest level whose fullest tile holds at most `max_points` points."""
+    for z in range(max_level + 1):
+        side = 1 << z
+        tile = (grid_index(pts['x'], extent[0], extent[1], side) * side
+                + grid_index(pts['y'], extent[2], extent[3], side))
+        if len(tile) == 0 or np.bincount(tile).max() <= max_points:
+            return z
+    return max_level
+
+
+def build_tiles(df, bins=BINS, max_points=MAX_TILE_POINTS, max_level=MAX_LEVEL):
+    """
+    All tiles for the county-year frame. Levels 0..depth-1 are aggregates and
+    level `depth` holds raw points. Returns (manifest, tiles) where tiles maps
+    (z, tx, ty) -> tile payload.
+    """
+    pts = scatter_points(df)
+    extent = [0.0, nice_ceil(pts['x'].max() if len(pts['x']) else 0),
+              0.0, nice_ceil(pts['y'].max() if len(pts['y']) else 0)]
+    depth = raw_depth(pts, extent, max_points, max_level)
+
+    tiles = {}
+    for z in range(depth):
+        for (tx, ty), payload in aggregate_level(pts, extent, z, bins).items():
+            tiles[(z, tx, ty)] = {'z': z, 'tx': tx, 'ty': ty, 'bins': payload}
+    for (tx, ty), payload in raw_level(pts, extent, depth).items():
+        tiles[(depth, tx, ty)] = {'z': depth, 'tx': tx, 'ty': ty, 'points': payload}
+
+    manifest = {
+        'x': X_COL,
+        'y': Y_COL,
+        'extent': extent,
+        'bins': bins,
+        'rawLevel': depth,
+        'groups': GROUPS,
+        'years': [int(pts['year'].min()), int(pts['year'].max())] if len(pts['year']) else [],
+        'points': int(len(pts['x'])),
+        'tiles': {str(z): sorted([tx, ty] for (lz, tx, ty) in tiles if lz == z) for z in range(depth + 1)},
+    }
+    return manifest, tiles
+
+
+def write_tiles(manifest, tiles, out_dir):
+    """
+    Replace `out_dir` with index.json plus one <z>/<tx>_<ty>.json per tile.
+    Returns {z: (tile count, total bytes, largest tile bytes)}.
+    """
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    sizes = {}
+    for (z, tx, ty), tile in tiles.items():
+        level_dir = os.path.join(out_dir, str(z))
+        os.makedirs(level_dir, exist_ok=True)
+        text = json.dumps(tile, separators=(',', ':'))
+        with open(os.path.join(level_dir, f"{tx}_{ty}.json"), 'w') as f:
+            f.write(text)
+        count, total, largest = sizes.get(z, (0, 0, 0))
+        sizes[z] = (count + 1, total + len(text), max(largest, len(text)))
+    with open(os.path.join(out_dir, 'index.json'), 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    return dict(sorted(sizes.items()))
+
+
+# --- BENCHMARK ---
+def main():
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    years = np.arange(2010, 2024)
+    for n_counties in [3_200, 32_000]:
+        n = n_counties * len(years)
+        edu = np.clip(rng.gamma(4, 3.5, n), 0, 80)
+        df = pd.DataFrame({
+            'FIPS_STR': np.repeat(np.arange(n_counties), len(years)).astype(str),
+            'State_Abbrev': 'XX',
+            'Year': np.tile(years, n_counties),
+            'Urbanicity': np.where(rng.random(n) < 0.35, 'Urban', 'Rural'),
+            'Population': rng.lognormal(10, 1.2, n),
+            X_COL: edu,
+            Y_COL: np.clip(rng.gamma(2, 6, n) + 0.4 * edu, 0, None),
+        })
+        manifest, tiles = build_tiles(df)
+        with tempfile.TemporaryDirectory() as tmp:
+            sizes = write_tiles(manifest, tiles, tmp)
+        print(f"{n:>8,} county-years  raw level {manifest['rawLevel']}")
+        for z, (count, total, largest) in sizes.items():
+            kind = 'raw' if z == manifest['rawLevel'] else 'agg'
+            print(f"   z={z} {kind}  {count:>5} tiles  total {total / 1e6:6.2f} MB  largest tile {largest / 1e3:6.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
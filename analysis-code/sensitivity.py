@@ -0,0 +1,170 @@
+"""
+Sensitivity of the headline findings to the two hard-coded groupings in
+load_data(): the 50,000-resident Urbanicity cutoff and the 4-bin pd.qcut of
+Pct_Less_HS into Edu_Group.
+
+Nothing is re-grouped per setting. County-years are sorted by Pct_Less_HS
+once, and every qcut bin of every bin count is then a contiguous slice of that
+order (pd.qcut's edges found with one searchsorted). Each row also gets its
+"urban level": the number of thresholds its population reaches. A single
+np.bincount over (slice segment, urban level) followed by two cumulative sums
+gives the sums of every bin, within rural / urban / all counties, for every
+threshold at once. Rates are population-weighted from those sums, as in
+rollups.
+
+    s = sweep(df)
+    s['edu_bins']           gap between the lowest- and highest-education bin, per bin count
+    s['urban_threshold']    rural vs urban rates, per cutoff
+    s['rural_edu_gap']      the "rural, low-education" gap, cutoff x bin count
+
+Usage:
+    python analysis-code/sensitivity.py      # timed sweep; writes output/SENSITIVITY_*.csv
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+
+# rate -> numerator column (per 100k residents)
+MEASURES = {'Fatality_Rate': 'FATALS', 'Drunk_Rate_Per_100k': 'Drunk'}
+EDU_BINS = 4
+URBAN_CUTOFF = 50_000
+BINS = range(2, 51)
+THRESHOLDS = np.union1d(np.round(np.geomspace(2_500, 1_000_000, 300), -2), [URBAN_CUTOFF])
+
+
+def qcut_positions(sorted_values, k):
+    """
+    Offsets (last = n) of pd.qcut's k bins over ascending values. Repeated edges are dropped
+    as pd.qcut(..., duplicates='drop') drops them, so ties can leave fewer than k bins.
+    """
+    edges = np.unique(np.quantile(sorted_values, np.linspace(0, 1, k + 1)))
+    pos = np.searchsorted(sorted_values, edges, side='right')
+    pos[0] = 0
+    return pos
+
+
+def _segment_sums(df, bins, thresholds):
+    """
+    Prefix sums over the Pct_Less_HS order at every bin boundary, split by urban level.
+    Returns (positions per bin count, boundary offsets, {column: (boundaries x levels) prefix sums}).
+    """
+    order = np.argsort(df['Pct_Less_HS'].to_numpy(np.float64), kind='stable')
+    x = df['Pct_Less_HS'].to_numpy(np.float64)[order]
+    pop = df['Population'].to_numpy(np.float64)[order]
+    positions = {k: qcut_positions(x, k) for k in bins}
+    cuts = np.unique(np.concatenate(list(positions.values())))
+
+    seg = np.searchsorted(cuts, np.arange(len(x)), side='right') - 1
+    level = np.searchsorted(thresholds, pop, side='right')  # urban for thresholds[:level]
+    n_seg, n_lev = len(cuts) - 1, len(thresholds) + 1
+    key = seg * n_lev + level
+
+    columns = {'n': np.ones(len(x)), 'Population': pop}
+    columns.update({c: df[c].to_numpy(np.float64)[order] for c in MEASURES.values()})
+    prefix = {}
+    for name, values in columns.items():
+        sums = np.bincount(key, weights=values, minlength=n_seg * n_lev).reshape(n_seg, n_lev)
+        prefix[name] = np.vstack([np.zeros((1, n_lev)), sums.cumsum(axis=0)])
+    return positions, cuts, prefix
+
+
+def _rate(num, pop):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return num / pop * 100000
+
+
+def sweep(df, bins=BINS, thresholds=THRESHOLDS):
+    """Stability tables of the education gap and the rural / urban gap (see module docstring)."""
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    positions, cuts, prefix = _segment_sums(df, bins, thresholds)
+    # Sums by boundary: rural at threshold t = levels 0..t, over all levels = every county
+    rural = {c: p.cumsum(axis=1)[:, :len(thresholds)] for c, p in prefix.items()}
+    total = {c: p.sum(axis=1) for c, p in prefix.items()}
+
+    edu_rows, gap = [], {}
+    for k, pos in positions.items():
+        lo, hi = np.searchsorted(cuts, pos[[0, 1]]), np.searchsorted(cuts, pos[[-2, -1]])
+        bottom = {c: t[lo[1]] - t[lo[0]] for c, t in total.items()}
+        top = {c: t[hi[1]] - t[hi[0]] for c, t in total.items()}
+        row = {'Bins': k, 'Rows_Per_Bin': len(df) / k}
+        for rate, num in MEASURES.items():
+            row[f'{rate}_High_Edu'] = _rate(bottom[num], bottom['Population'])
+            row[f'{rate}_Low_Edu'] = _rate(top[num], top['Population'])
+            row[f'{rate}_Ratio'] = row[f'{rate}_Low_Edu'] / row[f'{rate}_High_Edu']
+        edu_rows.append(row)
+        rb = {c: r[lo[1]] - r[lo[0]] for c, r in rural.items()}
+        rt = {c: r[hi[1]] - r[hi[0]] for c, r in rural.items()}
+        gap[k] = _rate(rt['FATALS'], rt['Population']) / _rate(rb['FATALS'], rb['Population'])
+
+    r_all = {c: r[-1] for c, r in rural.items()}
+    t_all = {c: t[-1] for c, t in total.items()}
+    urban = pd.DataFrame({'Threshold': thresholds, 'Rural_Share': r_all['n'] / t_all['n']})
+    for rate, num in MEASURES.items():
+        urban[f'{rate}_Rural'] = _rate(r_all[num], r_all['Population'])
+        urban[f'{rate}_Urban'] = _rate(t_all[num] - r_all[num], t_all['Population'] - r_all['Population'])
+        urban[f'{rate}_Ratio'] = urban[f'{rate}_Rural'] / urban[f'{rate}_Urban']
+
+    return {
+        'edu_bins': pd.DataFrame(edu_rows),
+        'urban_threshold': urban,
+        'rural_edu_gap': pd.DataFrame(gap, index=pd.Index(thresholds, name='Threshold')).rename_axis(columns='Bins'),
+    }
+
+
+def _rate_ratio(groups, a, b):
+    """Fatality rate of group `a` over that of group `b` (rows of a FATALS / Population sum)."""
+    rate = groups['FATALS'] / groups['Population']
+    return rate[a] / rate[b]
+
+
+def check(df, k=EDU_BINS, threshold=URBAN_CUTOFF):
+    """The same numbers by brute force (pd.qcut + groupby) for one setting, to compare with sweep()."""
+    pop = df['Population'].to_numpy(np.float64)
+    frame = pd.DataFrame({'bin': pd.qcut(df['Pct_Less_HS'].to_numpy(np.float64), k, labels=False, duplicates='drop'),
+                          'rural': pop < threshold, 'Population': pop, 'FATALS': df['FATALS'].to_numpy(np.float64)})
+    edu = frame.groupby('bin')[['FATALS', 'Population']].sum()
+    rural_edu = frame[frame['rural']].groupby('bin')[['FATALS', 'Population']].sum()
+    urb = frame.groupby('rural')[['FATALS', 'Population']].sum()
+    return {'edu_ratio': _rate_ratio(edu, edu.index[-1], edu.index[0]),
+            'rural_edu_ratio': _rate_ratio(rural_edu, rural_edu.index[-1], rural_edu.index[0]),
+            'rural_urban_ratio': _rate_ratio(urb, True, False)}
+
+
+def main():
+    from ingest import load_data
+    df, _ = load_data()
+    t0 = time.perf_counter()
+    s = sweep(df)
+    elapsed = time.perf_counter() - t0
+    n_settings = len(BINS) * len(THRESHOLDS)
+    print(f"Swept {len(BINS)} bin counts x {len(THRESHOLDS)} cutoffs ({n_settings:,} settings) "
+          f"over {len(df):,} county-years in {elapsed * 1000:.0f} ms")
+
+    brute = check(df)
+    edu = s['edu_bins'].set_index('Bins').loc[EDU_BINS]
+    urban = s['urban_threshold'].set_index('Threshold')
+    print(f"Check at {EDU_BINS} bins, {URBAN_CUTOFF:,} cutoff (sweep / groupby): "
+          f"edu gap {edu['Fatality_Rate_Ratio']:.4f} / {brute['edu_ratio']:.4f}, "
+          f"rural edu gap {s['rural_edu_gap'].loc[URBAN_CUTOFF, EDU_BINS]:.4f} / {brute['rural_edu_ratio']:.4f}, "
+          f"rural/urban {urban.loc[URBAN_CUTOFF, 'Fatality_Rate_Ratio']:.4f} / {brute['rural_urban_ratio']:.4f}")
+
+    ratio = s['edu_bins']['Fatality_Rate_Ratio']
+    print(f"Low/high education fatality ratio: {ratio.min():.2f}x to {ratio.max():.2f}x over {BINS.start}-{BINS.stop - 1} bins")
+    ratio = urban['Fatality_Rate_Ratio']
+    print(f"Rural/urban fatality ratio: {ratio.min():.2f}x to {ratio.max():.2f}x over cutoffs "
+          f"{int(THRESHOLDS[0]):,}-{int(THRESHOLDS[-1]):,}")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for name, table in s.items():
+        table.to_csv(os.path.join(OUTPUT_DIR, f"SENSITIVITY_{name.upper()}.csv"), index=name == 'rural_edu_gap')
+    print(f"Saved {OUTPUT_DIR}/SENSITIVITY_*.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+"Similar counties": nearest neighbors over standardized county risk profiles.
+
+Each county (all years pooled, rates from the rollup cube) is described by
+the profile the clustering and feature-importance charts work with:
+
+    Pct_Less_HS     education
+    Log_Population  rurality (log10 of the average annual population)
+    Drunk_Pct       alcohol (% of crashes with a drunk driver)
+    Dark_Pct        darkness (% of crashes in the dark)
+
+Fatality_Rate is deliberately left out, so the neighbors of a county are
+counties that look like it, and their outcomes can be compared with its own.
+Features are z-scored (the StandardScaler step of the clustering), indexed
+in a KD-tree, and the top-k neighbors of every county are found in one
+batched query. prepare_data.py exports them as flat arrays for the
+dashboard's county drill-down (similar_counties.json).
+
+Usage:
+    python analysis-code/similar_counties.py                # timed index build, all-county k-NN and lookups
+    python analysis-code/similar_counties.py 06037 -k 15   # the counties most similar to one county
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from rollups import rollup
+
+FEATURES = ['Pct_Less_HS', 'Log_Population', 'Drunk_Pct', 'Dark_Pct']
+K = 10
+
+
+# --- PROFILES ---
+def county_profiles(df):
+    """One row per county (indexed by FIPS_STR): the FEATURES plus State_Abbrev, Population and Fatality_Rate."""
+    counties = rollup(df, ['FIPS_STR']).set_index('FIPS_STR')
+    counties['Population'] = counties['Avg_Population']
+    with np.errstate(divide='ignore'):
+        counties['Log_Population'] = np.log10(counties['Population'])
+    counties['State_Abbrev'] = df.drop_duplicates('FIPS_STR').set_index('FIPS_STR')['State_Abbrev']
+    counties = counties[FEATURES + ['State_Abbrev', 'Population', 'Fatality_Rate']]
+    # Counties without crashes have no Drunk_Pct / Dark_Pct and no profile
+    return counties[np.isfinite(counties[FEATURES].to_numpy(np.float64)).all(axis=1)].sort_index()
+
+
+def standardize(values):
+    """Z-scores per column: (z, mean, std); constant columns are left centered at 0."""
+    values = np.asarray(values, dtype=np.float64)
+    mean, std = values.mean(axis=0), values.std(axis=0)
+    std[std == 0] = 1
+    return (values - mean) / std, mean, std
+
+
+# --- INDEX ---
+def build_index(profiles):
+    """KD-tree over the standardized profiles: dict of fips, z, mean, std, tree."""
+    from scipy.spatial import cKDTree
+    z, mean, std = standardize(profiles[FEATURES])
+    return {'fips': profiles.index.to_numpy(dtype=str), 'z': z, 'mean': mean, 'std': std, 'tree': cKDTree(z)}
+
+
+def all_neighbors(index, k=K):
+    """
+    Top-k neighbors of every county, nearest first, excluding the county itself:
+    (int32 row indices into index['fips'], float32 distances in standard deviations), both n x k.
+    """
+    n = len(index['fips'])
+    k = min(k, n - 1)
+    dist, idx = index['tree'].query(index['z'], k=k + 1)
+    # Drop each row's own entry (usually column 0, but exact duplicates can come first)
+    own = idx == np.arange(n)[:, None]
+    own[~own.any(axis=1), -1] = True
+    keep = ~own
+    return idx[keep].reshape(n, k).astype(np.int32), dist[keep].reshape(n, k).astype(np.float32)
+
+
+def similar_to(index, fips, k=K):
+    """(FIPS, distance) of the k counties most similar to `fips`, nearest first."""
+    row = np.flatnonzero(index['fips'] == fips)
+    if not len(row):
+        raise KeyError(f"No profile for county {fips}")
+    dist, idx = index['tree'].query(index['z'][row[0]], k=min(k, len(index['fips']) - 1) + 1)
+    keep = idx != row[0]
+    return index['fips'][idx[keep][:k]], dist[keep][:k]
+
+
+# --- EXPORT ---
+def export_neighbors(index, idx, dist, path, decimals=2):
+    """
+    Compact JSON for the dashboard: the county list once, then neighbors as flat
+    row-major n x k arrays of positions in that list (and distances).
+    """
+    payload = {
+        'features': FEATURES,
+        'mean': np.round(index['mean'], 4).tolist(),
+        'std': np.round(index['std'], 4).tolist(),
+        'k': int(idx.shape[1]),
+        'fips': index['fips'].tolist(),
+        'neighbors': idx.ravel().tolist(),
+        'distance': np.round(dist.ravel().astype(np.float64), decimals).tolist(),
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('fips', nargs='?', help="county FIPS (e.g. 06037); omit to benchmark")
+    parser.add_argument('-k', type=int, default=K, help=f"number of neighbors (default {K})")
+    args = parser.parse_args()
+
+    from ingest import load_data
+    df, _ = load_data()
+    profiles = county_profiles(df)
+    t0 = time.perf_counter()
+    index = build_index(profiles)
+    t1 = time.perf_counter()
+
+    if args.fips:
+        fips, dist = similar_to(index, args.fips.zfill(5), args.k)
+        table = profiles.loc[[args.fips.zfill(5)] + list(fips)].copy()
+        table.insert(0, 'Distance', np.concatenate([[0.0], dist]))
+        table['Population'] = table['Population'].round(0).astype(int)
+        print(f"Counties most similar to {args.fips.zfill(5)} (distance in standard deviations over {', '.join(FEATURES)}):")
+        with pd.option_context('display.width', 160, 'display.float_format', '{:.2f}'.format):
+            print(table.to_string())
+        return
+
+    idx, dist = all_neighbors(index, args.k)
+    t2 = time.perf_counter()
+    sample = index['fips'][np.random.default_rng(0).integers(0, len(index['fips']), 1000)]
+    t3 = time.perf_counter()
+    for f in sample:
+        similar_to(index, f, args.k)
+    per_query = (time.perf_counter() - t3) / len(sample)
+    print(f"{len(profiles):,} county profiles: index built in {(t1 - t0) * 1000:.1f} ms, "
+          f"top-{idx.shape[1]} for every county in {(t2 - t1) * 1000:.1f} ms, "
+          f"single lookup {per_query * 1000:.3f} ms")
+    print(f"Median distance to the nearest / {idx.shape[1]}th neighbor: "
+          f"{np.median(dist[:, 0]):.2f} / {np.median(dist[:, -1]):.2f} standard deviations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Mergeable summaries of a column, so global statistics can be computed from
+partitions (years, states, shards on other machines) without concatenating
+them first.
+
+    moments    count, mean, M2 (sum of squared deviations), min, max.
+               Two-pass within a partition, then Chan et al.'s pairwise form
+               of Welford's update between partitions: merges are exact up
+               to float rounding.
+    KLL        quantile sketch (Karnin, Lang & Liberty). Items live in levels;
+               an item at level h stands for 2**h values. A full level is
+               sorted and every other item (random offset) promoted, which
+               moves any rank by at most 2**h. The sketch adds that up in
+               'error_bound', a guaranteed bound on the rank error of every
+               quantile (the typical error is far smaller, since the shifts
+               have random signs). Until the first compaction, quantiles are
+               exact. The offsets come from a seeded generator, so equal
+               inputs give equal sketches. k=None never compacts: the sketch
+               keeps every value and its quantiles are exact, for data that
+               fits in memory but still arrives in partitions.
+
+Summaries are plain dicts of numbers and arrays:
+
+    parts = [column_summary(chunk['Pct_Less_HS']) for chunk in chunks]
+    total = merge_summaries(*parts)
+    edges = quantile_edges(total, 4)    # pd.qcut's bin edges, within total['kll']['error_bound'] ranks
+                                        # (exactly pd.qcut's with column_summary(..., k=None))
+
+Usage:
+    python analysis-code/sketches.py      # sharded vs whole-frame statistics and Edu_Group vs pd.qcut
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+KLL_K = 2048
+KLL_C = 2 / 3   # capacity ratio between consecutive levels
+KLL_SEED = 0
+
+
+# --- MOMENTS ---
+def moments(values):
+    """Count, mean, M2, min and max of the finite values."""
+    v = np.asarray(values, dtype=np.float64)
+    v = v[np.isfinite(v)]
+    if not len(v):
+        return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf}
+    mean = v.mean()
+    return {'count': len(v), 'mean': float(mean), 'm2': float(((v - mean) ** 2).sum()),
+            'min': float(v.min()), 'max': float(v.max())}
+
+
+def merge_moments(a, b):
+    """Moments of the union of two partitions (Chan et al.)."""
+    n = a['count'] + b['count']
+    if not n:
+        return dict(a)
+    delta = b['mean'] - a['mean']
+    return {
+        'count': n,
+        'mean': a['mean'] + delta * b['count'] / n,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / n,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+    }
+
+
+def variance(m, ddof=1):
+    return m['m2'] / (m['count'] - ddof) if m['count'] > ddof else np.nan
+
+
+# --- KLL SKETCH ---
+def kll_sketch(values=(), k=KLL_K, seed=KLL_SEED):
+    """Sketch of the finite values (k=None: keep them all, exact)."""
+    sketch = {'k': k, 'seed': seed, 'n': 0, 'compactions': 0, 'error_bound': 0,
+              'min': np.inf, 'max': -np.inf, 'levels': [np.empty(0)]}
+    return kll_update(sketch, values)
+
+
+def _capacity(sketch, h):
+    depth = len(sketch['levels']) - 1 - h
+    return max(2, int(np.ceil(sketch['k'] * KLL_C ** depth)))
+
+
+def _compress(sketch):
+    """Compact the lowest over-full level until the sketch fits its capacity."""
+    if sketch['k'] is None:
+        return sketch
+    levels = sketch['levels']
+    while sum(len(lv) for lv in levels) > sum(_capacity(sketch, h) for h in range(len(levels))):
+        h = next(h for h in range(len(levels)) if len(levels[h]) > _capacity(sketch, h))
+        if h + 1 == len(levels):
+            levels.append(np.empty(0))
+        items = np.sort(levels[h])
+        # An odd item out stays behind; the rest pair up and one of each pair is promoted
+        keep, items = items[:len(items) % 2], items[len(items) % 2:]
+        offset = np.random.default_rng([sketch['seed'], sketch['compactions']]).integers(2)
+        levels[h + 1] = np.concatenate([levels[h + 1], items[offset::2]])
+        levels[h] = keep
+        sketch['compactions'] += 1
+        sketch['error_bound'] += 2 ** h
+    return sketch
+
+
+def kll_update(sketch, values):
+    """Add a batch of values (NaN / inf are skipped) to `sketch` in place; returns it."""
+    v = np.asarray(values, dtype=np.float64).ravel()
+    v = v[np.isfinite(v)]
+    if not len(v):
+        return sketch
+    sketch['n'] += len(v)
+    sketch['min'] = min(sketch['min'], float(v.min()))
+    sketch['max'] = max(sketch['max'], float(v.max()))
+    sketch['levels'][0] = np.concatenate([sketch['levels'][0], v])
+    return _compress(sketch)
+
+
+def _pad(levels, depth):
+    return levels + [np.empty(0)] * (depth - len(levels))
+
+
+def kll_merge(a, b):
+    """Sketch of the union of two sketches' inputs (same k); the error bounds add up."""
+    if a['k'] != b['k']:
+        raise ValueError(f"Cannot merge KLL sketches with k={a['k']} and k={b['k']}")
+    depth = max(len(a['levels']), len(b['levels']))
+    merged = {
+        'k': a['k'], 'seed': a['seed'], 'n': a['n'] + b['n'],
+        'compactions': a['compactions'] + b['compactions'],
+        'error_bound': a['error_bound'] + b['error_bound'],
+        'min': min(a['min'], b['min']), 'max': max(a['max'], b['max']),
+        'levels': [np.concatenate([x, y]) for x, y in zip(_pad(a['levels'], depth), _pad(b['levels'], depth))],
+    }
+    return _compress(merged)
+
+
+def kll_quantiles(sketch, qs):
+    """
+    Quantiles with np.quantile's linear interpolation, reading each retained item
+    as 2**level copies of itself; the ends are the exact min / max.
+    """
+    qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+    if not sketch['n']:
+        return np.full(len(qs), np.nan)
+    items = np.concatenate(sketch['levels'])
+    weights = np.concatenate([np.full(len(lv), 2 ** h, dtype=np.int64) for h, lv in enumerate(sketch['levels'])])
+    order = np.argsort(items, kind='stable')
+    items, ends = items[order], np.cumsum(weights[order])  # item i covers ranks [ends[i-1], ends[i])
+    n = ends[-1]
+    pos = qs * (n - 1)
+    lo, hi = np.floor(pos).astype(np.int64), np.ceil(pos).astype(np.int64)
+    at_lo, at_hi = (items[np.minimum(np.searchsorted(ends, r, side='right'), len(items) - 1)] for r in (lo, hi))
+    out = at_lo + (at_hi - at_lo) * (pos - lo)
+    out[qs <= 0] = sketch['min']
+    out[qs >= 1] = sketch['max']
+    return out
+
+
+# --- COLUMN SUMMARIES ---
+def column_summary(values, k=KLL_K):
+    """Mergeable summary of one partition of a column: {'moments', 'kll'} (k=None: exact quantiles)."""
+    return {'moments': moments(values), 'kll': kll_sketch(values, k)}
+
+
+def merge_summaries(*summaries):
+    out = summaries[0]
+    for s in summaries[1:]:
+        out = {'moments': merge_moments(out['moments'], s['moments']), 'kll': kll_merge(out['kll'], s['kll'])}
+    return out
+
+
+def quantile_edges(summary, bins):
+    """pd.qcut's `bins` equal-count edges (including its round-up of non-representable quantiles)."""
+    qs = np.linspace(0, 1, bins + 1)
+    np.putmask(qs, bins * qs != np.arange(bins + 1), np.nextafter(qs, 1))
+    return kll_quantiles(summary['kll'], qs)
+
+
+def cut_by_edges(values, edges, labels):
+    """Bin values on precomputed edges the way pd.qcut bins them (right-closed, lowest edge included)."""
+    return pd.cut(values, edges, labels=labels, include_lowest=True)
+
+
+def rank_error(sorted_values, edges, qs):
+    """
+    How far, in ranks, each edge is from its quantile: the distance from the target rank
+    qs * n to the ranks the edge value occupies ([left, right) of searchsorted, so ties count).
+    """
+    target = np.asarray(qs, dtype=np.float64) * len(sorted_values)
+    left = np.searchsorted(sorted_values, edges, side='left')
+    right = np.searchsorted(sorted_values, edges, side='right')
+    return np.maximum(np.maximum(left - target, target - right), 0)
+
+
+# --- BENCHMARK ---
+def main():
+    from ingest import load_data, EDU_LABELS
+    df, _ = load_data()
+    x = df['Pct_Less_HS'].to_numpy(np.float64)
+    reference = pd.qcut(x, 4, labels=EDU_LABELS)
+
+    for name, key, k in [('year', df['Year'], KLL_K), ('state', df['State_Abbrev'], KLL_K),
+                         ('row shard', np.arange(len(df)) % 64, KLL_K), ('exact year', df['Year'], None)]:
+        t0 = time.perf_counter()
+        parts = [column_summary(g, k) for _, g in pd.Series(x).groupby(np.asarray(key), dropna=False)]
+        total = merge_summaries(*parts)
+        elapsed = time.perf_counter() - t0
+        m, sk = total['moments'], total['kll']
+        edges = quantile_edges(total, 4)
+        groups = cut_by_edges(x, edges, EDU_LABELS)
+        exact = np.quantile(x, [0.25, 0.5, 0.75])
+        rank_err = rank_error(np.sort(x), edges[1:-1], [0.25, 0.5, 0.75]).max()
+        print(f"{len(parts):>3} {name} partitions merged in {elapsed * 1000:5.0f} ms "
+              f"({sum(len(lv) for lv in sk['levels']):,} items kept for {sk['n']:,} values)")
+        print(f"    mean {m['mean']:.6f} vs {x.mean():.6f}, var {variance(m):.6f} vs {x.var(ddof=1):.6f}, "
+              f"count {m['count']:,} vs {len(x):,}")
+        print(f"    quartile edges {np.round(edges[1:-1], 3)} vs {np.round(exact, 3)}: rank error {rank_err:.0f} "
+              f"(bound {sk['error_bound']:,} = {sk['error_bound'] / sk['n'] * 100:.2f}%)")
+        print(f"    Edu_Group differs from pd.qcut for {(groups != reference).sum():,} of {len(x):,} county-years")
+
+
+if __name__ == "__main__":
+    main()
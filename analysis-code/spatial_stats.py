@@ -0,0 +1,207 @@
+"""
+County spatial statistics: queen-contiguity weights, global Moran's I and LISA.
+
+Weights are built from the county polygons shipped with the dashboard
+(dashboard/public/data/counties-fips.json) with a single bulk STRtree query,
+stored as a sparse CSR matrix and cached to datasets/cache/county_weights_*.npz
+(one file per GeoJSON path, rebuilt when the file's contents change).
+
+Permutation inference is vectorised: permutations are generated in batches and
+pushed through one sparse x dense product per batch, so 999 permutations over
+~3k counties take well under a second.
+
+Usage:
+    python analysis-code/spatial_stats.py      # weights build + permutation timing
+"""
+
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from rollups import rollup
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "datasets")
+COUNTY_GEOJSON = os.path.join(BASE_DIR, "dashboard", "public", "data", "counties-fips.json")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+PERMUTATIONS = 999
+BATCH = 128
+ALPHA = 0.05
+
+QUADRANTS = {1: 'High-High', 2: 'Low-High', 3: 'Low-Low', 4: 'High-Low'}
+NOT_SIGNIFICANT = 'Not significant'
+NO_NEIGHBORS = 'No neighbors'
+
+
+# --- WEIGHTS ---
+def _build_contiguity(geojson_path):
+    import shapely
+    from shapely import STRtree
+
+    with open(geojson_path) as f:
+        features = json.load(f)['features']
+    fips = np.array([str(f['id']).zfill(5) for f in features])
+    geoms = np.array([shapely.geometry.shape(f['geometry']) for f in features], dtype=object)
+
+    # Queen contiguity: any shared boundary point counts as a neighbour
+    left, right = STRtree(geoms).query(geoms, predicate='intersects')
+    keep = left != right
+    n = len(fips)
+    w = sparse.csr_matrix((np.ones(keep.sum()), (left[keep], right[keep])), shape=(n, n))
+    w.data[:] = 1.0  # collapse any duplicate pairs
+    return fips, w
+
+
+@lru_cache(maxsize=None)
+def county_weights(geojson_path=COUNTY_GEOJSON, cache_dir=None):
+    """Binary queen-contiguity matrix (CSR) and the FIPS code of each row."""
+    cache_dir = cache_dir or CACHE_DIR
+    path_key = hashlib.sha1(os.path.abspath(geojson_path).encode()).hexdigest()[:12]
+    cache = os.path.join(cache_dir, f"county_weights_{path_key}.npz")
+    with open(geojson_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    if os.path.exists(cache):
+        z = np.load(cache, allow_pickle=False)
+        if str(z['sha256']) == digest:
+            w = sparse.csr_matrix((z['data'], z['indices'], z['indptr']), shape=tuple(z['shape']))
+            return z['fips'], w
+
+    fips, w = _build_contiguity(geojson_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez_compressed(cache, fips=fips, data=w.data, indices=w.indices, indptr=w.indptr,
+                        shape=np.array(w.shape), sha256=digest)
+    return fips, w
+
+
+def align_weights(values, geojson_path=COUNTY_GEOJSON):
+    """
+    Subset the contiguity matrix to the counties in `values` (a Series indexed by
+    FIPS_STR, NaNs dropped) and row-standardise it. Returns (y, W) in matching order.
+    """
+    fips, w = county_weights(geojson_path)
+    values = values.dropna()
+    pos = pd.Series(np.arange(len(fips)), index=fips)
+    common = values.index.intersection(pos.index)
+    idx = pos[common].values
+    w = w[idx][:, idx].tocsr()
+    deg = np.asarray(w.sum(axis=1)).ravel()
+    inv = np.divide(1.0, deg, out=np.zeros_like(deg), where=deg > 0)
+    w = sparse.diags(inv) @ w
+    return values[common], w.tocsr()
+
+
+# --- GLOBAL MORAN'S I ---
+def morans_i(y, w, permutations=PERMUTATIONS, seed=42):
+    """Global Moran's I with a batched permutation pseudo p-value (folded, as in PySAL)."""
+    z = np.asarray(y, dtype=np.float64)
+    z = z - z.mean()
+    n = len(z)
+    s0 = w.sum()
+    if not z @ z > 0:
+        # A constant column has no spatial pattern to test
+        return {'I': np.nan, 'EI': -1 / (n - 1), 'p_sim': 1.0, 'sims': np.full(permutations, np.nan)}
+    i_obs = n / s0 * (z @ (w @ z)) / (z @ z)
+
+    rng = np.random.default_rng(seed)
+    sims = np.empty(permutations)
+    for start in range(0, permutations, BATCH):
+        k = min(BATCH, permutations - start)
+        # Each column is an independent permutation of z
+        zp = z[rng.permuted(np.tile(np.arange(n), (k, 1)), axis=1)].T
+        sims[start:start + k] = n / s0 * np.einsum('ij,ij->j', zp, w @ zp) / (z @ z)
+
+    larger = (sims >= i_obs).sum()
+    larger = min(larger, permutations - larger)
+    return {'I': i_obs, 'EI': -1 / (n - 1), 'p_sim': (larger + 1) / (permutations + 1), 'sims': sims}
+
+
+# --- LOCAL MORAN (LISA) ---
+def local_morans(y, w, permutations=PERMUTATIONS, seed=42, alpha=ALPHA):
+    """
+    Local Moran's I_i with conditional permutation inference.
+    For each county the neighbour values are redrawn from all other counties
+    (with replacement, which is indistinguishable from without at n ~ 3k) and
+    the lag recomputed; all counties and a whole batch of permutations are
+    evaluated at once.
+    Returns a DataFrame indexed like `y` with Is, lag, p_sim, quadrant and cluster.
+    """
+    values = y
+    z = np.asarray(y, dtype=np.float64)
+    sd = z.std()
+    # A constant column is left at z = 0 and reported as not significant everywhere
+    z = (z - z.mean()) / sd if sd > 0 else np.zeros_like(z)
+    n = len(z)
+    lag = w @ z
+    i_obs = z * lag
+
+    w = w.tocsr()
+    k = np.diff(w.indptr)
+    kmax = int(k.max()) if n else 0
+    # Row-standardised weights are 1/k_i; pad to kmax so draws are rectangular
+    slot_w = np.where(np.arange(kmax)[None, :] < k[:, None], 1.0 / np.maximum(k, 1)[:, None], 0.0)
+
+    rng = np.random.default_rng(seed)
+    larger = np.zeros(n, dtype=np.int64)
+    for start in range(0, permutations, BATCH):
+        b = min(BATCH, permutations - start)
+        # Draw from the n-1 other counties: shift indices >= i up by one to skip self
+        draws = rng.integers(0, n - 1, size=(b, n, kmax))
+        draws += draws >= np.arange(n)[None, :, None]
+        lag_sim = (z[draws] * slot_w[None]).sum(axis=2)
+        larger += (z[None, :] * lag_sim >= i_obs[None, :]).sum(axis=0)
+
+    larger = np.minimum(larger, permutations - larger)
+    p_sim = (larger + 1) / (permutations + 1) if sd > 0 else np.ones(n)
+
+    quadrant = np.select([(z > 0) & (lag > 0), (z <= 0) & (lag > 0), (z <= 0) & (lag <= 0)], [1, 2, 3], 4)
+    cluster = np.where(p_sim < alpha, pd.Series(quadrant).map(QUADRANTS).values, NOT_SIGNIFICANT)
+    cluster = np.where(k == 0, NO_NEIGHBORS, cluster)
+    return pd.DataFrame({'Is': i_obs, 'lag': lag, 'p_sim': p_sim, 'quadrant': quadrant, 'cluster': cluster},
+                        index=values.index)
+
+
+def county_lisa(df, columns=('Fatality_Rate', 'Pct_Less_HS'), permutations=PERMUTATIONS, geojson_path=COUNTY_GEOJSON):
+    """
+    Moran's I and LISA clusters for each column on the county rollup (rates from the
+    summed counts over all years, the values county_scatter.json and the maps show).
+    """
+    county = rollup(df, ['FIPS_STR']).set_index('FIPS_STR')
+    global_stats, clusters = {}, {}
+    for col in columns:
+        y, w = align_weights(county[col], geojson_path)
+        global_stats[col] = morans_i(y.values, w, permutations)
+        clusters[col] = local_morans(y, w, permutations)
+    return global_stats, clusters
+
+
+# --- BENCHMARK ---
+def main():
+    t0 = time.perf_counter()
+    _build_contiguity(COUNTY_GEOJSON)
+    print(f"Contiguity build: {time.perf_counter() - t0:.2f}s")
+
+    fips, _ = county_weights()
+    rng = np.random.default_rng(0)
+    y = pd.Series(rng.normal(size=len(fips)), index=fips)
+    y, w = align_weights(y)
+    print(f"Counties: {len(y)}, mean neighbours: {w.nnz / len(y):.1f}")
+
+    t0 = time.perf_counter()
+    g = morans_i(y.values, w)
+    print(f"Global Moran's I ({PERMUTATIONS} perms): {time.perf_counter() - t0:.2f}s  I={g['I']:.4f} p={g['p_sim']:.3f}")
+
+    t0 = time.perf_counter()
+    lisa = local_morans(y, w)
+    print(f"LISA ({PERMUTATIONS} perms): {time.perf_counter() - t0:.2f}s  "
+          f"significant={int((lisa['p_sim'] < ALPHA).sum())}")
+
+
+if __name__ == "__main__":
+    main()
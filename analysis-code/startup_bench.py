@@ -0,0 +1,63 @@
+"""
+Cold-start (import) time of each entry point, measured in fresh interpreters.
+
+Each entry module is imported in a new `python` process several times and the
+median wall time of the import is reported next to a bare `import pandas`,
+which is the floor for anything that touches the data.
+
+Usage:
+    python analysis-code/startup_bench.py            # 5 runs per entry point
+    python analysis-code/startup_bench.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODE_DIR = os.path.join(BASE_DIR, "analysis-code")
+
+# label -> (directory put on sys.path, module to import)
+ENTRY_POINTS = {
+    'pandas (floor)': (CODE_DIR, 'pandas'),
+    'ingest': (CODE_DIR, 'ingest'),
+    'dashboard/prepare_data': (os.path.join(BASE_DIR, "dashboard"), 'prepare_data'),
+    'report_builder': (CODE_DIR, 'report_builder'),
+    'download_data': (BASE_DIR, 'download_data'),
+    'analysis_report_v2': (CODE_DIR, 'analysis_report_v2'),
+}
+
+PROBE = (
+    "import sys, time\n"
+    "sys.path.insert(0, {path!r})\n"
+    "t = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - t)\n"
+    "print(','.join(m for m in ('matplotlib', 'seaborn', 'geopandas', 'sklearn', 'scipy') if m in sys.modules))\n"
+)
+
+
+def import_time(path, module):
+    """Seconds to import `module` in a fresh interpreter, and which heavy packages it pulled in."""
+    out = subprocess.run([sys.executable, "-c", PROBE.format(path=path, module=module)],
+                         capture_output=True, text=True, check=True, cwd=path).stdout.splitlines()
+    return float(out[0]), out[1] if len(out) > 1 else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entry point':<26}{'median':>9}{'min':>9}   heavy imports")
+    for label, (path, module) in ENTRY_POINTS.items():
+        import_time(path, module)  # warm the OS file cache
+        runs = [import_time(path, module) for _ in range(args.runs)]
+        times = [t for t, _ in runs]
+        print(f"{label:<26}{statistics.median(times):>8.2f}s{min(times):>8.2f}s   {runs[0][1] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Time-of-crash cube: every FARS crash binned by county group, year, month,
+weekday and hour.
+
+load_data() keeps only county-year totals. This stage goes back to the
+accident tables for MONTH, DAY_WEEK and HOUR and parses only those columns
+plus the county and FATALS. Each crash gets one packed integer key
+(np.ravel_multi_index over the cube axes), and the cube is then a single
+np.bincount over all years' keys, once for crashes and once weighted by
+FATALS. A crash's county group is its county's education quartile and
+Urbanicity in that year, both taken from the county-year frame.
+
+The cube has 4 x 2 x years x 12 x 7 x 25 cells; the last hour slot holds
+unknown hours (HOUR = 99). It is cached as datasets/cache/time_cube.npz in
+the smallest unsigned dtype that fits, and rebuilt when the FARS files or the
+county groups change.
+
+    cube = time_cube(df)
+    cube['fatals'][..., :24].sum(axis=(0, 1, 2, 3))     weekday x hour fatalities
+
+Usage:
+    python analysis-code/time_cube.py      # build (timed) and print the weekday x hour table
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import ingest
+
+AXES = ('edu_group', 'urbanicity', 'year', 'month', 'weekday', 'hour')
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+WEEKDAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']  # FARS DAY_WEEK 1 = Sunday
+HOURS = 25  # 0-23 plus one slot for unknown
+TIME_COLUMNS = {'STATE', 'COUNTY', 'ST_CASE', 'MONTH', 'DAY_WEEK', 'HOUR', 'FATALS'}
+MAX_FIPS = 80000  # state code < 80 (includes Puerto Rico, 72)
+CACHE_NAME = "time_cube.npz"
+
+
+def read_crash_times(year, data_dir=None, repairs=None):
+    """County FIPS, month, weekday, hour and fatalities of every crash in `year` (None if missing)."""
+    acc = ingest.read_fars_table(year, 'accident.csv', data_dir, usecols=lambda c: c.upper() in TIME_COLUMNS)
+    if acc is None: return None
+    acc.columns = [c.upper() for c in acc.columns]
+    fips = (acc['STATE'] * 1000 + acc['COUNTY']).to_numpy(dtype=np.int64)
+    return {
+        'FIPS': ingest.apply_fips_repairs(year, acc['ST_CASE'].to_numpy(), fips, repairs),
+        'MONTH': acc['MONTH'].to_numpy(dtype=np.int64),
+        'DAY_WEEK': acc['DAY_WEEK'].to_numpy(dtype=np.int64),
+        'HOUR': acc['HOUR'].to_numpy(dtype=np.int64),
+        'FATALS': acc['FATALS'].to_numpy(dtype=np.float64),
+    }
+
+
+def group_lookup(df, years):
+    """(years x MAX_FIPS) table of county group codes (edu_group * n_urbanicity + urbanicity), -1 if absent."""
+    n_urb = len(df['Urbanicity'].cat.categories)
+    lookup = np.full((len(years), MAX_FIPS), -1, dtype=np.int16)
+    year_idx = np.searchsorted(years, df['Year'].to_numpy())
+    edu = df['Edu_Group'].cat.codes.to_numpy().astype(np.int16)
+    urb = df['Urbanicity'].cat.codes.to_numpy().astype(np.int16)
+    ok = (edu >= 0) & (urb >= 0)
+    lookup[year_idx[ok], df['FIPS'].to_numpy()[ok]] = edu[ok] * n_urb + urb[ok]
+    return lookup
+
+
+def _smallest_uint(a):
+    """Integer counts in the smallest unsigned dtype that holds them."""
+    a = np.rint(a)
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if a.max(initial=0) <= np.iinfo(dtype).max:
+            return a.astype(dtype)
+    return a.astype(np.uint64)
+
+
+def build_time_cube(df, data_dir=None):
+    """
+    Crash and fatality counts over AXES. Returns a dict with 'crashes', 'fatals'
+    (arrays shaped like the axes), the axis labels and 'unmatched' (crashes whose
+    county-year is not in the frame or whose month / weekday is invalid).
+    """
+    years = np.sort(df['Year'].unique()).astype(np.int64)
+    edu_groups = list(df['Edu_Group'].cat.categories)
+    urbanicity = list(df['Urbanicity'].cat.categories)
+    shape = (len(edu_groups) * len(urbanicity), len(years), len(MONTHS), len(WEEKDAYS), HOURS)
+    lookup = group_lookup(df, years)
+    repairs = ingest.read_fips_repairs(data_dir)
+
+    keys, fatals, unmatched = [], [], 0
+    for yi, year in enumerate(years):
+        crashes = read_crash_times(int(year), data_dir, repairs)
+        if crashes is None: continue
+        fips = crashes['FIPS']
+        group = np.where((fips >= 0) & (fips < MAX_FIPS), lookup[yi, np.clip(fips, 0, MAX_FIPS - 1)], -1)
+        month, weekday, hour = crashes['MONTH'] - 1, crashes['DAY_WEEK'] - 1, crashes['HOUR']
+        hour = np.where((hour >= 0) & (hour < 24), hour, HOURS - 1)
+        ok = (group >= 0) & (month >= 0) & (month < 12) & (weekday >= 0) & (weekday < 7)
+        unmatched += int((~ok).sum())
+        keys.append(np.ravel_multi_index((group[ok], np.full(ok.sum(), yi), month[ok], weekday[ok], hour[ok]), shape))
+        fatals.append(crashes['FATALS'][ok])
+
+    keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+    fatals = np.concatenate(fatals) if fatals else np.zeros(0)
+    size = int(np.prod(shape))
+    full_shape = (len(edu_groups), len(urbanicity)) + shape[1:]
+    return {
+        'crashes': _smallest_uint(np.bincount(keys, minlength=size)).reshape(full_shape),
+        'fatals': _smallest_uint(np.bincount(keys, weights=np.nan_to_num(fatals), minlength=size)).reshape(full_shape),
+        'years': years,
+        'edu_groups': np.array(edu_groups),
+        'urbanicity': np.array(urbanicity),
+        'unmatched': unmatched,
+    }
+
+
+def _signature(df, data_dir):
+    """Hash of the county groups, the FARS sources (name, size, mtime) and any FIPS repairs the cube was built from."""
+    years = np.sort(df['Year'].unique()).astype(np.int64)
+    h = hashlib.sha1(group_lookup(df, years).tobytes())
+    h.update(ingest.fars_signature(data_dir).encode())
+    repairs = ingest.read_fips_repairs(data_dir)
+    if repairs is not None:
+        h.update(pd.util.hash_pandas_object(repairs, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def time_cube(df, data_dir=None, rebuild=False):
+    """Cached build_time_cube (datasets/cache/time_cube.npz)."""
+    data_dir = data_dir or ingest.DATA_DIR
+    cache = os.path.join(data_dir, "cache", CACHE_NAME)
+    signature = _signature(df, data_dir)
+    if os.path.exists(cache) and not rebuild:
+        z = np.load(cache, allow_pickle=False)
+        if str(z['signature']) == signature:
+            cube = {k: z[k] for k in z.files if k != 'signature'}
+            cube['unmatched'] = int(cube['unmatched'])
+            return cube
+
+    cube = build_time_cube(df, data_dir)
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    np.savez_compressed(cache, signature=signature, **cube)
+    return cube
+
+
+def weekday_hour(cube, measure='fatals', **select):
+    """
+    Weekday x hour table (known hours only) summed over everything else, after
+    selecting labels on the other axes, e.g. weekday_hour(cube, edu_group='Med-Low').
+    """
+    a = cube[measure][..., :24].astype(np.int64)
+    labels = {'edu_group': cube['edu_groups'], 'urbanicity': cube['urbanicity'], 'year': cube['years']}
+    for axis, value in select.items():
+        i = AXES.index(axis)
+        a = np.take(a, [list(labels[axis]).index(value)], axis=i)
+    return pd.DataFrame(a.sum(axis=(0, 1, 2, 3)), index=WEEKDAYS, columns=range(24))
+
+
+def main():
+    df, _ = ingest.load_data()
+    t0 = time.perf_counter()
+    cube = build_time_cube(df)
+    elapsed = time.perf_counter() - t0
+    print(f"Cube {cube['fatals'].shape} built in {elapsed:.2f}s: {int(cube['crashes'].sum()):,} crashes, "
+          f"{int(cube['fatals'].sum()):,} fatalities, {cube['unmatched']:,} unmatched")
+    print(f"Stored as {cube['crashes'].dtype} / {cube['fatals'].dtype}: "
+          f"{(cube['crashes'].nbytes + cube['fatals'].nbytes) / 1e6:.2f} MB in memory")
+    print("\nFatalities by weekday x hour (all years):")
+    print(weekday_hour(cube).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,16 @@ import os
 import json
 import numpy as np
 
-# Add parent code directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'code'))
+# Add the analysis code directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis-code'))
 
-# Import load_data from analysis script
-from analysis_report_v2 import load_data
+# Data layer only: no matplotlib / geopandas / sklearn on this path
+from ingest import load_data
+from trends import county_trends
+from rollups import rollup
+from scatter_tiles import build_tiles, write_tiles
+from time_cube import time_cube, WEEKDAYS, MONTHS
+from similar_counties import county_profiles, build_index, all_neighbors, export_neighbors
 
 def clean_for_json(obj):
     """Replace NaN and Inf values with None for JSON compatibility."""
@@ -34,18 +39,15 @@ def prepare_dashboard_data():
     data_dir = os.path.join(os.path.dirname(__file__), 'public', 'data')
     os.makedirs(data_dir, exist_ok=True)
     
-    # 1. County Scatter Data (Averaged across years)
+    # 1. County Scatter Data (all years, population-weighted rates from the rollup cube)
     print("Preparing county scatter data...")
-    county_avg = df.groupby('FIPS_STR').agg({
-        'Pct_Less_HS': 'mean',
-        'Fatality_Rate': 'mean',
-        'Urbanicity': 'first',
-        'Population': 'mean',
-        'State_Abbrev': 'first',
-        'Drunk_Rate_Per_100k': 'mean',
-        'Dark_Pct': 'mean',
-        'Weather_Pct': 'mean'
-    }).reset_index()
+    county_avg = rollup(df, ['FIPS_STR'])
+    county_avg['Population'] = county_avg['Avg_Population']
+    attrs = df.drop_duplicates('FIPS_STR').set_index('FIPS_STR')
+    county_avg['Urbanicity'] = county_avg['FIPS_STR'].map(attrs['Urbanicity'])
+    county_avg['State_Abbrev'] = county_avg['FIPS_STR'].map(attrs['State_Abbrev'])
+    county_avg = county_avg[['FIPS_STR', 'Pct_Less_HS', 'Fatality_Rate', 'Urbanicity', 'Population',
+                             'State_Abbrev', 'Drunk_Rate_Per_100k', 'Dark_Pct', 'Weather_Pct']]
     
     # Drop rows with NaN in critical columns
     county_avg = county_avg.dropna(subset=['Pct_Less_HS', 'Fatality_Rate', 'Population'])
@@ -53,23 +55,27 @@ def prepare_dashboard_data():
     # Add county name (we'll use FIPS for now, can enhance later)
     county_avg['county_id'] = county_avg['FIPS_STR']
     
+    # Per-county fatality trend (Theil-Sen slope, per 100k per year)
+    trends = county_trends(df, ['Fatality_Rate'])
+    county_avg['Fatality_Trend'] = county_avg['FIPS_STR'].map(trends['Fatality_Rate_Trend'])
+    
+    # LISA hotspot clusters (map layer)
+    print("Computing LISA clusters...")
+    from spatial_stats import county_lisa
+    _, clusters = county_lisa(df)
+    county_avg['Fatality_LISA'] = county_avg['FIPS_STR'].map(clusters['Fatality_Rate']['cluster'])
+    county_avg['Edu_LISA'] = county_avg['FIPS_STR'].map(clusters['Pct_Less_HS']['cluster'])
+    
     scatter_data = clean_for_json(county_avg.to_dict('records'))
     with open(os.path.join(data_dir, 'county_scatter.json'), 'w') as f:
         json.dump(scatter_data, f)
     print(f"  Saved {len(scatter_data)} counties to county_scatter.json")
     
-    # 2. State Map Data (Averaged across years)
+    # 2. State Map Data (all years; Population is the mean annual state total)
     print("Preparing state map data...")
-    state_avg = df.groupby('State_Abbrev').agg({
-        'Fatality_Rate': 'mean',
-        'Pct_Less_HS': 'mean',
-        'Population': 'sum'  # Total state population
-    }).reset_index()
-    
-    # Get average population per year, then average
-    state_pop = df.groupby(['State_Abbrev', 'Year'])['Population'].sum().reset_index()
-    state_pop_avg = state_pop.groupby('State_Abbrev')['Population'].mean().reset_index()
-    state_avg = state_avg.drop('Population', axis=1).merge(state_pop_avg, on='State_Abbrev')
+    state_avg = rollup(df, ['State_Abbrev'])
+    state_avg['Population'] = state_avg['Avg_Population']
+    state_avg = state_avg[['State_Abbrev', 'Fatality_Rate', 'Pct_Less_HS', 'Population']]
     
     # Drop NaN states
     state_avg = state_avg.dropna(subset=['State_Abbrev', 'Fatality_Rate'])
@@ -92,6 +98,40 @@ def prepare_dashboard_data():
         json.dump(county_by_state, f)
     print(f"  Saved county data for {len(county_by_state)} states")
     
+    # 4. County-year scatter tiles (aggregates when zoomed out, raw points at the deepest level)
+    print("Preparing county-year scatter tiles...")
+    manifest, tiles = build_tiles(df)
+    sizes = write_tiles(manifest, tiles, os.path.join(data_dir, 'scatter_tiles'))
+    for z, (count, total, largest) in sizes.items():
+        kind = 'raw points' if z == manifest['rawLevel'] else 'aggregates'
+        print(f"  z={z} {kind}: {count} tiles, {total / 1e3:.0f} KB (largest {largest / 1e3:.1f} KB)")
+    print(f"  Saved {manifest['points']} county-years to scatter_tiles/")
+    
+    # 5. Crash timing (fatalities by weekday x hour and month x hour, per education quartile,
+    #    urbanicity and year; flat row-major arrays, unknown hours left out)
+    print("Preparing crash timing cube...")
+    cube = time_cube(df)
+    fatals = cube['fatals'][..., :24].astype(np.int64)
+    timing = {
+        'eduGroups': cube['edu_groups'].tolist(),
+        'urbanicity': cube['urbanicity'].tolist(),
+        'years': cube['years'].tolist(),
+        'weekdays': WEEKDAYS,
+        'months': MONTHS,
+        'weekdayHour': fatals.sum(axis=3).ravel().tolist(),   # edu x urb x year x weekday x hour
+        'monthHour': fatals.sum(axis=4).ravel().tolist(),     # edu x urb x year x month x hour
+    }
+    with open(os.path.join(data_dir, 'time_cube.json'), 'w') as f:
+        json.dump(timing, f, separators=(',', ':'))
+    print(f"  Saved {int(fatals.sum())} fatalities to time_cube.json")
+    
+    # 6. Similar counties (top-k nearest standardized risk profiles, for the county drill-down)
+    print("Preparing similar counties...")
+    index = build_index(county_profiles(df))
+    neighbors, distance = all_neighbors(index)
+    export_neighbors(index, neighbors, distance, os.path.join(data_dir, 'similar_counties.json'))
+    print(f"  Saved {neighbors.shape[1]} neighbors for {len(index['fips'])} counties to similar_counties.json")
+    
     print("\nData preparation complete!")
     print(f"Files saved to: {data_dir}")
 
@@ -1,10 +1,12 @@
 import { useState } from 'react';
 import ScatterPlot from './components/ScatterPlot';
+import CountyYearScatter from './components/CountyYearScatter';
+import CrashTiming from './components/CrashTiming';
 import InteractiveMap from './components/InteractiveMap';
 import type { MetricType } from './types';
 import { COLORS } from './types';
 
-type TabType = 'scatter' | 'maps';
+type TabType = 'scatter' | 'years' | 'timing' | 'maps';
 
 function App() {
   const [activeTab, setActiveTab] = useState<TabType>('scatter');
@@ -38,6 +40,26 @@ function App() {
           >
             📊 Scatter Plot
           </button>
+          <button
+            onClick={() => setActiveTab('years')}
+            className={`px-5 py-2 rounded-t-lg font-medium transition-colors ${
+              activeTab === 'years'
+                ? 'bg-white text-gray-800'
+                : 'bg-gray-600 text-gray-200 hover:bg-gray-500'
+            }`}
+          >
+            📈 County-Years
+          </button>
+          <button
+            onClick={() => setActiveTab('timing')}
+            className={`px-5 py-2 rounded-t-lg font-medium transition-colors ${
+              activeTab === 'timing'
+                ? 'bg-white text-gray-800'
+                : 'bg-gray-600 text-gray-200 hover:bg-gray-500'
+            }`}
+          >
+            🕒 Crash Timing
+          </button>
           <button
             onClick={() => setActiveTab('maps')}
             className={`px-5 py-2 rounded-t-lg font-medium transition-colors ${
@@ -54,6 +76,8 @@ function App() {
       {/* Content */}
       <main className="flex-1 bg-white overflow-hidden">
         {activeTab === 'scatter' && <ScatterPlot />}
+        {activeTab === 'years' && <CountyYearScatter />}
+        {activeTab === 'timing' && <CrashTiming />}
         {activeTab === 'maps' && (
           <InteractiveMap 
             metric={metric} 
@@ -64,7 +88,7 @@ function App() {
 
       {/* Footer */}
       <footer className="px-6 py-3 bg-gray-200 text-center text-sm text-gray-600">
-        Data: FARS & US Census (2010-2023) | Built with React, Plotly & Leaflet
+        Data: FARS & US Census (2010-2023) | Built with React, Canvas & Leaflet
       </footer>
     </div>
   );
@@ -0,0 +1,289 @@
+import { useEffect, useMemo, useRef, useState } from 'react';
+import type { MouseEvent as ReactMouseEvent } from 'react';
+import type { ScatterTile, TileManifest } from '../types';
+import { COLORS, URBANICITY } from '../types';
+import type { View } from '../lib/scatterCanvas';
+import {
+  MARGIN, binRadius, drawBins, drawFrame, drawPoints, makeSprite, plotArea, toPxX, toPxY,
+} from '../lib/scatterCanvas';
+import { ancestor, fetchManifest, fetchTile, levelForView, tileKey, visibleTiles } from '../lib/scatterTiles';
+import { usePanZoom } from '../lib/usePanZoom';
+
+const FALLBACK_VIEW: View = { x0: 0, x1: 50, y0: 0, y1: 150 };
+const GROUP_COLORS = [COLORS.danger, COLORS.safety];  // same order as URBANICITY
+const MARKER_SIZE = 8;
+const MARKER_OPACITY = 0.6;
+const BIN_OPACITY = 0.5;
+const HOVER_RADIUS = 8;  // px, for raw points
+const LABELS = {
+  title: 'Education vs Fatality Rate by County-Year',
+  x: '% Without High School Diploma',
+  y: 'Fatalities per 100k Population',
+};
+
+const extentView = (m: TileManifest): View => ({ x0: m.extent[0], x1: m.extent[1], y0: m.extent[2], y1: m.extent[3] });
+const formatPopulation = (p: number) => p >= 1e6 ? (p / 1e6).toFixed(1) + 'M' : (p / 1e3).toFixed(0) + 'k';
+
+interface Hover { tile: ScatterTile; i: number }
+
+export default function CountyYearScatter() {
+  const containerRef = useRef<HTMLDivElement>(null);
+  const baseRef = useRef<HTMLCanvasElement>(null);
+  const overlayRef = useRef<HTMLCanvasElement>(null);
+  const requested = useRef(new Set<string>());
+
+  const [manifest, setManifest] = useState<TileManifest | null>(null);
+  const [tiles, setTiles] = useState<Map<string, ScatterTile>>(new Map());
+  const [hidden, setHidden] = useState<number[]>([]);
+  const [size, setSize] = useState({ width: 0, height: 0 });
+  const [hover, setHover] = useState<Hover | null>(null);
+  const [loading, setLoading] = useState(true);
+  const { view, setView, dragging, onMouseDown, endDrag, panMove } = usePanZoom(overlayRef, FALLBACK_VIEW, loading);
+
+  useEffect(() => {
+    fetchManifest()
+      .then(m => {
+        console.log('County-year tiles:', m.points, 'points, raw level', m.rawLevel);
+        setManifest(m);
+        setView(extentView(m));
+        setLoading(false);
+      })
+      .catch(err => {
+        console.error('Failed to load scatter tiles:', err);
+        setLoading(false);
+      });
+  }, [setView]);
+
+  // Track the container size (the canvases are rendered once the manifest has loaded)
+  useEffect(() => {
+    const el = containerRef.current;
+    if (!el) return;
+    const ro = new ResizeObserver(([entry]) => {
+      setSize({ width: entry.contentRect.width, height: entry.contentRect.height });
+    });
+    ro.observe(el);
+    return () => ro.disconnect();
+  }, [loading]);
+
+  // Level and tiles the current view needs
+  const needed = useMemo(() => {
+    if (!manifest || size.width === 0) return { z: 0, tiles: [] as [number, number][] };
+    const p = plotArea(size.width, size.height);
+    const z = levelForView(manifest, view, p.width, p.height);
+    return { z, tiles: visibleTiles(manifest, view, z) };
+  }, [manifest, view, size]);
+
+  // Fetch missing tiles on demand; each tile is requested once and kept
+  useEffect(() => {
+    for (const [tx, ty] of needed.tiles) {
+      const key = tileKey(needed.z, tx, ty);
+      if (requested.current.has(key)) continue;
+      requested.current.add(key);
+      fetchTile(needed.z, tx, ty)
+        .then(tile => setTiles(prev => new Map(prev).set(key, tile)))
+        .catch(err => {
+          requested.current.delete(key);
+          console.error(`Failed to load tile ${key}:`, err);
+        });
+    }
+  }, [needed]);
+
+  // Tiles to draw: the needed ones, or their closest loaded ancestor while they are in flight
+  const drawn = useMemo(() => {
+    const out = new Map<string, ScatterTile>();
+    for (const [tx, ty] of needed.tiles) {
+      for (let level = needed.z; level >= 0; level--) {
+        const [ax, ay] = ancestor(needed.z, tx, ty, level);
+        const key = tileKey(level, ax, ay);
+        const tile = tiles.get(key);
+        if (tile) {
+          out.set(key, tile);
+          break;
+        }
+      }
+    }
+    return [...out.values()];
+  }, [needed, tiles]);
+
+  const sprites = useMemo(
+    () => GROUP_COLORS.map(c => makeSprite(c, MARKER_SIZE, window.devicePixelRatio || 1)),
+    []
+  );
+
+  // Points layer
+  useEffect(() => {
+    const canvas = baseRef.current;
+    if (!canvas || size.width === 0) return;
+    const frame = requestAnimationFrame(() => {
+      const dpr = window.devicePixelRatio || 1;
+      canvas.width = Math.round(size.width * dpr);
+      canvas.height = Math.round(size.height * dpr);
+      const ctx = canvas.getContext('2d');
+      if (!ctx) return;
+      ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+      drawFrame(ctx, size.width, size.height, view, LABELS);
+      const p = plotArea(size.width, size.height);
+      URBANICITY.forEach((_, g) => {
+        if (hidden.includes(g)) return;
+        for (const t of drawn) {
+          if ('bins' in t) {
+            drawBins(ctx, p, view, t.bins.x, t.bins.y, t.bins.group, t.bins.count, g, GROUP_COLORS[g], BIN_OPACITY);
+          } else {
+            drawPoints(ctx, p, view, t.points.x, t.points.y, t.points.group, null, g, sprites[g], MARKER_SIZE, MARKER_OPACITY);
+          }
+        }
+      });
+    });
+    return () => cancelAnimationFrame(frame);
+  }, [drawn, hidden, view, size, sprites]);
+
+  // Hover layer
+  useEffect(() => {
+    const canvas = overlayRef.current;
+    if (!canvas || size.width === 0) return;
+    const dpr = window.devicePixelRatio || 1;
+    canvas.width = Math.round(size.width * dpr);
+    canvas.height = Math.round(size.height * dpr);
+    const ctx = canvas.getContext('2d');
+    if (!ctx || !hover) return;
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    const p = plotArea(size.width, size.height);
+    const { tile, i } = hover;
+    const [x, y, r] = 'bins' in tile
+      ? [tile.bins.x[i], tile.bins.y[i], binRadius(tile.bins.count[i])]
+      : [tile.points.x[i], tile.points.y[i], MARKER_SIZE / 2];
+    ctx.beginPath();
+    ctx.arc(toPxX(view, p, x), toPxY(view, p, y), r + 2, 0, 2 * Math.PI);
+    ctx.strokeStyle = COLORS.primary;
+    ctx.lineWidth = 2;
+    ctx.stroke();
+  }, [hover, view, size]);
+
+  const toggleGroup = (g: number) => {
+    setHidden(hidden.includes(g) ? hidden.filter(h => h !== g) : [...hidden, g]);
+    setHover(null);
+  };
+
+  // Nearest drawn bin / point under the cursor; only the few tiles on screen are scanned
+  const onMouseMove = (e: ReactMouseEvent<HTMLCanvasElement>) => {
+    const pos = panMove(e);
+    if (pos === true) return;
+    const [mx, my] = pos;
+    const p = plotArea(size.width, size.height);
+    let best: Hover | null = null;
+    let bestD = 1;
+    for (const tile of drawn) {
+      const isBin = 'bins' in tile;
+      const cols = isBin ? tile.bins : tile.points;
+      for (let i = 0; i < cols.x.length; i++) {
+        if (hidden.includes(cols.group[i])) continue;
+        const r = isBin ? binRadius(tile.bins.count[i]) : HOVER_RADIUS;
+        const dx = (toPxX(view, p, cols.x[i]) - mx) / r;
+        const dy = (toPxY(view, p, cols.y[i]) - my) / r;
+        const d = dx * dx + dy * dy;
+        if (d <= bestD) {
+          bestD = d;
+          best = { tile, i };
+        }
+      }
+    }
+    setHover(best);
+  };
+
+  if (loading) {
+    return (
+      <div className="flex items-center justify-center h-full">
+        <div className="text-lg text-gray-600">Loading scatter tiles...</div>
+      </div>
+    );
+  }
+
+  if (!manifest) {
+    return (
+      <div className="flex items-center justify-center h-full">
+        <div className="text-lg text-gray-600">Scatter tiles not found. Run prepare_data.py first.</div>
+      </div>
+    );
+  }
+
+  const p = plotArea(size.width, size.height);
+  const loaded = needed.tiles.filter(([tx, ty]) => tiles.has(tileKey(needed.z, tx, ty))).length;
+  const hovered = hover && ('bins' in hover.tile ? hover.tile.bins : hover.tile.points);
+  const tip = hover && hovered ? {
+    left: Math.min(toPxX(view, p, hovered.x[hover.i]) + 12, size.width - 230),
+    top: Math.max(toPxY(view, p, hovered.y[hover.i]) - 12, 0),
+    group: URBANICITY[hovered.group[hover.i]],
+  } : null;
+
+  return (
+    <div className="w-full h-full p-4">
+      <div ref={containerRef} className="relative w-full h-full select-none">
+        <canvas ref={baseRef} className="absolute inset-0 w-full h-full" />
+        <canvas
+          ref={overlayRef}
+          className="absolute inset-0 w-full h-full"
+          style={{ cursor: dragging ? 'grabbing' : hover ? 'pointer' : 'crosshair' }}
+          onMouseDown={e => { onMouseDown(e); setHover(null); }}
+          onMouseMove={onMouseMove}
+          onMouseUp={endDrag}
+          onMouseLeave={() => { endDrag(); setHover(null); }}
+          onDoubleClick={() => setView(extentView(manifest))}
+        />
+
+        {/* Legend (click to show / hide a group) */}
+        <div
+          className="absolute flex flex-col gap-1 px-2 py-1 text-sm rounded"
+          style={{ left: p.left + 8, top: p.top + 8, backgroundColor: 'rgba(255,255,255,0.8)' }}
+        >
+          {URBANICITY.map((name, g) => (
+            <button
+              key={name}
+              onClick={() => toggleGroup(g)}
+              className="flex items-center gap-2 text-left"
+              style={{ opacity: hidden.includes(g) ? 0.4 : 1 }}
+            >
+              <span className="inline-block w-3 h-3 rounded-full" style={{ backgroundColor: GROUP_COLORS[g] }} />
+              {name}
+            </button>
+          ))}
+        </div>
+
+        <div className="absolute text-xs text-gray-500" style={{ right: MARGIN.r, top: 8 }}>
+          Scroll to zoom · drag to pan · double-click to reset
+        </div>
+        <div className="absolute text-xs text-gray-500" style={{ left: p.left, bottom: 4 }}>
+          {manifest.points.toLocaleString()} county-years ({manifest.years.join('-')}) ·{' '}
+          {needed.z < manifest.rawLevel
+            ? `binned, level ${needed.z} of ${manifest.rawLevel} (zoom in for individual counties)`
+            : 'individual counties'}
+          {loaded < needed.tiles.length && ` · loading ${needed.tiles.length - loaded} tiles...`}
+        </div>
+
+        {hover && tip && (
+          <div
+            className="absolute pointer-events-none bg-white border rounded shadow px-3 py-2 text-xs leading-5"
+            style={{ left: tip.left, top: tip.top, width: 218 }}
+          >
+            {'bins' in hover.tile ? (
+              <>
+                <div><b>{tip.group}:</b> {hover.tile.bins.count[hover.i].toLocaleString()} county-years</div>
+                <div><b>Mean % Without HS:</b> {hover.tile.bins.x[hover.i].toFixed(1)}%</div>
+                <div><b>Mean Fatality Rate:</b> {hover.tile.bins.y[hover.i].toFixed(1)} per 100k</div>
+              </>
+            ) : (
+              <>
+                <div><b>County:</b> {hover.tile.points.fips[hover.i]}</div>
+                <div><b>State:</b> {hover.tile.points.state[hover.i]}</div>
+                <div><b>Year:</b> {hover.tile.points.year[hover.i]}</div>
+                <div><b>% Without HS:</b> {hover.tile.points.x[hover.i].toFixed(1)}%</div>
+                <div><b>Fatality Rate:</b> {hover.tile.points.y[hover.i].toFixed(1)} per 100k</div>
+                <div><b>Population:</b> {formatPopulation(hover.tile.points.population[hover.i])}</div>
+                <div><b>Urbanicity:</b> {tip.group}</div>
+              </>
+            )}
+          </div>
+        )}
+      </div>
+    </div>
+  );
+}
@@ -0,0 +1,142 @@
+import { useEffect, useMemo, useState } from 'react';
+import type { TimeCube } from '../types';
+import { COLORS } from '../types';
+
+type Layout = 'weekday' | 'month';
+
+const ALL = -1;
+const HOURS = Array.from({ length: 24 }, (_, h) => h);
+const SELECT_CLASS = 'px-3 py-2 border rounded-md bg-white shadow-sm focus:outline-none focus:ring-2 focus:ring-blue-500';
+
+// Rows x 24 table from a flat edu x urb x year x rows x hour array, summed over the unselected axes
+function slice(cube: TimeCube, layout: Layout, edu: number, urb: number, year: number): number[][] {
+  const flat = layout === 'weekday' ? cube.weekdayHour : cube.monthHour;
+  const rows = layout === 'weekday' ? cube.weekdays.length : cube.months.length;
+  const [nu, ny] = [cube.urbanicity.length, cube.years.length];
+  const out = Array.from({ length: rows }, () => new Array<number>(24).fill(0));
+  cube.eduGroups.forEach((_, e) => {
+    if (edu !== ALL && e !== edu) return;
+    cube.urbanicity.forEach((_, u) => {
+      if (urb !== ALL && u !== urb) return;
+      cube.years.forEach((_, y) => {
+        if (year !== ALL && y !== year) return;
+        const base = ((e * nu + u) * ny + y) * rows * 24;
+        for (let r = 0; r < rows; r++) {
+          for (let h = 0; h < 24; h++) out[r][h] += flat[base + r * 24 + h];
+        }
+      });
+    });
+  });
+  return out;
+}
+
+// White -> danger color
+function shade(t: number): string {
+  const c = parseInt(COLORS.danger.slice(1), 16);
+  const mix = (v: number) => Math.round(255 + (v - 255) * t);
+  return `rgb(${mix(c >> 16)}, ${mix((c >> 8) & 255)}, ${mix(c & 255)})`;
+}
+
+export default function CrashTiming() {
+  const [cube, setCube] = useState<TimeCube | null>(null);
+  const [loading, setLoading] = useState(true);
+  const [layout, setLayout] = useState<Layout>('weekday');
+  const [edu, setEdu] = useState(ALL);
+  const [urb, setUrb] = useState(ALL);
+  const [year, setYear] = useState(ALL);
+
+  useEffect(() => {
+    fetch('/data/time_cube.json')
+      .then(res => res.json())
+      .then((data: TimeCube) => {
+        setCube(data);
+        setLoading(false);
+      })
+      .catch(err => {
+        console.error('Failed to load crash timing data:', err);
+        setLoading(false);
+      });
+  }, []);
+
+  const table = useMemo(() => cube ? slice(cube, layout, edu, urb, year) : [], [cube, layout, edu, urb, year]);
+  const total = table.reduce((s, row) => s + row.reduce((a, b) => a + b, 0), 0);
+  const max = Math.max(1, ...table.flat());
+
+  if (loading) {
+    return (
+      <div className="flex items-center justify-center h-full">
+        <div className="text-lg text-gray-600">Loading crash timing data...</div>
+      </div>
+    );
+  }
+
+  if (!cube) {
+    return (
+      <div className="flex items-center justify-center h-full">
+        <div className="text-lg text-gray-600">Crash timing data not found. Run prepare_data.py first.</div>
+      </div>
+    );
+  }
+
+  const rowLabels = layout === 'weekday' ? cube.weekdays : cube.months;
+
+  return (
+    <div className="w-full h-full flex flex-col">
+      {/* Controls */}
+      <div className="flex items-center gap-4 p-4 bg-gray-50 border-b flex-wrap">
+        <label className="font-medium text-gray-700">View:</label>
+        <select value={layout} onChange={e => setLayout(e.target.value as Layout)} className={SELECT_CLASS}>
+          <option value="weekday">Weekday × Hour</option>
+          <option value="month">Month × Hour</option>
+        </select>
+        <label className="font-medium text-gray-700">Education:</label>
+        <select value={edu} onChange={e => setEdu(Number(e.target.value))} className={SELECT_CLASS}>
+          <option value={ALL}>All counties</option>
+          {cube.eduGroups.map((g, i) => <option key={g} value={i}>{g}</option>)}
+        </select>
+        <label className="font-medium text-gray-700">Area:</label>
+        <select value={urb} onChange={e => setUrb(Number(e.target.value))} className={SELECT_CLASS}>
+          <option value={ALL}>Rural & Urban</option>
+          {cube.urbanicity.map((u, i) => <option key={u} value={i}>{u}</option>)}
+        </select>
+        <label className="font-medium text-gray-700">Year:</label>
+        <select value={year} onChange={e => setYear(Number(e.target.value))} className={SELECT_CLASS}>
+          <option value={ALL}>{cube.years[0]}-{cube.years[cube.years.length - 1]}</option>
+          {cube.years.map((y, i) => <option key={y} value={i}>{y}</option>)}
+        </select>
+        <span className="ml-auto text-gray-600">
+          <strong>{total.toLocaleString()}</strong> fatalities
+        </span>
+      </div>
+
+      {/* Heatmap */}
+      <div className="flex-1 overflow-auto p-6">
+        <h2 className="text-lg font-bold mb-4" style={{ color: COLORS.primary }}>
+          When Fatal Crashes Happen
+        </h2>
+        <div className="grid gap-px text-xs" style={{ gridTemplateColumns: `3rem repeat(24, minmax(1.5rem, 1fr))` }}>
+          <div />
+          {HOURS.map(h => <div key={h} className="text-center text-gray-500">{String(h).padStart(2, '0')}</div>)}
+          {table.map((row, r) => (
+            <div key={rowLabels[r]} className="contents">
+              <div className="pr-2 text-right text-gray-600 self-center">{rowLabels[r]}</div>
+              {row.map((v, h) => (
+                <div
+                  key={h}
+                  className="h-8"
+                  style={{ backgroundColor: shade(v / max) }}
+                  title={`${rowLabels[r]} ${String(h).padStart(2, '0')}:00 - ${v.toLocaleString()} fatalities` +
+                    ` (${total ? (v / total * 100).toFixed(2) : '0'}%)`}
+                />
+              ))}
+            </div>
+          ))}
+        </div>
+        <div className="mt-2 text-center text-sm text-gray-600">Hour of Day</div>
+        <p className="mt-4 text-sm text-gray-500">
+          Hover a cell for its count. Crashes with an unknown hour are not shown.
+        </p>
+      </div>
+    </div>
+  );
+}
@@ -2,8 +2,8 @@ import { useEffect, useState, useCallback, useMemo } from 'react';
 import { MapContainer, TileLayer, GeoJSON, useMap } from 'react-leaflet';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
-import type { StateData, CountyData, MetricType } from '../types';
-import { METRIC_LABELS, COLORS } from '../types';
+import type { StateData, CountyData, MetricType, LisaCluster, SimilarCounties } from '../types';
+import { METRIC_LABELS, COLORS, LISA_COLORS } from '../types';
 
 // State name to abbreviation mapping
 const STATE_ABBREV: Record<string, string> = {
@@ -61,6 +61,15 @@ const formatValue = (value: number, metric: MetricType): string => {
   return value.toFixed(1);
 };
 
+// LISA cluster for the current metric (education clusters for the education metric, fatality otherwise)
+const getLisa = (county: CountyData | undefined, metric: MetricType): LisaCluster | null => {
+  if (!county) return null;
+  return (metric === 'Pct_Less_HS' ? county.Edu_LISA : county.Fatality_LISA) ?? null;
+};
+
+// Counties shown in the tooltip's "similar profile" line
+const SIMILAR_SHOWN = 5;
+
 // Map controller component for programmatic view changes
 function MapController({ center, zoom }: { center: [number, number], zoom: number }) {
   const map = useMap();
@@ -84,20 +93,24 @@ export default function InteractiveMap({ metric, onMetricChange }: InteractiveMa
   const [loading, setLoading] = useState(true);
   const [mapCenter, setMapCenter] = useState<[number, number]>([39.8, -98.5]);
   const [mapZoom, setMapZoom] = useState(4);
+  const [showHotspots, setShowHotspots] = useState(false);
+  const [similar, setSimilar] = useState<SimilarCounties | null>(null);
 
   // Load data on mount
   useEffect(() => {
     Promise.all([
       fetch('/data/state_data.json').then(r => r.json()),
       fetch('/data/county_by_state.json').then(r => r.json()),
-      fetch('/data/us-states.json').then(r => r.json())  // Local file
-    ]).then(([states, counties, geoJson]) => {
+      fetch('/data/us-states.json').then(r => r.json()),  // Local file
+      fetch('/data/similar_counties.json').then(r => r.json()).catch(() => null)  // optional
+    ]).then(([states, counties, geoJson, similarCounties]) => {
       console.log('Loaded state data:', states.length, 'states');
       console.log('Loaded county data for', Object.keys(counties).length, 'states');
       console.log('GeoJSON features:', geoJson.features.length);
       
       setStateData(states);
       setCountyByState(counties);
+      setSimilar(similarCounties);
       // Filter out Alaska, Hawaii, Puerto Rico for continental view
       const filteredGeo = {
         ...geoJson,
@@ -121,6 +134,33 @@ export default function InteractiveMap({ metric, onMetricChange }: InteractiveMa
     return state ? state[metric] : NaN;
   }, [stateData, metric]);
 
+  // Every county by FIPS (similar counties can be in other states)
+  const countyLookup = useMemo(() => {
+    const lookup: Record<string, CountyData> = {};
+    Object.values(countyByState).forEach(cs => cs.forEach(c => { lookup[c.FIPS_STR] = c; }));
+    return lookup;
+  }, [countyByState]);
+
+  // FIPS -> row of the similar-counties arrays
+  const similarRow = useMemo(() => {
+    const rows = new Map<string, number>();
+    similar?.fips.forEach((f, i) => rows.set(f, i));
+    return rows;
+  }, [similar]);
+
+  // Nearest-profile counties of one county, as a tooltip line with their value of the current metric
+  const similarLine = useCallback((fips: string): string => {
+    const row = similarRow.get(fips);
+    if (!similar || row === undefined) return '';
+    const start = row * similar.k;
+    const items = similar.neighbors.slice(start, start + Math.min(SIMILAR_SHOWN, similar.k)).map(i => {
+      const other = countyLookup[similar.fips[i]];
+      const value = other ? formatValue(other[metric as keyof CountyData] as number, metric) : 'N/A';
+      return `${similar.fips[i]} (${other?.State_Abbrev ?? '?'}, ${value})`;
+    });
+    return `<br>Similar profile: ${items.join(', ')}`;
+  }, [similar, similarRow, countyLookup, metric]);
+
   // Create state data lookup
   const stateDataLookup = useMemo(() => {
     const lookup: Record<string, StateData> = {};
@@ -198,13 +238,14 @@ export default function InteractiveMap({ metric, onMetricChange }: InteractiveMa
     const fips = feature.id.toString().padStart(5, '0');
     const countyData = countyByState[selectedState]?.find(c => c.FIPS_STR === fips);
     const value = countyData ? countyData[metric as keyof CountyData] as number : NaN;
+    const lisa = getLisa(countyData, metric);
     return {
-      fillColor: getColor(value, metric),
+      fillColor: showHotspots ? (lisa ? LISA_COLORS[lisa] : '#CCCCCC') : getColor(value, metric),
       weight: 0.5,
       color: '#666',
-      fillOpacity: 0.7
+      fillOpacity: showHotspots ? 0.85 : 0.7
     };
-  }, [metric, selectedState, countyByState]);
+  }, [metric, selectedState, countyByState, showHotspots]);
 
   // Tooltip for counties
   const onEachCounty = useCallback((feature: GeoJSON.Feature, layer: L.Layer) => {
@@ -213,13 +254,16 @@ export default function InteractiveMap({ metric, onMetricChange }: InteractiveMa
     const countyData = countyByState[selectedState]?.find(c => c.FIPS_STR === fips);
     if (countyData) {
       const value = countyData[metric as keyof CountyData] as number;
+      const lisa = getLisa(countyData, metric);
       layer.bindTooltip(
         `<b>County: ${fips}</b><br>` +
         `${METRIC_LABELS[metric]}: ${formatValue(value, metric)}<br>` +
-        `Population: ${formatValue(countyData.Population, 'Population')}`
+        `Population: ${formatValue(countyData.Population, 'Population')}` +
+        (lisa ? `<br>Cluster (LISA): ${lisa}` : '') +
+        similarLine(fips!)
       );
     }
-  }, [metric, selectedState, countyByState]);
+  }, [metric, selectedState, countyByState, similarLine]);
 
   // Tooltip for states
   const onEachState = useCallback((feature: GeoJSON.Feature, layer: L.Layer) => {
@@ -268,6 +312,17 @@ export default function InteractiveMap({ metric, onMetricChange }: InteractiveMa
           </button>
         )}
         
+        {selectedState && (
+          <label className="flex items-center gap-2 text-gray-700">
+            <input
+              type="checkbox"
+              checked={showHotspots}
+              onChange={(e) => setShowHotspots(e.target.checked)}
+            />
+            Show hotspots (LISA)
+          </label>
+        )}
+        
         {selectedState && (
           <span className="ml-auto text-gray-600">
             Viewing: <strong>{selectedState}</strong> counties
@@ -303,7 +358,7 @@ export default function InteractiveMap({ metric, onMetricChange }: InteractiveMa
           {/* County layer (shown when state is selected) */}
           {countyGeoJSON && selectedState && (
             <GeoJSON
-              key={`counties-${selectedState}-${metric}`}
+              key={`counties-${selectedState}-${metric}-${showHotspots}`}
               data={countyGeoJSON}
               style={countyStyle}
               onEachFeature={onEachCounty}
@@ -1,25 +1,140 @@
-import { useEffect, useState } from 'react';
-import Plot from 'react-plotly.js';
-import type { CountyData } from '../types';
-import { COLORS } from '../types';
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react';
+import type { MouseEvent as ReactMouseEvent } from 'react';
+import type { ScatterPoints, ScatterRequest, ScatterResponse } from '../types';
+import { COLORS, URBANICITY } from '../types';
+import { nearestPoint } from '../lib/gridIndex';
+import type { View } from '../lib/scatterCanvas';
+import { MARGIN, drawFrame, drawPoints, makeSprite, plotArea, toDataX, toDataY, toPxX, toPxY } from '../lib/scatterCanvas';
+import { usePanZoom } from '../lib/usePanZoom';
+
+const INITIAL_VIEW: View = { x0: 0, x1: 50, y0: 0, y1: 150 };
+const GROUP_COLORS = [COLORS.danger, COLORS.safety];  // same order as URBANICITY
+const MARKER_SIZE = 10;
+const MARKER_OPACITY = 0.6;
+const HOVER_RADIUS = 8;  // px
+const LABELS = {
+  title: 'Education vs Fatality Rate by County (2010-2023 Average)',
+  x: '% Without High School Diploma',
+  y: 'Fatalities per 100k Population',
+};
+
+const formatPopulation = (p: number) => p >= 1e6 ? (p / 1e6).toFixed(1) + 'M' : (p / 1e3).toFixed(0) + 'k';
 
 export default function ScatterPlot() {
-  const [data, setData] = useState<CountyData[]>([]);
+  const containerRef = useRef<HTMLDivElement>(null);
+  const baseRef = useRef<HTMLCanvasElement>(null);
+  const overlayRef = useRef<HTMLCanvasElement>(null);
+  const workerRef = useRef<Worker | null>(null);
+
+  const [points, setPoints] = useState<ScatterPoints | null>(null);
+  const [visible, setVisible] = useState<Uint8Array | null>(null);
+  const [hidden, setHidden] = useState<number[]>([]);
+  const [size, setSize] = useState({ width: 0, height: 0 });
+  const [hover, setHover] = useState<number | null>(null);
   const [loading, setLoading] = useState(true);
+  const { view, setView, dragging, onMouseDown, endDrag, panMove } = usePanZoom(overlayRef, INITIAL_VIEW, loading);
 
+  // Fetch, parse and filter in a worker; the main thread only receives typed arrays
   useEffect(() => {
-    fetch('/data/county_scatter.json')
-      .then(res => res.json())
-      .then((json: CountyData[]) => {
-        setData(json);
+    const worker = new Worker(new URL('../workers/scatterWorker.ts', import.meta.url), { type: 'module' });
+    workerRef.current = worker;
+    worker.onmessage = (e: MessageEvent<ScatterResponse>) => {
+      const msg = e.data;
+      if (msg.type === 'loaded') {
+        console.log('Total data points:', msg.total, 'Valid data points:', msg.points.x.length);
+        setPoints(msg.points);
+        setVisible(new Uint8Array(msg.points.x.length).fill(1));
         setLoading(false);
-      })
-      .catch(err => {
-        console.error('Failed to load scatter data:', err);
+      } else if (msg.type === 'filtered') {
+        setVisible(msg.visible);
+      } else {
+        console.error('Failed to load scatter data:', msg.message);
         setLoading(false);
-      });
+      }
+    };
+    worker.postMessage({ type: 'load', url: '/data/county_scatter.json' } satisfies ScatterRequest);
+    return () => worker.terminate();
   }, []);
 
+  // Track the container size (the canvases are rendered once data has loaded)
+  useEffect(() => {
+    const el = containerRef.current;
+    if (!el) return;
+    const ro = new ResizeObserver(([entry]) => {
+      setSize({ width: entry.contentRect.width, height: entry.contentRect.height });
+    });
+    ro.observe(el);
+    return () => ro.disconnect();
+  }, [loading]);
+
+  const sprites = useMemo(
+    () => GROUP_COLORS.map(c => makeSprite(c, MARKER_SIZE, window.devicePixelRatio || 1)),
+    []
+  );
+
+  const counts = useMemo(() => {
+    const c = URBANICITY.map(() => 0);
+    if (points) for (const g of points.group) c[g]++;
+    return c;
+  }, [points]);
+
+  // Points layer: redrawn only when data, filter, view or size change
+  useEffect(() => {
+    const canvas = baseRef.current;
+    if (!canvas || !points || !visible || size.width === 0) return;
+    const frame = requestAnimationFrame(() => {
+      const dpr = window.devicePixelRatio || 1;
+      canvas.width = Math.round(size.width * dpr);
+      canvas.height = Math.round(size.height * dpr);
+      const ctx = canvas.getContext('2d');
+      if (!ctx) return;
+      ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+      drawFrame(ctx, size.width, size.height, view, LABELS);
+      const p = plotArea(size.width, size.height);
+      URBANICITY.forEach((_, g) => drawPoints(
+        ctx, p, view, points.x, points.y, points.group, visible, g, sprites[g], MARKER_SIZE, MARKER_OPACITY
+      ));
+    });
+    return () => cancelAnimationFrame(frame);
+  }, [points, visible, view, size, sprites]);
+
+  // Hover layer: a ring around the hovered point, without touching the points layer
+  useEffect(() => {
+    const canvas = overlayRef.current;
+    if (!canvas || size.width === 0) return;
+    const dpr = window.devicePixelRatio || 1;
+    canvas.width = Math.round(size.width * dpr);
+    canvas.height = Math.round(size.height * dpr);
+    const ctx = canvas.getContext('2d');
+    if (!ctx || hover === null || !points) return;
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    const p = plotArea(size.width, size.height);
+    ctx.beginPath();
+    ctx.arc(toPxX(view, p, points.x[hover]), toPxY(view, p, points.y[hover]), MARKER_SIZE / 2 + 2, 0, 2 * Math.PI);
+    ctx.strokeStyle = COLORS.primary;
+    ctx.lineWidth = 2;
+    ctx.stroke();
+  }, [hover, points, view, size]);
+
+  const toggleGroup = useCallback((g: number) => {
+    const next = hidden.includes(g) ? hidden.filter(h => h !== g) : [...hidden, g];
+    setHidden(next);
+    setHover(null);
+    workerRef.current?.postMessage({ type: 'filter', hidden: next } satisfies ScatterRequest);
+  }, [hidden]);
+
+  const onMouseMove = (e: ReactMouseEvent<HTMLCanvasElement>) => {
+    const pos = panMove(e);
+    if (pos === true || !points || !visible) return;
+    const [mx, my] = pos;
+    const p = plotArea(size.width, size.height);
+    // Hit-test with the grid index: a fixed pixel radius converted to data units per axis
+    const rx = HOVER_RADIUS / p.width * (view.x1 - view.x0);
+    const ry = HOVER_RADIUS / p.height * (view.y1 - view.y0);
+    const i = nearestPoint(points.index, points.x, points.y, toDataX(view, p, mx), toDataY(view, p, my), rx, ry, visible);
+    setHover(i < 0 ? null : i);
+  };
+
   if (loading) {
     return (
       <div className="flex items-center justify-center h-full">
@@ -28,103 +143,73 @@ export default function ScatterPlot() {
     );
   }
 
-  // Filter out invalid data points and separate Rural/Urban
-  const validData = data.filter(d => 
-    d.Pct_Less_HS != null && !isNaN(d.Pct_Less_HS) &&
-    d.Fatality_Rate != null && !isNaN(d.Fatality_Rate) &&
-    d.Fatality_Rate < 150 && d.Fatality_Rate > 0
-  );
-  
-  console.log('Total data points:', data.length);
-  console.log('Valid data points:', validData.length);
-  
-  const ruralData = validData.filter(d => d.Urbanicity === 'Rural');
-  const urbanData = validData.filter(d => d.Urbanicity === 'Urban');
-  
-  console.log('Rural:', ruralData.length, 'Urban:', urbanData.length);
-
-  // Create hover text
-  const createHoverText = (d: CountyData) => 
-    `<b>County:</b> ${d.FIPS_STR}<br>` +
-    `<b>State:</b> ${d.State_Abbrev}<br>` +
-    `<b>% Without HS:</b> ${d.Pct_Less_HS.toFixed(1)}%<br>` +
-    `<b>Fatality Rate:</b> ${d.Fatality_Rate.toFixed(1)} per 100k<br>` +
-    `<b>Population:</b> ${d.Population >= 1e6 ? (d.Population/1e6).toFixed(1) + 'M' : (d.Population/1e3).toFixed(0) + 'k'}<br>` +
-    `<b>Urbanicity:</b> ${d.Urbanicity}`;
+  const p = plotArea(size.width, size.height);
+  const tip = hover !== null && points ? {
+    left: Math.min(toPxX(view, p, points.x[hover]) + 12, size.width - 230),
+    top: Math.max(toPxY(view, p, points.y[hover]) - 12, 0),
+    fips: points.fips[hover],
+    state: points.state[hover],
+    edu: points.x[hover],
+    rate: points.y[hover],
+    population: points.population[hover],
+    group: URBANICITY[points.group[hover]],
+    trend: points.trend[hover],
+  } : null;
 
   return (
     <div className="w-full h-full p-4">
-      <Plot
-        data={[
-          {
-            x: ruralData.map(d => d.Pct_Less_HS),
-            y: ruralData.map(d => d.Fatality_Rate),
-            mode: 'markers',
-            type: 'scatter',
-            name: 'Rural',
-            marker: {
-              color: COLORS.danger,
-              opacity: 0.6,
-              size: 10
-            },
-            text: ruralData.map(createHoverText),
-            hoverinfo: 'text',
-            hoverlabel: {
-              bgcolor: 'white',
-              font: { size: 12 }
-            }
-          },
-          {
-            x: urbanData.map(d => d.Pct_Less_HS),
-            y: urbanData.map(d => d.Fatality_Rate),
-            mode: 'markers',
-            type: 'scatter',
-            name: 'Urban',
-            marker: {
-              color: COLORS.safety,
-              opacity: 0.6,
-              size: 10
-            },
-            text: urbanData.map(createHoverText),
-            hoverinfo: 'text',
-            hoverlabel: {
-              bgcolor: 'white',
-              font: { size: 12 }
-            }
-          }
-        ]}
-        layout={{
-          title: {
-            text: 'Education vs Fatality Rate by County (2010-2023 Average)',
-            font: { size: 18, color: COLORS.primary }
-          },
-          xaxis: {
-            title: { text: '% Without High School Diploma' },
-            gridcolor: COLORS.grid,
-            range: [0, 50]
-          },
-          yaxis: {
-            title: { text: 'Fatalities per 100k Population' },
-            gridcolor: COLORS.grid,
-            range: [0, 150]
-          },
-          legend: {
-            x: 0.02,
-            y: 0.98,
-            bgcolor: 'rgba(255,255,255,0.8)'
-          },
-          hovermode: 'closest',
-          paper_bgcolor: 'white',
-          plot_bgcolor: 'white',
-          margin: { l: 60, r: 30, t: 60, b: 60 }
-        }}
-        config={{
-          responsive: true,
-          displayModeBar: true,
-          modeBarButtonsToRemove: ['lasso2d', 'select2d']
-        }}
-        style={{ width: '100%', height: '100%' }}
-      />
+      <div ref={containerRef} className="relative w-full h-full select-none">
+        <canvas ref={baseRef} className="absolute inset-0 w-full h-full" />
+        <canvas
+          ref={overlayRef}
+          className="absolute inset-0 w-full h-full"
+          style={{ cursor: dragging ? 'grabbing' : hover !== null ? 'pointer' : 'crosshair' }}
+          onMouseDown={e => { onMouseDown(e); setHover(null); }}
+          onMouseMove={onMouseMove}
+          onMouseUp={endDrag}
+          onMouseLeave={() => { endDrag(); setHover(null); }}
+          onDoubleClick={() => setView(INITIAL_VIEW)}
+        />
+
+        {/* Legend (click to show / hide a group) */}
+        <div
+          className="absolute flex flex-col gap-1 px-2 py-1 text-sm rounded"
+          style={{ left: p.left + 8, top: p.top + 8, backgroundColor: 'rgba(255,255,255,0.8)' }}
+        >
+          {URBANICITY.map((name, g) => (
+            <button
+              key={name}
+              onClick={() => toggleGroup(g)}
+              className="flex items-center gap-2 text-left"
+              style={{ opacity: hidden.includes(g) ? 0.4 : 1 }}
+            >
+              <span className="inline-block w-3 h-3 rounded-full" style={{ backgroundColor: GROUP_COLORS[g] }} />
+              {name} ({counts[g]})
+            </button>
+          ))}
+        </div>
+
+        <div className="absolute text-xs text-gray-500" style={{ right: MARGIN.r, top: 8 }}>
+          Scroll to zoom · drag to pan · double-click to reset
+        </div>
+
+        {tip && (
+          <div
+            className="absolute pointer-events-none bg-white border rounded shadow px-3 py-2 text-xs leading-5"
+            style={{ left: tip.left, top: tip.top, width: 218 }}
+          >
+            <div><b>County:</b> {tip.fips}</div>
+            <div><b>State:</b> {tip.state}</div>
+            <div><b>% Without HS:</b> {tip.edu.toFixed(1)}%</div>
+            <div><b>Fatality Rate:</b> {tip.rate.toFixed(1)} per 100k</div>
+            <div><b>Population:</b> {formatPopulation(tip.population)}</div>
+            <div><b>Urbanicity:</b> {tip.group}</div>
+            {Number.isFinite(tip.trend) && (
+              <div><b>Trend:</b> {tip.trend >= 0 ? '+' : ''}{tip.trend.toFixed(2)} per 100k / year</div>
+            )}
+          </div>
+        )}
+      </div>
     </div>
   );
 }
@@ -0,0 +1,93 @@
+// Uniform-grid spatial index over scatter points (data coordinates), used for hover hit-testing.
+// Points are bucketed once into ~2-per-cell buckets stored CSR-style, so a lookup only scans
+// the handful of cells under the cursor instead of every point.
+
+export interface GridIndex {
+  minX: number;
+  minY: number;
+  cellW: number;
+  cellH: number;
+  nx: number;
+  ny: number;
+  cellStart: Uint32Array;  // length nx * ny + 1; points of cell c are items[cellStart[c]..cellStart[c + 1])
+  items: Uint32Array;      // point ids grouped by cell
+}
+
+export function buildGridIndex(xs: Float32Array, ys: Float32Array, cellsPerAxis?: number): GridIndex {
+  const n = xs.length;
+  let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+  for (let i = 0; i < n; i++) {
+    if (xs[i] < minX) minX = xs[i];
+    if (xs[i] > maxX) maxX = xs[i];
+    if (ys[i] < minY) minY = ys[i];
+    if (ys[i] > maxY) maxY = ys[i];
+  }
+  if (n === 0) {
+    minX = minY = 0;
+    maxX = maxY = 1;
+  }
+
+  const side = cellsPerAxis ?? Math.max(1, Math.ceil(Math.sqrt(n / 2)));
+  const nx = side;
+  const ny = side;
+  const cellW = (maxX - minX) / nx || 1;
+  const cellH = (maxY - minY) / ny || 1;
+
+  // Counting sort of point ids by cell
+  const cellOf = new Uint32Array(n);
+  const cellStart = new Uint32Array(nx * ny + 1);
+  for (let i = 0; i < n; i++) {
+    const cx = Math.min(nx - 1, Math.floor((xs[i] - minX) / cellW));
+    const cy = Math.min(ny - 1, Math.floor((ys[i] - minY) / cellH));
+    cellOf[i] = cy * nx + cx;
+    cellStart[cellOf[i] + 1]++;
+  }
+  for (let c = 0; c < nx * ny; c++) cellStart[c + 1] += cellStart[c];
+  const cursor = cellStart.slice(0, nx * ny);
+  const items = new Uint32Array(n);
+  for (let i = 0; i < n; i++) items[cursor[cellOf[i]]++] = i;
+
+  return { minX, minY, cellW, cellH, nx, ny, cellStart, items };
+}
+
+const clampCell = (v: number, n: number) => Math.max(0, Math.min(n - 1, Math.floor(v)));
+
+// Nearest visible point to (qx, qy) within the ellipse of radii (rx, ry) in data units
+// (a fixed pixel radius converted per axis), or -1 if there is none.
+export function nearestPoint(
+  index: GridIndex,
+  xs: Float32Array,
+  ys: Float32Array,
+  qx: number,
+  qy: number,
+  rx: number,
+  ry: number,
+  visible?: Uint8Array
+): number {
+  const { minX, minY, cellW, cellH, nx, ny, cellStart, items } = index;
+  const cx0 = clampCell((qx - rx - minX) / cellW, nx);
+  const cx1 = clampCell((qx + rx - minX) / cellW, nx);
+  const cy0 = clampCell((qy - ry - minY) / cellH, ny);
+  const cy1 = clampCell((qy + ry - minY) / cellH, ny);
+
+  let best = -1;
+  let bestD = 1;
+  for (let cy = cy0; cy <= cy1; cy++) {
+    for (let cx = cx0; cx <= cx1; cx++) {
+      const c = cy * nx + cx;
+      for (let k = cellStart[c]; k < cellStart[c + 1]; k++) {
+        const i = items[k];
+        if (visible && !visible[i]) continue;
+        const dx = (xs[i] - qx) / rx;
+        const dy = (ys[i] - qy) / ry;
+        const d = dx * dx + dy * dy;
+        // Ties go to the later point, which is drawn on top
+        if (d <= bestD) {
+          bestD = d;
+          best = i;
+        }
+      }
+    }
+  }
+  return best;
+}
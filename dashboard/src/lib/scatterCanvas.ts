@@ -0,0 +1,167 @@
+// Canvas drawing helpers for the scatter plots: view <-> pixel transforms, axis ticks,
+// the static frame (grid, ticks, labels, title), sprite-based points and aggregated bins.
+import { COLORS } from '../types';
+
+export interface View { x0: number; x1: number; y0: number; y1: number }
+export interface PlotArea { left: number; top: number; width: number; height: number }
+
+export const MARGIN = { l: 60, r: 30, t: 60, b: 60 };
+
+export function plotArea(width: number, height: number): PlotArea {
+  return {
+    left: MARGIN.l,
+    top: MARGIN.t,
+    width: Math.max(1, width - MARGIN.l - MARGIN.r),
+    height: Math.max(1, height - MARGIN.t - MARGIN.b),
+  };
+}
+
+export const toPxX = (v: View, p: PlotArea, x: number) => p.left + (x - v.x0) / (v.x1 - v.x0) * p.width;
+export const toPxY = (v: View, p: PlotArea, y: number) => p.top + p.height - (y - v.y0) / (v.y1 - v.y0) * p.height;
+export const toDataX = (v: View, p: PlotArea, px: number) => v.x0 + (px - p.left) / p.width * (v.x1 - v.x0);
+export const toDataY = (v: View, p: PlotArea, py: number) => v.y0 + (p.top + p.height - py) / p.height * (v.y1 - v.y0);
+
+// Round-number ticks (1/2/5 x 10^k steps) covering [lo, hi]
+export function niceTicks(lo: number, hi: number, count = 6): number[] {
+  const raw = (hi - lo) / Math.max(1, count);
+  const mag = Math.pow(10, Math.floor(Math.log10(raw)));
+  const step = [1, 2, 5, 10].map(m => m * mag).find(s => s >= raw) ?? 10 * mag;
+  const ticks: number[] = [];
+  for (let t = Math.ceil(lo / step) * step; t <= hi + step * 1e-9; t += step) {
+    ticks.push(Math.abs(t) < step * 1e-9 ? 0 : t);
+  }
+  return ticks;
+}
+
+const tickLabel = (t: number, step: number) => t.toFixed(Math.max(0, -Math.floor(Math.log10(step))));
+
+// Pre-rendered marker: drawing an image per point is far cheaper than a path fill per point
+export function makeSprite(color: string, diameter: number, dpr: number): HTMLCanvasElement {
+  const sprite = document.createElement('canvas');
+  sprite.width = sprite.height = Math.ceil(diameter * dpr);
+  const sctx = sprite.getContext('2d')!;
+  sctx.fillStyle = color;
+  sctx.beginPath();
+  sctx.arc(sprite.width / 2, sprite.height / 2, sprite.width / 2, 0, 2 * Math.PI);
+  sctx.fill();
+  return sprite;
+}
+
+export function drawFrame(
+  ctx: CanvasRenderingContext2D,
+  width: number,
+  height: number,
+  view: View,
+  labels: { title: string; x: string; y: string }
+) {
+  const p = plotArea(width, height);
+  ctx.fillStyle = 'white';
+  ctx.fillRect(0, 0, width, height);
+
+  ctx.font = '12px sans-serif';
+  ctx.lineWidth = 1;
+  const xt = niceTicks(view.x0, view.x1);
+  const yt = niceTicks(view.y0, view.y1);
+
+  // Grid + tick labels
+  ctx.strokeStyle = COLORS.grid;
+  ctx.fillStyle = COLORS.text;
+  ctx.textAlign = 'center';
+  ctx.textBaseline = 'top';
+  for (const t of xt) {
+    const px = Math.round(toPxX(view, p, t)) + 0.5;
+    ctx.beginPath();
+    ctx.moveTo(px, p.top);
+    ctx.lineTo(px, p.top + p.height);
+    ctx.stroke();
+    ctx.fillText(tickLabel(t, xt[1] - xt[0] || 1), px, p.top + p.height + 6);
+  }
+  ctx.textAlign = 'right';
+  ctx.textBaseline = 'middle';
+  for (const t of yt) {
+    const py = Math.round(toPxY(view, p, t)) + 0.5;
+    ctx.beginPath();
+    ctx.moveTo(p.left, py);
+    ctx.lineTo(p.left + p.width, py);
+    ctx.stroke();
+    ctx.fillText(tickLabel(t, yt[1] - yt[0] || 1), p.left - 6, py);
+  }
+
+  // Axis titles and chart title
+  ctx.font = '14px sans-serif';
+  ctx.textAlign = 'center';
+  ctx.textBaseline = 'bottom';
+  ctx.fillText(labels.x, p.left + p.width / 2, height - 12);
+  ctx.save();
+  ctx.translate(16, p.top + p.height / 2);
+  ctx.rotate(-Math.PI / 2);
+  ctx.textBaseline = 'top';
+  ctx.fillText(labels.y, 0, 0);
+  ctx.restore();
+
+  ctx.font = '18px sans-serif';
+  ctx.fillStyle = COLORS.primary;
+  ctx.textBaseline = 'middle';
+  ctx.fillText(labels.title, width / 2, MARGIN.t / 2);
+}
+
+// Draw every visible point of one group (all of them when `visible` is null), clipped to the plot area
+export function drawPoints(
+  ctx: CanvasRenderingContext2D,
+  p: PlotArea,
+  view: View,
+  xs: ArrayLike<number>,
+  ys: ArrayLike<number>,
+  groups: ArrayLike<number>,
+  visible: ArrayLike<number> | null,
+  group: number,
+  sprite: HTMLCanvasElement,
+  diameter: number,
+  opacity: number
+) {
+  const r = diameter / 2;
+  ctx.save();
+  ctx.beginPath();
+  ctx.rect(p.left, p.top, p.width, p.height);
+  ctx.clip();
+  ctx.globalAlpha = opacity;
+  for (let i = 0; i < xs.length; i++) {
+    if (groups[i] !== group || (visible && !visible[i])) continue;
+    const px = toPxX(view, p, xs[i]);
+    const py = toPxY(view, p, ys[i]);
+    if (px < p.left - r || px > p.left + p.width + r || py < p.top - r || py > p.top + p.height + r) continue;
+    ctx.drawImage(sprite, px - r, py - r, diameter, diameter);
+  }
+  ctx.restore();
+}
+
+// Aggregated bins are drawn as circles at the bin mean, with area growing with the count
+export const binRadius = (count: number) => Math.min(12, 2 + 1.5 * Math.sqrt(count));
+
+export function drawBins(
+  ctx: CanvasRenderingContext2D,
+  p: PlotArea,
+  view: View,
+  xs: ArrayLike<number>,
+  ys: ArrayLike<number>,
+  groups: ArrayLike<number>,
+  counts: ArrayLike<number>,
+  group: number,
+  color: string,
+  opacity: number
+) {
+  ctx.save();
+  ctx.beginPath();
+  ctx.rect(p.left, p.top, p.width, p.height);
+  ctx.clip();
+  ctx.globalAlpha = opacity;
+  ctx.fillStyle = color;
+  for (let i = 0; i < xs.length; i++) {
+    if (groups[i] !== group) continue;
+    const r = binRadius(counts[i]);
+    ctx.beginPath();
+    ctx.arc(toPxX(view, p, xs[i]), toPxY(view, p, ys[i]), r, 0, 2 * Math.PI);
+    ctx.fill();
+  }
+  ctx.restore();
+}
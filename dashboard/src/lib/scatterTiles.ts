@@ -0,0 +1,47 @@
+// Level / tile selection and on-demand loading for the county-year scatter tiles.
+import type { ScatterTile, TileManifest } from '../types';
+import type { View } from './scatterCanvas';
+
+export const TILE_URL = '/data/scatter_tiles';
+const BIN_PX = 10;  // aim for bins about this many screen pixels across
+
+export const tileKey = (z: number, tx: number, ty: number) => `${z}/${tx}_${ty}`;
+
+// Deepest level whose bins are still at least BIN_PX wide on screen along both axes
+export function levelForView(m: TileManifest, view: View, plotWidth: number, plotHeight: number): number {
+  const [x0, x1, y0, y1] = m.extent;
+  const zoom = Math.min(
+    plotWidth * (x1 - x0) / (view.x1 - view.x0),
+    plotHeight * (y1 - y0) / (view.y1 - view.y0),
+  ) / (m.bins * BIN_PX);
+  return Math.max(0, Math.min(m.rawLevel, Math.floor(Math.log2(Math.max(zoom, 1)))));
+}
+
+// Non-empty tiles of level z that intersect the view
+export function visibleTiles(m: TileManifest, view: View, z: number): [number, number][] {
+  const [x0, x1, y0, y1] = m.extent;
+  const side = 2 ** z;
+  const tx0 = Math.floor((view.x0 - x0) / (x1 - x0) * side);
+  const tx1 = Math.floor((view.x1 - x0) / (x1 - x0) * side);
+  const ty0 = Math.floor((view.y0 - y0) / (y1 - y0) * side);
+  const ty1 = Math.floor((view.y1 - y0) / (y1 - y0) * side);
+  return (m.tiles[z] ?? []).filter(([tx, ty]) => tx >= tx0 && tx <= tx1 && ty >= ty0 && ty <= ty1);
+}
+
+// The tile covering (tx, ty) of level z at a coarser level
+export function ancestor(z: number, tx: number, ty: number, level: number): [number, number] {
+  const shift = z - level;
+  return [tx >> shift, ty >> shift];
+}
+
+export async function fetchManifest(base = TILE_URL): Promise<TileManifest> {
+  const res = await fetch(`${base}/index.json`);
+  if (!res.ok) throw new Error(`${res.status} ${res.statusText}`);
+  return res.json();
+}
+
+export async function fetchTile(z: number, tx: number, ty: number, base = TILE_URL): Promise<ScatterTile> {
+  const res = await fetch(`${base}/${tileKey(z, tx, ty)}.json`);
+  if (!res.ok) throw new Error(`${res.status} ${res.statusText}`);
+  return res.json();
+}
@@ -0,0 +1,66 @@
+// Wheel zoom (around the cursor), drag pan and reset for a canvas plot drawn with scatterCanvas.
+import { useEffect, useRef, useState } from 'react';
+import type { MouseEvent as ReactMouseEvent, RefObject } from 'react';
+import type { View } from './scatterCanvas';
+import { plotArea, toDataX, toDataY } from './scatterCanvas';
+
+const localPos = (e: ReactMouseEvent<HTMLCanvasElement>) => {
+  const r = e.currentTarget.getBoundingClientRect();
+  return [e.clientX - r.left, e.clientY - r.top];
+};
+
+// `ready` should change when the canvas mounts so the wheel listener gets attached
+export function usePanZoom(canvasRef: RefObject<HTMLCanvasElement | null>, initial: View, ready: unknown) {
+  const [view, setView] = useState<View>(initial);
+  const [dragging, setDragging] = useState(false);
+  const dragRef = useRef<{ x: number; y: number; view: View } | null>(null);
+
+  // Native listener so the page does not scroll under the plot
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    if (!canvas) return;
+    const onWheel = (e: WheelEvent) => {
+      e.preventDefault();
+      const r = canvas.getBoundingClientRect();
+      const p = plotArea(r.width, r.height);
+      const factor = Math.exp(e.deltaY * 0.0015);
+      setView(v => {
+        const cx = toDataX(v, p, e.clientX - r.left);
+        const cy = toDataY(v, p, e.clientY - r.top);
+        return {
+          x0: cx + (v.x0 - cx) * factor, x1: cx + (v.x1 - cx) * factor,
+          y0: cy + (v.y0 - cy) * factor, y1: cy + (v.y1 - cy) * factor,
+        };
+      });
+    };
+    canvas.addEventListener('wheel', onWheel, { passive: false });
+    return () => canvas.removeEventListener('wheel', onWheel);
+  }, [canvasRef, ready]);
+
+  const onMouseDown = (e: ReactMouseEvent<HTMLCanvasElement>) => {
+    const [x, y] = localPos(e);
+    dragRef.current = { x, y, view };
+    setDragging(true);
+  };
+
+  const endDrag = () => {
+    dragRef.current = null;
+    setDragging(false);
+  };
+
+  // Pans while a drag is in progress and returns true; otherwise returns the cursor
+  // position (plot pixels) for hit-testing.
+  const panMove = (e: ReactMouseEvent<HTMLCanvasElement>): true | [number, number] => {
+    const [mx, my] = localPos(e);
+    const drag = dragRef.current;
+    if (!drag) return [mx, my];
+    const r = e.currentTarget.getBoundingClientRect();
+    const p = plotArea(r.width, r.height);
+    const dx = (mx - drag.x) / p.width * (drag.view.x1 - drag.view.x0);
+    const dy = (my - drag.y) / p.height * (drag.view.y1 - drag.view.y0);
+    setView({ x0: drag.view.x0 - dx, x1: drag.view.x1 - dx, y0: drag.view.y0 + dy, y1: drag.view.y1 + dy });
+    return true;
+  };
+
+  return { view, setView, dragging, onMouseDown, endDrag, panMove };
+}
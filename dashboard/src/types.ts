@@ -1,4 +1,5 @@
 // Type definitions for the dashboard
+import type { GridIndex } from './lib/gridIndex';
 
 export interface CountyData {
   FIPS_STR: string;
@@ -11,8 +12,99 @@ export interface CountyData {
   Drunk_Rate_Per_100k: number;
   Dark_Pct: number;
   Weather_Pct: number;
+  Fatality_Trend?: number | null;
+  Fatality_LISA?: LisaCluster | null;
+  Edu_LISA?: LisaCluster | null;
 }
 
+// Scatter points as parsed by the scatter worker: one entry per county in every array.
+// Trend is NaN where unavailable.
+export interface ScatterPoints {
+  x: Float32Array;            // Pct_Less_HS
+  y: Float32Array;            // Fatality_Rate
+  group: Uint8Array;          // index into URBANICITY
+  fips: string[];
+  state: string[];
+  population: Float32Array;
+  trend: Float32Array;
+  index: GridIndex;
+}
+
+export const URBANICITY = ['Rural', 'Urban'] as const;
+
+export type ScatterRequest =
+  | { type: 'load'; url: string }
+  | { type: 'filter'; hidden: number[] };
+
+export type ScatterResponse =
+  | { type: 'loaded'; points: ScatterPoints; total: number }
+  | { type: 'filtered'; visible: Uint8Array }
+  | { type: 'error'; message: string };
+
+// County-year scatter tiles written by prepare_data.py (analysis-code/scatter_tiles.py).
+// Levels below rawLevel hold per-bin aggregates; rawLevel holds the points themselves.
+export interface TileManifest {
+  x: string;
+  y: string;
+  extent: [number, number, number, number];  // x0, x1, y0, y1
+  bins: number;                              // bins per tile side
+  rawLevel: number;
+  groups: string[];
+  years: [number, number];
+  points: number;
+  tiles: Record<string, [number, number][]>; // level -> non-empty [tx, ty]
+}
+
+export interface AggregateTile {
+  z: number;
+  tx: number;
+  ty: number;
+  bins: { x: number[]; y: number[]; group: number[]; count: number[] };  // x / y are bin means
+}
+
+export interface RawTile {
+  z: number;
+  tx: number;
+  ty: number;
+  points: {
+    x: number[];
+    y: number[];
+    group: number[];
+    fips: string[];
+    state: string[];
+    year: number[];
+    population: number[];
+  };
+}
+
+export type ScatterTile = AggregateTile | RawTile;
+
+// Crash timing cube written by prepare_data.py (analysis-code/time_cube.py): fatalities as flat
+// row-major arrays, edu group x urbanicity x year x (weekday | month) x hour
+export interface TimeCube {
+  eduGroups: string[];
+  urbanicity: string[];
+  years: number[];
+  weekdays: string[];
+  months: string[];
+  weekdayHour: number[];
+  monthHour: number[];
+}
+
+// Similar counties written by prepare_data.py (analysis-code/similar_counties.py): for every county,
+// its k nearest standardized risk profiles as flat row-major fips.length x k arrays, nearest first
+export interface SimilarCounties {
+  features: string[];
+  mean: number[];
+  std: number[];
+  k: number;
+  fips: string[];
+  neighbors: number[];   // positions in fips
+  distance: number[];    // in standard deviations
+}
+
+export type LisaCluster = 'High-High' | 'Low-Low' | 'Low-High' | 'High-Low' | 'Not significant' | 'No neighbors';
+
 export interface StateData {
   State_Abbrev: string;
   Fatality_Rate: number;
@@ -38,3 +130,13 @@ export const COLORS = {
   grid: '#DDDDDD',
   bg: '#FFFFFF'
 };
+
+// LISA cluster colors (match the MAP_LISA_* report figures)
+export const LISA_COLORS: Record<LisaCluster, string> = {
+  'High-High': COLORS.danger,
+  'Low-Low': COLORS.safety,
+  'Low-High': '#A6D9F0',
+  'High-Low': '#F2B27F',
+  'Not significant': '#EEEEEE',
+  'No neighbors': '#FFFFFF'
+};
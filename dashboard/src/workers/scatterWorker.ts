@@ -0,0 +1,68 @@
+// Scatter data worker: fetches and parses county_scatter.json, filters invalid rows, packs the
+// points into typed arrays with a grid index for hover, and answers visibility (legend) filters.
+// All of this stays off the main thread; arrays are transferred, not copied.
+import { buildGridIndex } from '../lib/gridIndex';
+import type { CountyData, ScatterPoints, ScatterRequest, ScatterResponse } from '../types';
+import { URBANICITY } from '../types';
+
+const ctx = self as unknown as Worker;
+
+// The worker keeps its own copy of the groups so it can filter after the arrays are transferred
+let groups: Uint8Array | null = null;
+
+const isValid = (d: CountyData) =>
+  d.Pct_Less_HS != null && !isNaN(d.Pct_Less_HS) &&
+  d.Fatality_Rate != null && !isNaN(d.Fatality_Rate) &&
+  d.Fatality_Rate < 150 && d.Fatality_Rate > 0;
+
+function parse(rows: CountyData[]): ScatterPoints {
+  const valid = rows.filter(isValid);
+  const n = valid.length;
+  const x = new Float32Array(n);
+  const y = new Float32Array(n);
+  const group = new Uint8Array(n);
+  const population = new Float32Array(n);
+  const trend = new Float32Array(n);
+  const fips: string[] = new Array(n);
+  const state: string[] = new Array(n);
+  valid.forEach((d, i) => {
+    x[i] = d.Pct_Less_HS;
+    y[i] = d.Fatality_Rate;
+    group[i] = Math.max(0, URBANICITY.indexOf(d.Urbanicity));
+    population[i] = d.Population;
+    trend[i] = d.Fatality_Trend ?? NaN;
+    fips[i] = d.FIPS_STR;
+    state[i] = d.State_Abbrev;
+  });
+  return { x, y, group, fips, state, population, trend, index: buildGridIndex(x, y) };
+}
+
+function visibility(hidden: number[]): Uint8Array {
+  const g = groups ?? new Uint8Array(0);
+  const visible = new Uint8Array(g.length);
+  for (let i = 0; i < g.length; i++) visible[i] = hidden.includes(g[i]) ? 0 : 1;
+  return visible;
+}
+
+const reply = (msg: ScatterResponse, transfer: Transferable[] = []) => ctx.postMessage(msg, transfer);
+const buffers = (...arrays: ArrayBufferView[]) => arrays.map(a => a.buffer as ArrayBuffer);
+
+ctx.addEventListener('message', async (e: MessageEvent<ScatterRequest>) => {
+  const msg = e.data;
+  try {
+    if (msg.type === 'load') {
+      const rows: CountyData[] = await fetch(msg.url).then(r => r.json());
+      const points = parse(rows);
+      groups = points.group.slice();
+      reply({ type: 'loaded', points, total: rows.length }, buffers(
+        points.x, points.y, points.group, points.population, points.trend,
+        points.index.cellStart, points.index.items,
+      ));
+    } else if (msg.type === 'filter') {
+      const visible = visibility(msg.hidden);
+      reply({ type: 'filtered', visible }, buffers(visible));
+    }
+  } catch (err) {
+    reply({ type: 'error', message: String(err) });
+  }
+});
@@ -5,33 +5,166 @@ Automatically downloads FARS and Education data required for the analysis.
 
 Usage:
     python download_data.py
+    python download_data.py --years 2019 2020 --workers 2
+    python download_data.py --base-url http://127.0.0.1:8000/FARS   # local mirror / test server
+    python download_data.py --extract    # also unpack accident.csv into FARS{year}/ folders
 
 This script will:
 1. Create the datasets/ folder
-2. Download FARS accident data (2010-2023) from NHTSA
-3. Download Education data (2010-2023) from USDA ERS
-4. Extract and organize files in the correct structure
+2. Download FARS accident data (2010-2023) from NHTSA, several years at a time
+3. Resume interrupted downloads (HTTP Range) and retry failures with backoff
+4. Pin each archive's size and SHA-256 in datasets/fars_manifest.json on its first
+   download and verify later downloads against them (trust on first use: a year
+   only gets a tamper check once the manifest holds an entry for it, e.g. from a
+   manifest copied over from a trusted machine)
+5. Keep the archives as datasets/FARS{year}.zip (the analysis reads them without extracting)
+6. Check for Education data (2010-2023) from USDA ERS
 """
 
 import os
 import sys
-import urllib.request
-import zipfile
+import argparse
+import hashlib
+import http.client
+import json
+import random
 import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from urllib.parse import urljoin, urlsplit
 
 # Configuration
 BASE_DIR = Path(__file__).parent
 DATASETS_DIR = BASE_DIR / "datasets"
+MANIFEST_NAME = "fars_manifest.json"
+
+FARS_YEARS = range(2010, 2024)
 
 # FARS data URLs (NHTSA)
 # Format: https://www.nhtsa.gov/file-downloads/download?p=nhtsa/downloads/FARS/{year}/National/FARS{year}NationalCSV.zip
 FARS_BASE_URL = "https://static.nhtsa.gov/nhtsa/downloads/FARS"
 
+# Members that must be present in each FARS archive, and the only ones extracted with --extract
+# (matched case-insensitively)
+REQUIRED_MEMBERS = ["accident.csv"]
+
+# Marker left in FARS{year}/ by fetch_crash_api.py: the folder holds preliminary Crash API
+# records, which the published archive replaces as soon as it can be downloaded
+PRELIMINARY_MARKER = "PRELIMINARY.json"
+
+# Download tuning
+MAX_WORKERS = 4
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # seconds, doubled on every retry
+CHUNK_SIZE = 1 << 16
+TIMEOUT = 60
+
 # Education data URLs (USDA ERS - Economic Research Service)
 # These are county-level education statistics
 EDUCATION_BASE_URL = "https://www.ers.usda.gov/webdocs/DataFiles/48747"
 
+
+class DownloadError(Exception):
+    pass
+
+
+class NotFoundError(DownloadError):
+    pass
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, one per (thread, host) so workers reuse sockets."""
+
+    def __init__(self, timeout=TIMEOUT):
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self, scheme, netloc):
+        conns = self.local.__dict__.setdefault('conns', {})
+        key = (scheme, netloc)
+        if key not in conns:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conns[key] = cls(netloc, timeout=self.timeout)
+        return conns[key]
+
+    def _drop(self, scheme, netloc):
+        conn = self.local.__dict__.get('conns', {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def request(self, url, headers=None, max_redirects=5):
+        """GET `url`, following redirects. Caller must read the response fully."""
+        for _ in range(max_redirects + 1):
+            parts = urlsplit(url)
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', path or '/', headers=headers or {})
+                resp = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                # Stale keep-alive socket: reconnect once before giving up
+                self._drop(parts.scheme, parts.netloc)
+                conn = self._connection(parts.scheme, parts.netloc)
+                conn.request('GET', path or '/', headers=headers or {})
+                resp = conn.getresponse()
+            if resp.status in (301, 302, 303, 307, 308):
+                resp.read()
+                url = urljoin(url, resp.getheader('Location'))
+                continue
+            return resp
+        raise DownloadError(f"Too many redirects for {url}")
+
+
+class Progress:
+    """Aggregate progress line across all concurrent downloads."""
+
+    def __init__(self, n_files, enabled=True):
+        self.lock = threading.Lock()
+        self.n_files = n_files
+        self.enabled = enabled
+        self.totals = {}
+        self.done = {}
+        self.finished = 0
+        self.last_draw = 0.0
+
+    def start(self, key, total, already=0):
+        with self.lock:
+            self.totals[key] = total
+            self.done[key] = already
+        self.draw()
+
+    def advance(self, key, n):
+        with self.lock:
+            self.done[key] = self.done.get(key, 0) + n
+        self.draw()
+
+    def finish(self):
+        with self.lock:
+            self.finished += 1
+        self.draw(force=True)
+
+    def message(self, text):
+        with self.lock:
+            print(("\r" + " " * 78 + "\r" if self.enabled else "") + text, flush=True)
+        self.draw(force=True)
+
+    def draw(self, force=False):
+        if not self.enabled:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_draw < 0.2:
+                return
+            self.last_draw = now
+            done = sum(self.done.values()) / 1e6
+            total = sum(t for t in self.totals.values() if t) / 1e6
+            print(f"\r   ⬇️  {done:8.1f} / {total:.1f} MB   ({self.finished}/{self.n_files} years done)",
+                  end='', flush=True)
+
+
 def print_header():
     print("=" * 60)
     print("  Traffic Safety Analysis - Dataset Downloader")
@@ -44,60 +177,227 @@ def create_directories():
     DATASETS_DIR.mkdir(exist_ok=True)
     print(f"   Created: {DATASETS_DIR}")
 
-def download_file(url, dest_path, desc=""):
-    """Download a file with progress indicator."""
-    print(f"   ⬇️  Downloading: {desc or url.split('/')[-1]}")
-    try:
-        urllib.request.urlretrieve(url, dest_path)
+def load_manifest(path=None):
+    path = path or DATASETS_DIR / MANIFEST_NAME
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(manifest, path=None):
+    path = path or DATASETS_DIR / MANIFEST_NAME
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def sha256_of(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fars_urls(year, base_url=FARS_BASE_URL):
+    # Try different URL patterns (NHTSA has changed their URL structure over years)
+    urls = [f"{base_url}/{year}/National/FARS{year}NationalCSV.zip"]
+    if base_url == FARS_BASE_URL:
+        urls.append(f"https://www.nhtsa.gov/file-downloads/download?p=nhtsa/downloads/FARS/{year}/National/FARS{year}NationalCSV.zip")
+    return urls
+
+def download_file(pool, url, dest_path, progress, key):
+    """
+    Download `url` to `dest_path`, resuming from `dest_path.part` with a Range request.
+    Returns the final size in bytes.
+    """
+    part = dest_path.with_name(dest_path.name + '.part')
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+    resp = pool.request(url, headers)
+    if resp.status == 416:
+        # Nothing left to fetch: the partial file is already complete
+        resp.read()
+        total = int(resp.getheader('Content-Range', '*/0').split('/')[-1] or 0)
+        if total and total == offset:
+            os.replace(part, dest_path)
+            return total
+        part.unlink()
+        raise DownloadError("stale partial download discarded")
+    if resp.status == 206:
+        total = int(resp.getheader('Content-Range').split('/')[-1])
+        mode = 'ab'
+    elif resp.status == 200:
+        # Server ignored the Range header: start over
+        total = int(resp.getheader('Content-Length') or 0)
+        offset, mode = 0, 'wb'
+    else:
+        resp.read()
+        if resp.status == 404:
+            raise NotFoundError("HTTP 404")
+        raise DownloadError(f"HTTP {resp.status}")
+
+    progress.start(key, total, offset)
+    with open(part, mode) as f:
+        while True:
+            chunk = resp.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            progress.advance(key, len(chunk))
+
+    size = part.stat().st_size
+    if total and size != total:
+        # Connection dropped: keep the .part file for the next attempt to resume
+        raise ConnectionError(f"incomplete download ({size}/{total} bytes)")
+    os.replace(part, dest_path)
+    return size
+
+def verify_archive(zip_path, entry):
+    """Check size and SHA-256 against a manifest entry. Returns the observed (size, sha256)."""
+    size = zip_path.stat().st_size
+    if entry.get('size') and entry['size'] != size:
+        raise DownloadError(f"size mismatch: expected {entry['size']}, got {size}")
+    digest = sha256_of(zip_path)
+    if entry.get('sha256') and entry['sha256'] != digest:
+        raise DownloadError("SHA-256 mismatch")
+    return size, digest
+
+def extract_members(zip_path, dest_dir, members=REQUIRED_MEMBERS):
+    """Extract only the wanted members (by case-insensitive basename), flattened into dest_dir."""
+    wanted = {m.lower() for m in members}
+    found = set()
+    dest_dir.mkdir(exist_ok=True)
+    with zipfile.ZipFile(zip_path) as z:
+        for info in z.infolist():
+            name = os.path.basename(info.filename).lower()
+            if name in wanted and name not in found:
+                with z.open(info) as src, open(dest_dir / name, 'wb') as dst:
+                    while True:
+                        chunk = src.read(1 << 20)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                found.add(name)
+    missing = wanted - found
+    if missing:
+        raise DownloadError(f"archive is missing {', '.join(sorted(missing))}")
+
+def check_members(zip_path, members=REQUIRED_MEMBERS):
+    with zipfile.ZipFile(zip_path) as z:
+        names = {os.path.basename(n).lower() for n in z.namelist()}
+    missing = {m.lower() for m in members} - names
+    if missing:
+        raise DownloadError(f"archive is missing {', '.join(sorted(missing))}")
+
+def is_preliminary(fars_dir):
+    """The folder holds records written by fetch_crash_api.py, not a published release."""
+    return (fars_dir / PRELIMINARY_MARKER).exists()
+
+def fars_year_present(year):
+    """A year is available as a downloaded archive or an extracted folder (not preliminary API records)."""
+    fars_dir = DATASETS_DIR / f"FARS{year}"
+    if (DATASETS_DIR / f"FARS{year}.zip").exists():
         return True
-    except Exception as e:
-        print(f"   ❌ Failed: {e}")
+    if not fars_dir.is_dir() or is_preliminary(fars_dir):
         return False
+    return any(p.name.lower() in REQUIRED_MEMBERS for p in fars_dir.iterdir())
+
+def download_year(year, pool, progress, manifest, manifest_lock, base_url=FARS_BASE_URL, extract=False):
+    """Download and verify one FARS year (and optionally extract it). Returns True on success."""
+    fars_dir = DATASETS_DIR / f"FARS{year}"
+    zip_path = DATASETS_DIR / f"FARS{year}.zip"
+    key = str(year)
+    entry = manifest.get(key, {})
+
+    missing = set()
+    for attempt in range(MAX_RETRIES):
+        for url in fars_urls(year, base_url):
+            if url in missing:
+                continue
+            try:
+                if not zip_path.exists():
+                    download_file(pool, url, zip_path, progress, key)
+                size, digest = verify_archive(zip_path, entry)
+                check_members(zip_path)
+                if fars_dir.is_dir() and is_preliminary(fars_dir):
+                    # The published release supersedes the preliminary records
+                    shutil.rmtree(fars_dir)
+                    progress.message(f"   ↻ FARS{year}: replacing preliminary Crash API records")
+                if extract:
+                    extract_members(zip_path, fars_dir)
+            except zipfile.BadZipFile:
+                zip_path.unlink(missing_ok=True)
+                progress.message(f"   ⚠️  FARS{year}: corrupt archive, re-downloading")
+                continue
+            except NotFoundError:
+                missing.add(url)
+                continue
+            except DownloadError as e:
+                # A bad archive must not be resumed from
+                if zip_path.exists():
+                    zip_path.unlink()
+                progress.message(f"   ⚠️  FARS{year}: {e}")
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                # Network error: keep the .part file so the next attempt resumes
+                progress.message(f"   ⚠️  FARS{year}: {e}")
+                continue
+
+            if not entry.get('sha256'):
+                # First verified download: pin it in the manifest
+                with manifest_lock:
+                    manifest[key] = {'url': url, 'size': size, 'sha256': digest}
+                    save_manifest(manifest)
+            if extract:
+                zip_path.unlink()  # Remove ZIP after extraction
+            progress.finish()
+            progress.message(f"   ✓ FARS{year} downloaded and verified")
+            return True
 
-def download_fars_data():
-    """Download FARS data for years 2010-2023."""
+        if len(missing) == len(fars_urls(year, base_url)):
+            break
+        delay = BACKOFF_BASE * 2 ** attempt * (1 + random.random())
+        time.sleep(delay)
+
+    progress.finish()
+    progress.message(f"   ❌ Could not download FARS{year} - you may need to download manually")
+    return False
+
+def download_fars_data(years=FARS_YEARS, workers=MAX_WORKERS, base_url=FARS_BASE_URL, extract=False, show_progress=True):
+    """Download FARS data for the requested years concurrently."""
     print("\n📊 Downloading FARS (Fatality Analysis Reporting System) Data...")
     print("   Source: NHTSA (National Highway Traffic Safety Administration)")
     print()
-    
-    for year in range(2010, 2024):
-        fars_dir = DATASETS_DIR / f"FARS{year}"
-        
+
+    todo = []
+    for year in years:
         # Skip if already exists
-        if fars_dir.exists() and (fars_dir / "accident.csv").exists():
+        if fars_year_present(year):
             print(f"   ✓ FARS{year} already exists, skipping...")
             continue
-        
-        # Download ZIP file
-        # Try different URL patterns (NHTSA has changed their URL structure over years)
-        urls_to_try = [
-            f"{FARS_BASE_URL}/{year}/National/FARS{year}NationalCSV.zip",
-            f"https://www.nhtsa.gov/file-downloads/download?p=nhtsa/downloads/FARS/{year}/National/FARS{year}NationalCSV.zip",
-        ]
-        
-        zip_path = DATASETS_DIR / f"FARS{year}.zip"
-        downloaded = False
-        
-        for url in urls_to_try:
-            if download_file(url, zip_path, f"FARS{year}"):
-                downloaded = True
-                break
-        
-        if not downloaded:
-            print(f"   ⚠️  Could not download FARS{year} - you may need to download manually")
-            print(f"      Visit: https://www.nhtsa.gov/research-data/fatality-analysis-reporting-system-fars")
-            continue
-        
-        # Extract ZIP
-        print(f"   📦 Extracting FARS{year}...")
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as z:
-                fars_dir.mkdir(exist_ok=True)
-                z.extractall(fars_dir)
-            zip_path.unlink()  # Remove ZIP after extraction
-            print(f"   ✓ FARS{year} extracted successfully")
-        except Exception as e:
-            print(f"   ❌ Extraction failed: {e}")
+        todo.append(year)
+    if not todo:
+        return {}
+
+    manifest = load_manifest()
+    manifest_lock = threading.Lock()
+    pool = ConnectionPool()
+    progress = Progress(len(todo), enabled=show_progress)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {ex.submit(download_year, y, pool, progress, manifest, manifest_lock, base_url, extract): y for y in todo}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+    if show_progress:
+        print()
+
+    failed = sorted(y for y, ok in results.items() if not ok)
+    if failed:
+        print(f"   ⚠️  Failed years: {', '.join(map(str, failed))}")
+        print(f"      Visit: https://www.nhtsa.gov/research-data/fatality-analysis-reporting-system-fars")
+    return results
 
 def download_education_data():
     """Download Education data for years 2010-2023."""
@@ -131,8 +431,8 @@ def print_summary():
     print("  Download Summary")
     print("=" * 60)
     
-    # Count FARS directories
-    fars_count = len([d for d in DATASETS_DIR.iterdir() if d.is_dir() and d.name.startswith("FARS")])
+    # Count FARS years (archive or extracted folder)
+    fars_count = len([y for y in FARS_YEARS if fars_year_present(y)])
     edu_count = len([f for f in DATASETS_DIR.iterdir() if f.name.startswith("Education") and f.suffix == ".csv"])
     
     print(f"\n   FARS datasets found:      {fars_count}/14")
@@ -150,7 +450,17 @@ def print_summary():
     print("      2. Check the 'output/' folder for visualizations")
     print()
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Download FARS and Education datasets.")
+    parser.add_argument('--years', type=int, nargs='+', default=list(FARS_YEARS), help="FARS years to fetch")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Concurrent downloads")
+    parser.add_argument('--base-url', default=FARS_BASE_URL, help="Mirror serving {year}/National/FARS{year}NationalCSV.zip")
+    parser.add_argument('--extract', action='store_true', help="Extract accident.csv into FARS{year}/ and remove the ZIP")
+    parser.add_argument('--no-progress', action='store_true', help="Disable the progress line")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     print_header()
     
     # Check Python version
@@ -159,7 +469,7 @@ def main():
         sys.exit(1)
     
     create_directories()
-    download_fars_data()
+    download_fars_data(args.years, args.workers, args.base_url.rstrip('/'), args.extract, not args.no_progress)
     download_education_data()
     print_summary()
 
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Preliminary-Year Crash Fetcher
+Fetches FARS accident records from NHTSA's Crash API for years that are not
+(yet) published as the bulk ZIPs download_data.py targets.
+
+Usage:
+    python fetch_crash_api.py --years 2024
+    python fetch_crash_api.py --years 2024 --states 6 48 --concurrency 8
+    python fetch_crash_api.py --years 2024 --base-url http://127.0.0.1:8000/CrashAPI   # local stand-in server
+    python fetch_crash_api.py --years 2024 --refresh    # ignore cached responses
+
+This script will:
+1. Request the accident table one (state, year) at a time, several requests at once
+   over a small pool of keep-alive connections (asyncio, standard library only)
+2. Follow pages until a short or repeated page, and retry failures with backoff
+3. Cache every successful response in datasets/cache/crash_api/, keyed by the request URL
+   (entries older than CACHE_MAX_AGE_DAYS are fetched again: preliminary data is revised)
+4. Normalize the records to the accident.csv columns the analysis reads and write
+   datasets/FARS{year}/accident.csv (published years are skipped), where ingest.load_data()
+   and the crash-point stages pick the year up like a downloaded one. A PRELIMINARY.json
+   marker next to it tells download_data.py to replace the folder with the published release.
+
+Defaults (base URL, page size, cache folder, ...) are the module constants at
+call time, so they can be overridden on the module as well as per call.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import pandas as pd
+
+from download_data import PRELIMINARY_MARKER, REQUIRED_MEMBERS
+
+# Configuration
+BASE_DIR = Path(__file__).parent
+DATASETS_DIR = BASE_DIR / "datasets"
+CACHE_DIR = DATASETS_DIR / "cache" / "crash_api"
+
+API_BASE_URL = "https://crashviewer.nhtsa.dot.gov/CrashAPI"
+ENDPOINT = "FARSData/GetFARSData"
+
+# State FIPS codes (50 states + DC)
+STATES = [1, 2, 4, 5, 6, 8, 9, 10, 11, 12, 13, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29, 30,
+          31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 44, 45, 46, 47, 48, 49, 50, 51, 53, 54, 55, 56]
+
+# The accident.csv columns read by ingest.load_data, hotspots and the time cube, in file order
+ACCIDENT_COLUMNS = ['STATE', 'ST_CASE', 'COUNTY', 'MONTH', 'DAY_WEEK', 'HOUR', 'LATITUDE', 'LONGITUD',
+                    'LGT_COND', 'WEATHER', 'FATALS', 'DRUNK_DR', 'YEAR']
+# API field names (upper-cased) that differ from the accident.csv ones
+FIELD_ALIASES = {'STATE_CASE': 'ST_CASE', 'STCASE': 'ST_CASE', 'LONGITUDE': 'LONGITUD', 'LAT': 'LATITUDE',
+                 'CASEYEAR': 'YEAR', 'WEATHER1': 'WEATHER', 'DRUNKDR': 'DRUNK_DR', 'DAYWEEK': 'DAY_WEEK'}
+
+# Request tuning
+MAX_CONCURRENCY = 4
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # seconds, doubled on every retry
+RETRY_STATUS = {429, 500, 502, 503, 504}
+TIMEOUT = 60
+PAGE_SIZE = 5000
+CACHE_MAX_AGE_DAYS = 7
+
+
+class ApiError(Exception):
+    pass
+
+
+class NotFoundError(ApiError):
+    pass
+
+
+class AsyncConnectionPool:
+    """Idle keep-alive HTTP/1.1 connections per (scheme, host, port), reused across requests."""
+
+    def __init__(self):
+        self.idle = {}
+
+    async def _open(self, key):
+        scheme, host, port = key
+        return await asyncio.open_connection(host, port, ssl=True if scheme == 'https' else None)
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            self.idle.setdefault(key, []).append(conn)
+        else:
+            conn[1].close()
+
+    async def close(self):
+        for conns in self.idle.values():
+            for _, writer in conns:
+                writer.close()
+        self.idle.clear()
+
+    async def request(self, url, max_redirects=5):
+        """GET `url`, following redirects. Returns (status, headers with lower-case names, body bytes)."""
+        for _ in range(max_redirects + 1):
+            parts = urlsplit(url)
+            port = parts.port or (443 if parts.scheme == 'https' else 80)
+            key = (parts.scheme, parts.hostname, port)
+            path = (parts.path or '/') + (f"?{parts.query}" if parts.query else "")
+            request = (f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\n"
+                       "Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n").encode('latin1')
+
+            reused = bool(self.idle.get(key))
+            conn = self.idle[key].pop() if reused else await self._open(key)
+            try:
+                status, headers, body, keep = await self._exchange(conn, request)
+            except (OSError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if not reused:
+                    raise
+                # Stale keep-alive socket: reconnect once before giving up
+                conn = await self._open(key)
+                try:
+                    status, headers, body, keep = await self._exchange(conn, request)
+                except BaseException:
+                    conn[1].close()
+                    raise
+            except BaseException:
+                conn[1].close()
+                raise
+            self._release(key, conn, keep)
+
+            if status in (301, 302, 303, 307, 308):
+                url = urljoin(url, headers.get('location', ''))
+                continue
+            return status, headers, body
+        raise ApiError(f"Too many redirects for {url}")
+
+    @staticmethod
+    async def _exchange(conn, request):
+        """Send one request and read the response (Content-Length, chunked or read-to-close body)."""
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        version, status = status_line.decode('latin1').split(' ', 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass  # trailers
+                    break
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+            body = bytes(body)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keep = False
+        return int(status), headers, body, keep
+
+
+class ResponseCache:
+    """One JSON file per request URL in `cache_dir`; entries older than `max_age_days` count as missing."""
+
+    def __init__(self, cache_dir=None, max_age_days=None):
+        self.cache_dir = Path(cache_dir or CACHE_DIR)
+        self.max_age = (CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days) * 86400
+
+    def path(self, url):
+        return self.cache_dir / (hashlib.sha256(url.encode('utf-8')).hexdigest()[:32] + '.json')
+
+    def get(self, url):
+        path = self.path(url)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age:
+                return None
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry['payload'] if entry.get('url') == url else None
+
+    def put(self, url, payload):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path(url)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'url': url, 'payload': payload}, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+
+class CrashApiClient:
+    """Bounded-concurrency JSON client for the Crash API with retries, pagination and a response cache."""
+
+    def __init__(self, base_url=None, cache=None, concurrency=None, retries=None, page_size=None, refresh=False):
+        self.base_url = (base_url or API_BASE_URL).rstrip('/')
+        self.cache = cache
+        self.retries = retries or MAX_RETRIES
+        self.page_size = page_size or PAGE_SIZE
+        self.refresh = refresh
+        self.semaphore = asyncio.Semaphore(concurrency or MAX_CONCURRENCY)
+        self.pool = AsyncConnectionPool()
+        self.stats = {'requests': 0, 'cached': 0, 'retries': 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.pool.close()
+
+    def url(self, endpoint, params):
+        return f"{self.base_url}/{endpoint.lstrip('/')}?{urlencode(sorted(params.items()))}"
+
+    async def get_json(self, endpoint, params):
+        """Decoded JSON for one request, from the cache when possible."""
+        url = self.url(endpoint, params)
+        if self.cache is not None and not self.refresh:
+            payload = self.cache.get(url)
+            if payload is not None:
+                self.stats['cached'] += 1
+                return payload
+
+        error = None
+        for attempt in range(self.retries):
+            if attempt:
+                self.stats['retries'] += 1
+                await asyncio.sleep(BACKOFF_BASE * 2 ** (attempt - 1) * (1 + random.random()))
+            async with self.semaphore:
+                self.stats['requests'] += 1
+                try:
+                    status, headers, body = await asyncio.wait_for(self.pool.request(url), TIMEOUT)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    error = e
+                    continue
+            if status == 404:
+                raise NotFoundError(f"HTTP 404 for {url}")
+            if status in RETRY_STATUS:
+                error = ApiError(f"HTTP {status}")
+                continue
+            if status != 200:
+                raise ApiError(f"HTTP {status} for {url}")
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                error = ApiError(f"invalid JSON ({e})")
+                continue
+            if self.cache is not None:
+                self.cache.put(url, payload)
+            return payload
+        raise ApiError(f"{url}: giving up after {self.retries} attempts ({error})")
+
+    async def get_records(self, endpoint, params):
+        """
+        All records of a paged listing, normalized (see normalize_record). Stops at a short
+        page, or at a page with no unseen cases (a server that ignores the paging parameters).
+        """
+        records, seen = [], set()
+        page = 1
+        while True:
+            payload = await self.get_json(endpoint, {**params, 'page': page, 'pageSize': self.page_size})
+            batch = [normalize_record(r) for r in result_rows(payload)]
+            new = [r for r in batch if (r.get('STATE'), r.get('ST_CASE')) not in seen]
+            seen.update((r.get('STATE'), r.get('ST_CASE')) for r in new)
+            records.extend(new)
+            if len(batch) < self.page_size or not new:
+                return records
+            page += 1
+
+    async def accident_records(self, year, state):
+        """Accident records of one state and year."""
+        params = {'dataset': 'Accident', 'FromYear': year, 'ToYear': year, 'State': state, 'format': 'json'}
+        return await self.get_records(ENDPOINT, params)
+
+    async def accident_year(self, year, states=None):
+        """Accident table of one year (all `states` requested concurrently) as an accident.csv frame."""
+        states = states or STATES
+        batches = await asyncio.gather(*(self.accident_records(year, s) for s in states))
+        return normalize_accidents([r for batch in batches for r in batch], year)
+
+
+def result_rows(payload):
+    """Records of a Crash API response: `Results` is a list of records, or a list of such lists."""
+    results = payload.get('Results', payload.get('results', [])) if isinstance(payload, dict) else payload
+    rows = []
+    for item in results or []:
+        rows.extend(item if isinstance(item, list) else [item])
+    return rows
+
+def normalize_record(record):
+    """Upper-case field names mapped onto the accident.csv names."""
+    out = {}
+    for key, value in record.items():
+        key = key.upper()
+        out[FIELD_ALIASES.get(key, key)] = value
+    return out
+
+def normalize_accidents(records, year):
+    """
+    accident.csv-shaped frame: ACCIDENT_COLUMNS only, numeric (unparseable values become NaN),
+    one row per (STATE, ST_CASE), YEAR filled in where the API leaves it out.
+    """
+    frame = pd.DataFrame.from_records(records)
+    frame = frame.reindex(columns=ACCIDENT_COLUMNS)
+    frame = frame.apply(pd.to_numeric, errors='coerce')
+    frame['YEAR'] = frame['YEAR'].fillna(year)
+    frame = frame.dropna(subset=['STATE', 'ST_CASE', 'COUNTY'])
+    frame = frame.drop_duplicates(['STATE', 'ST_CASE']).sort_values(['STATE', 'ST_CASE'])
+    ints = [c for c in ACCIDENT_COLUMNS if c not in ('LATITUDE', 'LONGITUD')]
+    frame[ints] = frame[ints].astype('Int64')
+    return frame.reset_index(drop=True)
+
+def write_accident_table(frame, year, datasets_dir=None, source=None):
+    """
+    Write datasets/FARS{year}/accident.csv (the extracted-folder layout ingest.read_fars_table reads)
+    and the PRELIMINARY_MARKER that lets download_data.py replace it with the published release.
+    """
+    out_dir = Path(datasets_dir or DATASETS_DIR) / f"FARS{year}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / PRELIMINARY_MARKER, 'w') as f:
+        json.dump({'source': source, 'fetched': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                   'crashes': len(frame)}, f, indent=2)
+    path = out_dir / "accident.csv"
+    tmp = path.with_suffix('.tmp')
+    frame.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return path
+
+def published_year(year, datasets_dir):
+    """A FARS{year}.zip, or an extracted FARS{year}/ folder without the preliminary marker."""
+    fars_dir = Path(datasets_dir) / f"FARS{year}"
+    if (Path(datasets_dir) / f"FARS{year}.zip").exists():
+        return True
+    return (fars_dir.is_dir() and not (fars_dir / PRELIMINARY_MARKER).exists()
+            and any(p.name.lower() in REQUIRED_MEMBERS for p in fars_dir.iterdir()))
+
+async def fetch_years(years, states=None, base_url=None, concurrency=None, refresh=False, use_cache=True,
+                      datasets_dir=None, page_size=None):
+    """
+    Fetch and write each year. Returns ({year: number of crashes written, or None on failure},
+    the client's request stats); skipped years are left out.
+    """
+    datasets_dir = Path(datasets_dir or DATASETS_DIR)
+    cache = ResponseCache(datasets_dir / "cache" / "crash_api") if use_cache else None
+    results = {}
+    async with CrashApiClient(base_url, cache, concurrency, page_size=page_size, refresh=refresh) as client:
+        for year in years:
+            if published_year(year, datasets_dir):
+                print(f"   ✓ FARS{year} is published, skipping (use download_data.py)")
+                continue
+            t0 = time.perf_counter()
+            try:
+                frame = await client.accident_year(year, states)
+            except ApiError as e:
+                print(f"   ❌ FARS{year}: {e}")
+                results[year] = None
+                continue
+            path = write_accident_table(frame, year, datasets_dir, client.base_url)
+            print(f"   ✓ FARS{year}: {len(frame):,} crashes from {frame['STATE'].nunique()} states "
+                  f"in {time.perf_counter() - t0:.1f}s -> {path}")
+            results[year] = len(frame)
+        print(f"   {client.stats['requests']} requests, {client.stats['cached']} cached responses, "
+              f"{client.stats['retries']} retries")
+    return results, client.stats
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch preliminary FARS accident records from the NHTSA Crash API.")
+    parser.add_argument('--years', type=int, nargs='+', required=True, help="Years to fetch")
+    parser.add_argument('--states', type=int, nargs='+', default=STATES, help="State FIPS codes (default: all)")
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY, help="Requests in flight at once")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help="Records requested per page")
+    parser.add_argument('--base-url', default=API_BASE_URL, help="Crash API root (or a local stand-in server)")
+    parser.add_argument('--refresh', action='store_true', help="Ignore cached responses (they are still updated)")
+    parser.add_argument('--no-cache', action='store_true', help="Neither read nor write the response cache")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("\n📡 Fetching FARS accident records from the NHTSA Crash API...")
+    print(f"   Source: {args.base_url}")
+    print()
+    results, _ = asyncio.run(fetch_years(args.years, args.states, args.base_url, args.concurrency, args.refresh,
+                                         not args.no_cache, page_size=args.page_size))
+    if any(n is None for n in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Stand-in for NHTSA's Crash API (FARSData/GetFARSData), for the fetch_crash_api tests.
+
+Serves deterministic accident records per (State, FromYear) with the API's
+mixed-case field names, pages them with page / pageSize, answers even pages
+with a chunked body and keeps connections alive (HTTP/1.1). The first request
+for each page of a `flaky` state gets a 503. Request, connection and failure
+counts are kept on the handler class (and served at /stats).
+
+Usage:
+    python tests/crash_api_server.py [port]      # then: python fetch_crash_api.py --years 2024 --base-url http://127.0.0.1:<port>/CrashAPI
+"""
+
+import json
+import random
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+CHUNK = 7000
+
+
+def accident_records(state, year):
+    """50-2500 records for one state and year, the same on every call."""
+    rng = random.Random(state * 10000 + year)
+    return [{'State': state, 'St_Case': state * 10000 + i, 'COUNTY': rng.choice([1, 3, 5, 999]),
+             'Month': rng.randint(1, 12), 'DAY_WEEK': rng.randint(1, 7), 'HOUR': rng.choice(list(range(24)) + [99]),
+             'LATITUDE': 35 + rng.random(), 'LONGITUDE': -90 - rng.random(), 'LGT_COND': rng.randint(1, 5),
+             'WEATHER': rng.randint(1, 12), 'FATALS': rng.randint(1, 3), 'DRUNK_DR': rng.randint(0, 1),
+             'CaseYear': year}
+            for i in range(1, 1 + rng.randint(50, 2500))]
+
+
+class CrashApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    flaky = set()      # states whose pages fail once each
+    stats = None       # {'connections', 'requests', 'failures'}
+    failed = None      # (state, year, page) already failed once
+    lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, flaky=()):
+        """A fresh handler class with its own counters."""
+        return type('CrashApi', (cls,), {'flaky': set(flaky), 'failed': set(), 'lock': threading.Lock(),
+                                         'stats': {'connections': 0, 'requests': 0, 'failures': 0}})
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            self.stats['connections'] += 1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == '/stats':
+            return self.reply(200, json.dumps(self.stats).encode())
+        with self.lock:
+            self.stats['requests'] += 1
+        if not url.path.endswith('/FARSData/GetFARSData'):
+            return self.reply(404, b'')
+
+        state, year = int(query['State']), int(query['FromYear'])
+        page, size = int(query.get('page', 1)), int(query.get('pageSize', 1000))
+        with self.lock:
+            fail = state in self.flaky and (state, year, page) not in self.failed
+            if fail:
+                self.failed.add((state, year, page))
+                self.stats['failures'] += 1
+        if fail:
+            return self.reply(503, b'busy')
+
+        records = accident_records(state, year)
+        body = json.dumps({'Count': len(records), 'Message': 'Results returned successfully',
+                           'Results': [records[(page - 1) * size:page * size]]}).encode()
+        self.reply(200, body, chunked=page % 2 == 0)
+
+    def reply(self, status, body, chunked=False):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(0, len(body), CHUNK):
+                chunk = body[i:i + CHUNK]
+                self.wfile.write(b'%x\r\n' % len(chunk) + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8766
+    print(f"Crash API stand-in on http://127.0.0.1:{port}/CrashAPI")
+    ThreadingHTTPServer(('127.0.0.1', port), CrashApiHandler.configure(flaky={6, 48})).serve_forever()
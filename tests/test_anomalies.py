@@ -0,0 +1,30 @@
+"""Anomaly scoring in anomalies.score_panel."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+from anomalies import score_panel, flag_anomalies
+
+
+def test_expected_deaths_follow_the_exported_baseline():
+    deaths = np.array([
+        [10, 12, 11, 9, 10, 40],   # spike in the last year
+        [0, 0, 0, 0, 1, 3],        # median 0: pooled baseline
+        [5, 6, 5, 0, 0, 0],        # only three observed years
+    ], dtype=np.float64)
+    population = np.full(deaths.shape, 100000.0)
+    mask = np.ones(deaths.shape, dtype=bool)
+    mask[2, 3:] = False
+    scores = score_panel(deaths, population, mask, min_years=5)
+
+    expected = scores['baseline'] * population / 100000
+    np.testing.assert_allclose(scores['expected'][mask], expected[mask])
+    assert scores['baseline'][0, 0] == 10.5
+    assert scores['baseline'][1, 0] == pytest.approx(4 / 6)
+    assert np.isnan(scores['baseline'][2]).all() and np.isnan(scores['surprise'][2]).all()
+
+    flagged = flag_anomalies(scores)
+    assert flagged.tolist()[0] == [False] * 5 + [True]
+    assert not flagged[1:].any()
@@ -0,0 +1,182 @@
+"""
+download_data.py against a local mirror that drops connections, answers 503
+and serves archives that do not match the manifest.
+"""
+
+import hashlib
+import json
+import re
+import zipfile
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import download_data
+
+YEARS = [2019, 2020]
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    """
+    Serves {root}/{year}/National/FARS{year}NationalCSV.zip with Range support.
+    `cut` paths lose the connection halfway through their first response,
+    `unavailable` paths answer 503 that many times first.
+    """
+    protocol_version = 'HTTP/1.1'
+    root = None
+    cut = set()
+    unavailable = {}
+    log = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        rng = self.headers.get('Range')
+        self.log.append((self.path, rng))
+        path = self.root / self.path.lstrip('/')
+        if self.unavailable.get(self.path, 0) > 0:
+            self.unavailable[self.path] -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if not path.is_file():
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = path.read_bytes()
+        start = int(re.match(r'bytes=(\d+)-', rng).group(1)) if rng else 0
+        if rng:
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.path in self.cut:
+            self.cut.discard(self.path)
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+def archive_path(year):
+    return f"/{year}/National/FARS{year}NationalCSV.zip"
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch, http_server):
+    """A mirror with one FARS archive per year (large enough to span many chunks), and an empty datasets/."""
+    root = tmp_path / "mirror"
+    archives = {}
+    for year in YEARS:
+        dest = root / archive_path(year).lstrip('/')
+        dest.parent.mkdir(parents=True)
+        rows = "".join(f"{i},{year},{i * 7919 % 100003}\n" for i in range(40000))
+        with zipfile.ZipFile(dest, 'w', zipfile.ZIP_STORED) as z:
+            z.writestr(f"FARS{year}NationalCSV/accident.csv", "ST_CASE,YEAR,X\n" + rows)
+            z.writestr(f"FARS{year}NationalCSV/person.csv", "ST_CASE\n1\n")
+        archives[year] = dest.read_bytes()
+
+    handler = type('Mirror', (MirrorHandler,), {'root': root, 'cut': set(), 'unavailable': {}, 'log': []})
+    datasets = tmp_path / "datasets"
+    datasets.mkdir()
+    monkeypatch.setattr(download_data, 'DATASETS_DIR', datasets)
+    monkeypatch.setattr(download_data, 'BACKOFF_BASE', 0.01)
+    sleeps = []
+    monkeypatch.setattr(download_data.time, 'sleep', sleeps.append)
+    return {'url': http_server(handler), 'handler': handler, 'archives': archives,
+            'datasets': datasets, 'sleeps': sleeps}
+
+
+def fetch(mirror, **kwargs):
+    return download_data.download_fars_data(YEARS, workers=2, base_url=mirror['url'], show_progress=False, **kwargs)
+
+
+def test_interrupted_download_resumes_with_range(mirror):
+    mirror['handler'].cut.update(archive_path(y) for y in YEARS)
+    assert fetch(mirror) == {y: True for y in YEARS}
+
+    manifest = json.loads((mirror['datasets'] / "fars_manifest.json").read_text())
+    for year in YEARS:
+        data = mirror['archives'][year]
+        assert (mirror['datasets'] / f"FARS{year}.zip").read_bytes() == data
+        assert not (mirror['datasets'] / f"FARS{year}.zip.part").exists()
+        assert manifest[str(year)]['size'] == len(data)
+        assert manifest[str(year)]['sha256'] == hashlib.sha256(data).hexdigest()
+        # The retry asked only for the missing second half
+        ranges = [r for p, r in mirror['handler'].log if p == archive_path(year)]
+        assert ranges == [None, f"bytes={len(data) // 2}-"]
+
+
+def test_unavailable_server_is_retried_with_backoff(mirror):
+    mirror['handler'].unavailable.update({archive_path(2019): 3})
+    assert fetch(mirror) == {2019: True, 2020: True}
+    assert sum(p == archive_path(2019) for p, _ in mirror['handler'].log) == 4
+
+    # Exponential backoff with jitter: 0.01 * 2**attempt * [1, 2)
+    assert len(mirror['sleeps']) == 3
+    for attempt, delay in enumerate(mirror['sleeps']):
+        assert 0.01 * 2 ** attempt <= delay < 0.01 * 2 ** (attempt + 1)
+
+
+def test_missing_year_is_not_retried(mirror):
+    results = download_data.download_fars_data([2019, 2021], workers=2, base_url=mirror['url'], show_progress=False)
+    assert results == {2019: True, 2021: False}
+    assert sum(p == archive_path(2021) for p, _ in mirror['handler'].log) == 1
+    assert mirror['sleeps'] == []
+
+
+@pytest.mark.parametrize('field, value, error', [
+    ('sha256', '0' * 64, "SHA-256 mismatch"),
+    ('size', 123, "size mismatch"),
+])
+def test_archive_not_matching_the_manifest_is_rejected(mirror, capsys, field, value, error):
+    data = mirror['archives'][2019]
+    pinned = {'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+    pinned[field] = value
+    download_data.save_manifest({'2019': pinned})
+
+    assert fetch(mirror) == {2019: False, 2020: True}
+    assert error in capsys.readouterr().out
+    assert not (mirror['datasets'] / "FARS2019.zip").exists()
+    assert sum(p == archive_path(2019) for p, _ in mirror['handler'].log) == download_data.MAX_RETRIES
+    # The pinned entry is kept, the new year is pinned next to it
+    manifest = download_data.load_manifest()
+    assert manifest['2019'] == pinned
+    assert manifest['2020']['sha256'] == hashlib.sha256(mirror['archives'][2020]).hexdigest()
+
+
+def test_extract_keeps_only_required_members(mirror):
+    assert fetch(mirror, extract=True) == {y: True for y in YEARS}
+    for year in YEARS:
+        assert sorted(p.name for p in (mirror['datasets'] / f"FARS{year}").iterdir()) == ["accident.csv"]
+        assert not (mirror['datasets'] / f"FARS{year}.zip").exists()
+
+
+@pytest.mark.parametrize('extract', [False, True])
+def test_published_release_replaces_preliminary_records(mirror, extract):
+    preliminary = mirror['datasets'] / "FARS2019"
+    preliminary.mkdir()
+    (preliminary / "accident.csv").write_text("ST_CASE,YEAR\n1,2019\n")
+    (preliminary / download_data.PRELIMINARY_MARKER).write_text("{}")
+    assert not download_data.fars_year_present(2019)
+
+    assert fetch(mirror, extract=extract) == {y: True for y in YEARS}
+    assert download_data.fars_year_present(2019)
+    if extract:
+        assert sorted(p.name for p in preliminary.iterdir()) == ["accident.csv"]
+        assert (preliminary / "accident.csv").read_text().startswith("ST_CASE,YEAR,X\n")
+    else:
+        assert not preliminary.exists()
+        assert (mirror['datasets'] / "FARS2019.zip").read_bytes() == mirror['archives'][2019]
+
+    # Published years are not fetched again
+    requests = len(mirror['handler'].log)
+    assert fetch(mirror, extract=extract) == {}
+    assert len(mirror['handler'].log) == requests
@@ -0,0 +1,93 @@
+"""fetch_crash_api.py against the local Crash API stand-in (tests/crash_api_server.py)."""
+
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+import download_data
+import fetch_crash_api
+import ingest
+from crash_api_server import CrashApiHandler, accident_records
+from hotspots import read_crash_points
+
+STATES = [1, 6, 48]
+YEAR = 2024
+PAGE_SIZE = 700
+
+
+@pytest.fixture
+def api(http_server, monkeypatch):
+    monkeypatch.setattr(fetch_crash_api, 'BACKOFF_BASE', 0.001)
+    handler = CrashApiHandler.configure(flaky={6, 48})
+    return {'url': http_server(handler) + "/CrashAPI", 'stats': handler.stats}
+
+
+def pages(state):
+    return len(accident_records(state, YEAR)) // PAGE_SIZE + 1
+
+
+def fetch(api, datasets, **kwargs):
+    return asyncio.run(fetch_crash_api.fetch_years([YEAR], STATES, api['url'], concurrency=2,
+                                                   datasets_dir=datasets, **kwargs))
+
+
+def test_fetch_pages_retries_and_writes_the_accident_table(api, tmp_path):
+    results, stats = fetch(api, tmp_path, page_size=PAGE_SIZE)
+
+    n_records = sum(len(accident_records(s, YEAR)) for s in STATES)
+    n_pages = sum(pages(s) for s in STATES)
+    n_failed = sum(pages(s) for s in (6, 48))
+    assert results == {YEAR: n_records}
+    assert stats == {'requests': n_pages + n_failed, 'cached': 0, 'retries': n_failed}
+    assert api['stats']['requests'] == n_pages + n_failed
+    assert api['stats']['connections'] <= 2 + n_failed  # keep-alive pool, at most a reconnect per failure
+
+    table = pd.read_csv(tmp_path / f"FARS{YEAR}" / "accident.csv")
+    assert list(table.columns) == fetch_crash_api.ACCIDENT_COLUMNS
+    assert len(table) == n_records and table[['STATE', 'ST_CASE']].duplicated().sum() == 0
+    expected = pd.DataFrame.from_records([r for s in STATES for r in accident_records(s, YEAR)])
+    assert table['ST_CASE'].tolist() == expected['St_Case'].tolist()
+    assert table['LONGITUD'].tolist() == pytest.approx(expected['LONGITUDE'].tolist())
+    assert (table['YEAR'] == YEAR).all()
+
+    marker = json.loads((tmp_path / f"FARS{YEAR}" / download_data.PRELIMINARY_MARKER).read_text())
+    assert marker['source'] == api['url'] and marker['crashes'] == n_records
+
+
+def test_second_run_is_served_from_the_cache(api, tmp_path):
+    fetch(api, tmp_path, page_size=PAGE_SIZE)
+    served = api['stats']['requests']
+    results, stats = fetch(api, tmp_path, page_size=PAGE_SIZE)
+    assert results == {YEAR: sum(len(accident_records(s, YEAR)) for s in STATES)}
+    assert stats == {'requests': 0, 'cached': sum(pages(s) for s in STATES), 'retries': 0}
+    assert api['stats']['requests'] == served
+
+    _, stats = fetch(api, tmp_path, page_size=PAGE_SIZE, refresh=True)
+    assert stats['requests'] == sum(pages(s) for s in STATES) and stats['cached'] == 0
+
+
+def test_module_defaults_are_read_at_call_time(api, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_crash_api, 'PAGE_SIZE', PAGE_SIZE)
+    monkeypatch.setattr(fetch_crash_api, 'DATASETS_DIR', tmp_path)
+    results, stats = asyncio.run(fetch_crash_api.fetch_years([YEAR], STATES, api['url']))
+    assert stats['requests'] - stats['retries'] == sum(pages(s) for s in STATES)
+    assert (tmp_path / f"FARS{YEAR}" / "accident.csv").exists()
+    assert (tmp_path / "cache" / "crash_api").is_dir()
+
+
+@pytest.mark.parametrize('published', [f"FARS{YEAR}.zip", f"FARS{YEAR}/accident.csv"])
+def test_published_years_are_skipped(api, tmp_path, published):
+    (tmp_path / published).parent.mkdir(exist_ok=True)
+    (tmp_path / published).write_bytes(b"")
+    results, stats = fetch(api, tmp_path)
+    assert results == {} and stats['requests'] == 0
+
+
+def test_fetched_year_reaches_the_analysis(api, tmp_path):
+    fetch(api, tmp_path, page_size=PAGE_SIZE)
+    assert ingest.fars_years(str(tmp_path)) == [YEAR]
+    pts = read_crash_points(YEAR, str(tmp_path))
+    assert len(pts['fips']) == sum(len(accident_records(s, YEAR)) for s in STATES)
+    assert pts['fips'][0] // 1000 == STATES[0]
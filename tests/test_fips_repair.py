@@ -0,0 +1,64 @@
+"""County FIPS validation and `fips_repair.py --apply` on a two-county map."""
+
+import json
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('shapely')
+
+import fips_repair
+import ingest
+
+# Two unit-degree counties side by side: 01001 west of -89, 01003 east of it
+COUNTIES = {1001: (-90, -89), 1003: (-89, -88)}
+ACCIDENTS = ("STATE,COUNTY,ST_CASE,LATITUDE,LONGITUD,FATALS\n"
+             "1,1,10001,35.5,-89.5,1\n"        # ok
+             "1,999,10002,35.5,-88.5,1\n"      # unknown county code, located in 01003
+             "1,1,10003,35.5,-88.5,2\n"        # coded 01001, located in 01003
+             "6,37,60001,35.5,-89.5,1\n"       # coded in another state: flagged only
+             "1,3,10004,99.9999,999.9999,1\n")  # no location
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    features = [{'type': 'Feature', 'id': f"{fips:05d}",
+                 'geometry': {'type': 'Polygon',
+                              'coordinates': [[[w, 35], [e, 35], [e, 36], [w, 36], [w, 35]]]}}
+                for fips, (w, e) in COUNTIES.items()]
+    geojson = tmp_path / "counties.json"
+    geojson.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+    datasets = tmp_path / "datasets"
+    datasets.mkdir()
+    with zipfile.ZipFile(datasets / "FARS2019.zip", 'w') as z:
+        z.writestr("accident.csv", ACCIDENTS)
+    monkeypatch.setattr(fips_repair, 'COUNTY_GEOJSON', str(geojson))
+    monkeypatch.setattr(fips_repair, 'OUTPUT_DIR', str(tmp_path / "output"))
+    monkeypatch.setattr(ingest, 'DATA_DIR', str(datasets))
+    fips_repair.county_polygons.cache_clear()
+    yield tmp_path
+    fips_repair.county_polygons.cache_clear()
+
+
+def test_statuses_and_repairs(data):
+    pts = fips_repair.crash_points()
+    check = fips_repair.validate_fips(pts)
+    assert [fips_repair.STATUS[s] for s in check['status']] == \
+        ['ok', 'unknown_code', 'mismatch', 'state_mismatch', 'no_location']
+    assert check['fips'].tolist() == [1001, 1003, 1003, 6037, 1003]
+
+
+def test_apply_writes_the_table_load_data_reads(data, capsys):
+    fips_repair.main(['--apply'])
+    assert "Wrote 2 repairs" in capsys.readouterr().out
+    assert (data / "output" / "FIPS_CHECK.csv").exists()
+
+    repairs = ingest.read_fips_repairs()
+    assert repairs[['ST_CASE', 'FIPS_Coded', 'FIPS']].values.tolist() == [[10002, 1999, 1003], [10003, 1001, 1003]]
+    fips = ingest.apply_fips_repairs(2019, np.array([10001, 10002, 10003]),
+                                     np.array([1001, 1999, 1001], dtype=np.int32), repairs)
+    assert fips.tolist() == [1001, 1003, 1003]
+    report = pd.read_csv(data / "output" / "FIPS_CHECK.csv", index_col=0)
+    assert report.loc['All', 'Repaired'] == 2
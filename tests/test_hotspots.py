@@ -0,0 +1,28 @@
+"""Crash-point loading in hotspots."""
+
+import zipfile
+
+import numpy as np
+import pytest
+
+import hotspots
+
+ACCIDENTS = "STATE,COUNTY,ST_CASE,LATITUDE,LONGITUD,FATALS,MONTH\n" \
+            "6,37,60001,34.05,-118.25,1,1\n" \
+            "6,37,60002,77.7777,777.7777,2,1\n" \
+            "36,61,360001,40.71,-74.00,1,2\n"
+
+
+def test_crash_points_are_read_and_cached(tmp_path):
+    with zipfile.ZipFile(tmp_path / "FARS2019.zip", 'w') as z:
+        z.writestr("accident.csv", ACCIDENTS)
+    pts = hotspots.crash_points(str(tmp_path), years=[2018, 2019])
+    assert pts['fips'].tolist() == [6037, 6037, 36061]
+    assert np.isnan(pts['lat'][1]) and np.isfinite(pts['lat'][[0, 2]]).all()
+    assert (tmp_path / "cache" / hotspots.CACHE_NAME).exists()
+    assert hotspots.crash_points(str(tmp_path), years=[2018, 2019])['st_case'].tolist() == [60001, 60002, 360001]
+
+
+def test_no_accident_tables_is_a_clear_error(tmp_path):
+    with pytest.raises(FileNotFoundError, match="No FARS accident tables for 2010-2011"):
+        hotspots.crash_points(str(tmp_path), years=[2010, 2011])
@@ -0,0 +1,52 @@
+"""FARS source discovery and the FIPS repair table in ingest."""
+
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import read_fars_table, write_fips_repairs, read_fips_repairs, apply_fips_repairs
+
+CSV = "ST_CASE,STATE\n10001,1\n10002,1\n"
+
+
+@pytest.mark.parametrize('member', ["accident.csv", "FARS2019NationalCSV/ACCIDENT.CSV", "a/b/Accident.csv"])
+def test_reads_accident_table_at_any_depth_of_an_archive(tmp_path, member):
+    with zipfile.ZipFile(tmp_path / "FARS2019.zip", 'w') as z:
+        z.writestr(member, CSV)
+    assert read_fars_table(2019, data_dir=str(tmp_path))['ST_CASE'].tolist() == [10001, 10002]
+
+
+@pytest.mark.parametrize('member', ["accident.csv", "FARS2019NationalCSV/ACCIDENT.CSV", "a/b/Accident.csv"])
+def test_reads_accident_table_at_any_depth_of_a_folder(tmp_path, member):
+    path = tmp_path / "FARS2019" / member
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(CSV)
+    assert read_fars_table(2019, data_dir=str(tmp_path))['ST_CASE'].tolist() == [10001, 10002]
+
+
+def test_shallowest_match_wins_and_missing_table_is_none(tmp_path):
+    folder = tmp_path / "FARS2019"
+    (folder / "old").mkdir(parents=True)
+    (folder / "old" / "accident.csv").write_text("ST_CASE,STATE\n1,1\n")
+    (folder / "accident.csv").write_text(CSV)
+    assert read_fars_table(2019, data_dir=str(tmp_path))['ST_CASE'].tolist() == [10001, 10002]
+    assert read_fars_table(2019, 'vehicle.csv', data_dir=str(tmp_path)) is None
+    assert read_fars_table(2018, data_dir=str(tmp_path)) is None
+
+
+def test_fips_repairs_only_apply_to_the_files_they_were_computed_from(tmp_path):
+    with zipfile.ZipFile(tmp_path / "FARS2019.zip", 'w') as z:
+        z.writestr("accident.csv", CSV)
+    table = pd.DataFrame({'Year': [2019], 'ST_CASE': [10002], 'FIPS_Coded': [1999], 'FIPS': [1003]})
+    write_fips_repairs(table, str(tmp_path))
+
+    repairs = read_fips_repairs(str(tmp_path))
+    fips = apply_fips_repairs(2019, np.array([10001, 10002]), np.array([1001, 1999], dtype=np.int32), repairs)
+    assert fips.tolist() == [1001, 1003]
+
+    # A re-downloaded year invalidates the table
+    with zipfile.ZipFile(tmp_path / "FARS2020.zip", 'w') as z:
+        z.writestr("accident.csv", CSV)
+    assert read_fips_repairs(str(tmp_path)) is None
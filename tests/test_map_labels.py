@@ -0,0 +1,33 @@
+"""Label placement cache in map_labels."""
+
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('shapely')
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import shapely
+
+from map_labels import place_labels
+
+
+def test_cache_is_keyed_on_font_weight(tmp_path):
+    geoms = [shapely.box(i * 10, 0, i * 10 + 9, 9) for i in range(3)]
+    lines = [['AA', 'BB', 'CC'], ['1.0', '22.5', '333.3']]
+    fig, ax = plt.subplots(figsize=(6, 3))
+    ax.set_xlim(-5, 35)
+    ax.set_ylim(-5, 15)
+    cache = str(tmp_path / "labels")
+    try:
+        bold = place_labels(ax, geoms, lines, sizes=(40, 30), cache_dir=cache)
+        normal = place_labels(ax, geoms, lines, sizes=(40, 30), weight='normal', cache_dir=cache)
+        assert len(os.listdir(cache)) == 2
+        assert (normal['w'] < bold['w']).all()
+        cached = place_labels(ax, geoms, lines, sizes=(40, 30), weight='normal', cache_dir=cache)
+        pd.testing.assert_frame_equal(cached, normal)
+        assert len(os.listdir(cache)) == 2
+    finally:
+        plt.close(fig)
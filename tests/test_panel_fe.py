@@ -0,0 +1,56 @@
+"""Absorbed fixed effects in panel_fe against explicit dummy-variable OLS."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from panel_fe import fit_fe, dummy_ols, synthetic_panel
+
+
+def dummy_cr1_se(df, weights=None):
+    """
+    Cluster-robust (by unit) SE of the x coefficient from the full dummy regression. The CR1
+    correction counts x and the year dummies; the intercept and unit dummies are nested in the clusters.
+    """
+    units = pd.get_dummies(df['FIPS_STR'], drop_first=True, dtype=float)
+    years = pd.get_dummies(df['Year'].astype(str), drop_first=True, dtype=float)
+    sw = np.sqrt(df[weights].to_numpy(np.float64)) if weights else np.ones(len(df))
+    X = np.column_stack([np.ones(len(df)), df['x'], units, years]) * sw[:, None]
+    y = df['y'].to_numpy() * sw
+    xtx_inv = np.linalg.pinv(X.T @ X)
+    resid = y - X @ (xtx_inv @ (X.T @ y))
+    g = pd.factorize(df['FIPS_STR'])[0]
+    summed = np.column_stack([np.bincount(g, weights=X[:, j] * resid) for j in range(X.shape[1])])
+    n, n_clusters, k = len(df), g.max() + 1, 1 + years.shape[1]
+    vcov = xtx_inv @ (summed.T @ summed) @ xtx_inv * n_clusters / (n_clusters - 1) * (n - 1) / (n - k)
+    return np.sqrt(vcov[1, 1])
+
+
+@pytest.fixture
+def panel():
+    df = synthetic_panel(60, n_years=8, seed=4)
+    df['w'] = np.random.default_rng(4).uniform(0.5, 20, len(df))
+    return df
+
+
+@pytest.mark.parametrize('weights', [None, 'w'])
+def test_matches_dummy_ols(panel, weights):
+    table, info = fit_fe(panel, 'y', ['x'], weights=weights, tol=1e-12)
+    assert info['dropped_singletons'] == 0 and info['clusters'] == 60
+    assert table.loc['x', 'coef'] == pytest.approx(dummy_ols(panel, weights), rel=1e-8)
+    assert table.loc['x', 'se'] == pytest.approx(dummy_cr1_se(panel, weights), rel=1e-6)
+
+
+def test_singletons_are_dropped_before_the_cr1_correction(panel):
+    rng = np.random.default_rng(5)
+    singles = pd.DataFrame({'FIPS_STR': [f"s{i}" for i in range(15)], 'Year': rng.integers(2010, 2018, 15),
+                            'x': rng.normal(size=15), 'y': rng.normal(0, 50, 15), 'w': 1.0})
+    df = pd.concat([panel, singles], ignore_index=True)
+
+    table, info = fit_fe(df, 'y', ['x'], tol=1e-12)
+    assert info['dropped_singletons'] == 15
+    assert info['nobs'] == len(panel) and info['clusters'] == 60
+    # A singleton is fitted exactly by its own dummy, so the coefficient is unchanged ...
+    assert table.loc['x', 'coef'] == pytest.approx(dummy_ols(df), rel=1e-8)
+    # ... but N and the cluster count in the correction are those of the panel without them
+    assert table.loc['x', 'se'] == pytest.approx(dummy_cr1_se(panel), rel=1e-6)
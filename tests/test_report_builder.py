@@ -0,0 +1,48 @@
+"""Report build stage on a tiny output/ and reports/ tree."""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('PIL')
+from PIL import Image
+
+import report_builder
+
+NARRATIVE = '<p>{{ counties }} counties.</p>\n<img src="../output/FIG_A.png" alt="A" />\n'
+
+
+@pytest.fixture
+def tree(tmp_path):
+    output, reports = tmp_path / "output", tmp_path / "reports"
+    output.mkdir()
+    reports.mkdir()
+    (reports / "report.html").write_text(NARRATIVE)
+    (reports / "report.md").write_text("# Report\n\n{{ counties }} counties.\n")
+    (output / "report_stats.json").write_text(json.dumps({'counties': 3142}))
+    return {'output': str(output), 'reports': str(reports), 'build': str(tmp_path / "build" / "nested")}
+
+
+def test_build_without_figures(tree, monkeypatch, capsys):
+    summary = report_builder.build_report(tree['output'], tree['reports'], tree['build'])
+    assert summary['figures'] == 0
+    with open(os.path.join(tree['build'], "report.html")) as f:
+        page = f.read()
+    assert "3,142 counties" in page
+
+    monkeypatch.setattr(report_builder, 'build_report', lambda: dict(summary, original_bytes=0, optimised_bytes=0))
+    report_builder.main()
+    assert "0 bytes" in capsys.readouterr().out
+
+
+def test_build_with_a_figure(tree):
+    Image.new('RGBA', (2000, 1000), (200, 30, 30, 255)).save(os.path.join(tree['output'], "FIG_A.png"))
+    summary = report_builder.build_report(tree['output'], tree['reports'], tree['build'])
+    assert summary['figures'] == 1 and summary['embedded'] == 1
+    assert 0 < summary['optimised_bytes'] < summary['original_bytes']
+    with open(os.path.join(tree['build'], "report.html")) as f:
+        page = f.read()
+    assert "<picture>" in page and 'width="1600" height="800"' in page
+    assets = set(os.listdir(os.path.join(tree['build'], "assets")))
+    assert {"FIG_A.png", "FIG_A-400.webp", "FIG_A-800.webp", "FIG_A-1600.webp"} <= assets
@@ -0,0 +1,51 @@
+"""Rollup cube: weighted rates and cache invalidation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollups import rollup
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'FIPS_STR': ['01001', '01003', '02001', '01001', '01003', '02001'],
+        'State_Abbrev': ['AL', 'AL', 'AK'] * 2,
+        'Year': [2019] * 3 + [2020] * 3,
+        'Urbanicity': ['Rural', 'Urban', 'Rural'] * 2,
+        'Edu_Group': ['Med-High', 'Med-Low', 'Med-High'] * 2,
+        'FATALS': [10, 1, 4, 20, 1, 6],
+        'ST_CASE': [8, 1, 4, 16, 1, 5],
+        'Drunk': [2, 0, 1, 4, 1, 1],
+        'Dark': [4, 1, 2, 8, 0, 3],
+        'Bad_Weather': [1, 0, 0, 2, 0, 1],
+        'Population': [10000, 990000, 50000, 10000, 990000, 50000],
+        'Count_Less_HS': [1000, 50000, 5000, 1000, 50000, 5000],
+    })
+
+
+def test_state_rates_are_population_weighted(frame):
+    al = rollup(frame, ['State_Abbrev']).set_index('State_Abbrev').loc['AL']
+    assert al['Fatality_Rate'] == pytest.approx(32 / 2000000 * 100000)
+    assert al['Avg_Population'] == 1000000
+    assert al['Years'] == 2
+    nation = rollup(frame).iloc[0]
+    assert nation['FATALS'] == 42 and nation['Years'] == 2
+
+
+def test_in_place_changes_rebuild_the_cube(frame):
+    before = rollup(frame, ['State_Abbrev']).set_index('State_Abbrev')['FATALS']
+    frame.loc[0, 'FATALS'] += 100
+    after = rollup(frame, ['State_Abbrev']).set_index('State_Abbrev')['FATALS']
+    assert after['AL'] == before['AL'] + 100 and after['AK'] == before['AK']
+
+    frame.loc[2, 'State_Abbrev'] = 'AL'
+    assert list(rollup(frame, ['State_Abbrev'])['State_Abbrev']) == ['AK', 'AL']
+    assert rollup(frame, ['State_Abbrev']).set_index('State_Abbrev')['FATALS'].sum() == 142
+
+
+def test_returned_levels_are_copies(frame):
+    years = rollup(frame, ['Year'])
+    years['FATALS'] = np.nan
+    assert rollup(frame, ['Year'])['FATALS'].tolist() == [15, 27]
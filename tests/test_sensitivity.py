@@ -0,0 +1,40 @@
+"""sweep() against the pd.qcut + groupby brute force in check(), on frames with tied values."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensitivity import sweep, check
+
+BINS = [2, 3, 4, 5, 7, 10]
+THRESHOLDS = [2_500, 10_000, 50_000, 250_000]
+
+
+def frame(seed, n=3000, decimals=1, zeros=0.0):
+    """
+    County-years with Pct_Less_HS rounded (ties across bin edges), a `zeros` share of it
+    at 0 (repeated lowest edges) and populations that hit the cutoffs exactly.
+    """
+    rng = np.random.default_rng(seed)
+    pop = np.round(np.exp(rng.uniform(np.log(500), np.log(2_000_000), n)), -2)
+    pop = np.where(rng.random(n) < 0.1, rng.choice(THRESHOLDS, n), pop)
+    return pd.DataFrame({
+        'Pct_Less_HS': np.where(rng.random(n) < zeros, 0, np.round(rng.gamma(4, 3, n), decimals)),
+        'Population': pop,
+        'FATALS': rng.poisson(pop / 10_000 + 1),
+        'Drunk': rng.poisson(pop / 40_000 + 0.3),
+    })
+
+
+@pytest.mark.parametrize('seed, decimals, zeros', [(0, 1, 0), (1, 0, 0), (2, 2, 0), (3, 1, 0.3)])
+def test_sweep_matches_check(seed, decimals, zeros):
+    df = frame(seed, decimals=decimals, zeros=zeros)
+    s = sweep(df, bins=BINS, thresholds=THRESHOLDS)
+    edu = s['edu_bins'].set_index('Bins')
+    urban = s['urban_threshold'].set_index('Threshold')
+    for k in BINS:
+        for t in THRESHOLDS:
+            brute = check(df, k, t)
+            assert edu.loc[k, 'Fatality_Rate_Ratio'] == pytest.approx(brute['edu_ratio'])
+            assert s['rural_edu_gap'].loc[t, k] == pytest.approx(brute['rural_edu_ratio'])
+            assert urban.loc[t, 'Fatality_Rate_Ratio'] == pytest.approx(brute['rural_urban_ratio'])
@@ -0,0 +1,56 @@
+"""Mergeable summaries in sketches, against pandas / numpy on the whole column."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import column_summary, merge_summaries, quantile_edges, cut_by_edges, variance, rank_error
+
+LABELS = ['q1', 'q2', 'q3', 'q4']
+
+
+@pytest.fixture
+def column():
+    rng = np.random.default_rng(7)
+    # Education-like percentages, rounded so there are plenty of ties
+    x = np.round(np.clip(rng.gamma(4, 3.5, 45_000), 0, 80), 1)
+    return x, rng.integers(2010, 2024, len(x))
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_exact_local_path_matches_qcut(column, dtype):
+    x, years = column
+    x = x.astype(dtype)
+    total = merge_summaries(*[column_summary(x[years == y], k=None) for y in np.unique(years)])
+    assert total['kll']['error_bound'] == 0
+    groups = cut_by_edges(x, quantile_edges(total, 4), LABELS)
+    reference = pd.qcut(x, 4, labels=LABELS)
+    assert (groups == reference).all()
+    assert list(groups.categories) == LABELS
+
+
+def test_moments_merge_exactly(column):
+    x, years = column
+    total = merge_summaries(*[column_summary(x[years == y]) for y in np.unique(years)])['moments']
+    assert total['count'] == len(x)
+    assert total['mean'] == pytest.approx(x.mean(), rel=1e-12)
+    assert variance(total) == pytest.approx(x.var(ddof=1), rel=1e-10)
+    assert (total['min'], total['max']) == (x.min(), x.max())
+
+
+def test_compacting_sketch_stays_within_its_bound(column):
+    x, _ = column
+    shards = np.arange(len(x)) % 64
+    total = merge_summaries(*[column_summary(x[shards == s], k=256) for s in range(64)])
+    sk = total['kll']
+    assert sk['n'] == len(x) and sk['error_bound'] > 0
+    assert sum(len(lv) for lv in sk['levels']) < len(x) / 10
+    edges = quantile_edges(total, 4)
+    assert rank_error(np.sort(x), edges[1:-1], [0.25, 0.5, 0.75]).max() <= sk['error_bound']
+
+
+def test_rank_error_counts_tied_edges_as_exact():
+    x = np.array([1.0, 2, 2, 2, 2, 2, 2, 3])
+    # 2.0 occupies ranks 1-7, so it is an exact quartile, median and third quartile
+    assert rank_error(x, [2.0, 2.0, 2.0], [0.25, 0.5, 0.75]).tolist() == [0, 0, 0]
+    assert rank_error(x, [1.0, 3.0], [0.5, 0.5]).tolist() == [3, 3]
@@ -0,0 +1,104 @@
+"""Contiguity weights cache and Moran statistics in spatial_stats."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('shapely')
+
+import spatial_stats
+from rollups import rollup
+from spatial_stats import county_weights, align_weights, morans_i, local_morans, county_lisa, NOT_SIGNIFICANT
+
+build_weights = county_weights.__wrapped__  # skip the in-process lru_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(spatial_stats, 'CACHE_DIR', str(tmp_path / "cache"))
+    county_weights.cache_clear()
+    yield
+    county_weights.cache_clear()
+
+
+def grid_geojson(path, n, first_fips=1001):
+    """n x n unit squares; FIPS numbered row by row."""
+    features = [{'type': 'Feature', 'id': first_fips + r * n + c,
+                 'geometry': {'type': 'Polygon',
+                              'coordinates': [[[c, r], [c + 1, r], [c + 1, r + 1], [c, r + 1], [c, r]]]}}
+                for r in range(n) for c in range(n)]
+    with open(path, 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+    return str(path)
+
+
+def test_queen_contiguity(tmp_path):
+    fips, w = build_weights(grid_geojson(tmp_path / "grid.json", 3), str(tmp_path / "cache"))
+    degree = dict(zip(fips, np.asarray(w.sum(axis=1)).ravel()))
+    assert degree['01001'] == 3 and degree['01002'] == 5 and degree['01005'] == 8
+
+
+def test_cache_is_per_path_and_follows_content(tmp_path):
+    cache = str(tmp_path / "cache")
+    small = grid_geojson(tmp_path / "small.json", 2)
+    large = grid_geojson(tmp_path / "large.json", 4)
+    assert len(build_weights(small, cache)[0]) == 4
+    assert len(build_weights(large, cache)[0]) == 16
+    assert len(os.listdir(cache)) == 2
+    assert len(build_weights(small, cache)[0]) == 4
+
+    # Same path and mtime, different contents: rebuilt
+    st = os.stat(small)
+    grid_geojson(small, 3)
+    os.utime(small, (st.st_atime, st.st_mtime))
+    assert len(build_weights(small, cache)[0]) == 9
+
+
+def test_constant_column_is_not_significant(tmp_path):
+    fips, _ = county_weights(grid_geojson(tmp_path / "grid.json", 5))
+    y, w = align_weights(pd.Series(7.0, index=fips), str(tmp_path / "grid.json"))
+    lisa = local_morans(y, w, permutations=99)
+    assert (lisa['cluster'] == NOT_SIGNIFICANT).all()
+    assert (lisa['p_sim'] == 1).all() and (lisa['Is'] == 0).all()
+    g = morans_i(y.values, w, permutations=99)
+    assert np.isnan(g['I']) and g['p_sim'] == 1
+
+
+def test_clustered_column_is_detected(tmp_path):
+    fips, _ = county_weights(grid_geojson(tmp_path / "grid.json", 10))
+    # Left half high, right half low
+    values = pd.Series([10.0 if (int(f) - 1001) % 10 < 5 else 0.0 for f in fips], index=fips)
+    y, w = align_weights(values, str(tmp_path / "grid.json"))
+    g = morans_i(y.values, w, permutations=99)
+    assert g['I'] > 0.5 and g['p_sim'] == pytest.approx(0.01)
+
+
+def test_lisa_uses_the_population_weighted_county_rates(tmp_path):
+    geojson = grid_geojson(tmp_path / "grid.json", 6)
+    fips, _ = county_weights(geojson)
+    rng = np.random.default_rng(3)
+    n = len(fips)
+    # Two years per county, one with a tiny population: the unweighted mean of the rates is dominated by it
+    df = pd.DataFrame({
+        'FIPS_STR': np.tile(fips, 2), 'Year': np.repeat([2019, 2020], n),
+        'State_Abbrev': 'AL', 'Urbanicity': 'Rural', 'Edu_Group': 'Low',
+        'FATALS': rng.integers(0, 20, 2 * n), 'ST_CASE': 1, 'Drunk': 0, 'Dark': 0, 'Bad_Weather': 0,
+        'Population': np.concatenate([rng.integers(50, 500, n), rng.integers(10**5, 10**6, n)]),
+        'Count_Less_HS': rng.integers(0, 50, 2 * n),
+    })
+    df['Fatality_Rate'] = df['FATALS'] / df['Population'] * 100000
+    df['Pct_Less_HS'] = df['Count_Less_HS'] / df['Population'] * 100
+
+    moran, clusters = county_lisa(df, permutations=99, geojson_path=geojson)
+    county = rollup(df, ['FIPS_STR']).set_index('FIPS_STR')
+    for col in ('Fatality_Rate', 'Pct_Less_HS'):
+        y, w = align_weights(county[col], geojson)
+        expected = local_morans(y, w, permutations=99)
+        pd.testing.assert_frame_equal(clusters[col], expected)
+        assert moran[col]['I'] == pytest.approx(morans_i(y.values, w, permutations=99)['I'])
+
+    y, w = align_weights(df.groupby('FIPS_STR')['Fatality_Rate'].mean(), geojson)
+    assert not np.allclose(clusters['Fatality_Rate']['Is'], local_morans(y, w, permutations=99)['Is'])